@@ -19,20 +19,116 @@ OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 AI_TEMPERATURE = float(os.getenv("AI_TEMPERATURE", "0"))
 OPENAI_IMAGE_MODEL = os.getenv("OPENAI_IMAGE_MODEL") or "gpt-image-1"
 OPENAI_IMAGE_SIZE = os.getenv("OPENAI_IMAGE_SIZE") or "1024x1024"
+# Default ceiling of in-flight OpenAI requests; batch --workers and cache warm --concurrency override it
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "8"))
+# Stream JSON completions and abort early when the output is not the expected JSON
+OPENAI_STREAMING = os.getenv("OPENAI_STREAMING", "false").lower() in ("1", "true", "yes")
+
+# Shared OpenAI HTTP connection pool
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+OPENAI_MAX_KEEPALIVE = int(os.getenv("OPENAI_MAX_KEEPALIVE", "10"))
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "30"))
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "120"))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "10"))
+OPENAI_HTTP2 = os.getenv("OPENAI_HTTP2", "false").lower() in ("1", "true", "yes")
+
+# Rate limits (refined at runtime from x-ratelimit-* response headers)
+OPENAI_RPM_LIMIT = float(os.getenv("OPENAI_RPM_LIMIT", "500"))
+OPENAI_TPM_LIMIT = float(os.getenv("OPENAI_TPM_LIMIT", "200000"))
+OPENAI_IMAGES_PER_MINUTE = float(os.getenv("OPENAI_IMAGES_PER_MINUTE", "5"))
+OPENAI_EXPECTED_COMPLETION_TOKENS = int(os.getenv("OPENAI_EXPECTED_COMPLETION_TOKENS", "1000"))
+OPENAI_RATE_LIMIT_MAX_WAIT = float(os.getenv("OPENAI_RATE_LIMIT_MAX_WAIT", "300"))
+
+# Transport-level retries (connection errors, timeouts, 5xx)
+OPENAI_RETRY_MAX_ATTEMPTS = int(os.getenv("OPENAI_RETRY_MAX_ATTEMPTS", "5"))
+OPENAI_RETRY_NON_IDEMPOTENT_ATTEMPTS = int(os.getenv("OPENAI_RETRY_NON_IDEMPOTENT_ATTEMPTS", "2"))
+OPENAI_RETRY_MAX_ELAPSED = float(os.getenv("OPENAI_RETRY_MAX_ELAPSED", "120"))
+OPENAI_RETRY_BASE_DELAY = float(os.getenv("OPENAI_RETRY_BASE_DELAY", "1.0"))
+OPENAI_RETRY_MAX_DELAY = float(os.getenv("OPENAI_RETRY_MAX_DELAY", "30"))
 
 # Paths
 CACHE_DIR = PROJECT_ROOT / os.getenv("CACHE_DIR", "cache/ai_outputs")
+# Cache storage: 'sqlite' (single WAL database) or 'files' (legacy one file per entry)
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "sqlite")
+
+# Cache eviction per artifact type (0 = unlimited): LRU by access time within
+# CACHE_<TYPE>_MAX_MB / CACHE_<TYPE>_MAX_ENTRIES, entries unused for CACHE_<TYPE>_TTL_DAYS expire
+CACHE_LIMITS = {
+    kind: {
+        "max_bytes": int(float(os.getenv(f"CACHE_{kind.upper()}_MAX_MB", default_mb)) * 1024 * 1024),
+        "max_entries": int(os.getenv(f"CACHE_{kind.upper()}_MAX_ENTRIES", "0")),
+        "ttl_seconds": float(os.getenv(f"CACHE_{kind.upper()}_TTL_DAYS", "0")) * 86400
+    }
+    for kind, default_mb in (
+        ("report", "256"),
+        ("design_brief", "256"),
+        ("image_prompt", "64"),
+        ("signature", "128"),
+        ("response", "512"),
+        ("image", "1024"),
+        ("render", "1024")
+    )
+}
+# Keep the raw completion, model, prompt version and usage of every report/brief call
+# (`main.py cache reparse` rebuilds entries from them without API calls)
+CACHE_RAW_RESPONSES = os.getenv("CACHE_RAW_RESPONSES", "true").lower() in ("1", "true", "yes")
+# Transcript normalization before cache-key hashing (empty = hash raw text);
+# headers, timestamps and speakers are opt-in: they drop dates/times the report may rely on
+TEXT_NORMALIZATION = os.getenv("TEXT_NORMALIZATION", "nfc,whitespace")
+# Near-duplicate transcript reuse: off | reuse (serve the similar report) | refresh (update it from the diff)
+SIMILARITY_REUSE = os.getenv("SIMILARITY_REUSE", "off").lower()
+# Min estimated Jaccard similarity of transcript shingles to count as a near-duplicate
+SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0.9"))
+# MinHash signature length and LSH band count (permutations must divide evenly into bands)
+SIMILARITY_PERMUTATIONS = int(os.getenv("SIMILARITY_PERMUTATIONS", "128"))
+SIMILARITY_BANDS = int(os.getenv("SIMILARITY_BANDS", "16"))
+# Cache hit/miss events and per-entry production cost for `main.py cache stats`
+CACHE_METRICS = os.getenv("CACHE_METRICS", "true").lower() in ("1", "true", "yes")
+CACHE_METRICS_RETENTION_DAYS = float(os.getenv("CACHE_METRICS_RETENTION_DAYS", "90"))
+# In-process LRU of validated reports/briefs in front of the cache backend (0 = off)
+MEMORY_CACHE_ENTRIES = int(os.getenv("MEMORY_CACHE_ENTRIES", "256"))
+# Min seconds between opportunistic collections in one process (0 = only `cache gc`)
+CACHE_GC_INTERVAL = float(os.getenv("CACHE_GC_INTERVAL", "600"))
+BATCH_API_DIR = PROJECT_ROOT / os.getenv("BATCH_API_DIR", "cache/batches")
+IMAGE_CACHE_DIR = PROJECT_ROOT / os.getenv("IMAGE_CACHE_DIR", "cache/images")
+# Content-addressed cache of rendered PDFs (identical data/template/CSS/image -> no re-render)
+RENDER_CACHE = os.getenv("RENDER_CACHE", "true").lower() in ("1", "true", "yes")
+RENDER_CACHE_DIR = PROJECT_ROOT / os.getenv("RENDER_CACHE_DIR", "cache/renders")
+# Compiled Jinja2 templates persisted on disk and shared by processes (batch workers, server)
+TEMPLATE_BYTECODE_CACHE = os.getenv("TEMPLATE_BYTECODE_CACHE", "true").lower() in ("1", "true", "yes")
+TEMPLATE_BYTECODE_DIR = PROJECT_ROOT / os.getenv("TEMPLATE_BYTECODE_DIR", "cache/templates")
+# Let Jinja2 re-check every template on each render (development); otherwise only the
+# rendered template's mtime is compared and a change triggers recompilation
+TEMPLATE_AUTO_RELOAD = os.getenv("TEMPLATE_AUTO_RELOAD", "false").lower() in ("1", "true", "yes")
 TEMPLATES_DIR = PROJECT_ROOT / "templates"
 REPORTS_DIR = PROJECT_ROOT / "reports"
 LOGS_DIR = PROJECT_ROOT / "logs"
 FIXTURES_DIR = PROJECT_ROOT / "fixtures"
 ASSETS_DIR = PROJECT_ROOT / "assets"
 
+# Batch processing
+BATCH_IO_WORKERS = int(os.getenv("BATCH_IO_WORKERS", "8"))
+BATCH_RENDER_WORKERS = int(os.getenv("BATCH_RENDER_WORKERS", "0")) or None  # None = CPU count
+# Render workers are started via forkserver (spawn where unavailable) and replaced
+# after this many renders per worker to cap memory growth (0 = never)
+RENDER_POOL_START_METHOD = os.getenv("RENDER_POOL_START_METHOD", "forkserver")
+RENDER_POOL_MAX_TASKS = int(os.getenv("RENDER_POOL_MAX_TASKS", "200"))
+JOB_DB_PATH = PROJECT_ROOT / os.getenv("JOB_DB_PATH", "jobs.sqlite3")
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "600"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+# Report server (main.py serve)
+SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8080"))
+SERVER_MAX_BODY_BYTES = int(os.getenv("SERVER_MAX_BODY_BYTES", str(5 * 1024 * 1024)))
+
 # Logging
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 
 # Ensure required directories exist
 CACHE_DIR.mkdir(parents=True, exist_ok=True)
+IMAGE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+RENDER_CACHE_DIR.mkdir(parents=True, exist_ok=True)
 REPORTS_DIR.mkdir(parents=True, exist_ok=True)
 LOGS_DIR.mkdir(parents=True, exist_ok=True)
 ASSETS_DIR.mkdir(parents=True, exist_ok=True)
@@ -48,3 +144,7 @@ def validate_config():
     if not OPENAI_API_KEY.startswith("sk-"):
         print("WARNING: OPENAI_API_KEY does not look like a valid OpenAI API key.")
         print("Make sure you've set the correct key in your .env file.")
+
+    if SIMILARITY_REUSE not in ("off", "reuse", "refresh"):
+        print(f"ERROR: SIMILARITY_REUSE must be one of off, reuse, refresh (got '{SIMILARITY_REUSE}').")
+        sys.exit(1)
@@ -15,10 +15,19 @@ import config
 from utils.logging_setup import setup_logging
 from utils.io import read_text_file
 from utils.ai_processor import (
+    analysis_created_at,
     process_dialog_with_ai,
     extract_design_brief,
     make_image_prompt_from_brief
 )
+from utils.html_renderer import render_html
+from utils.report_output import (
+    FORMATS,
+    DEFAULT_FORMATS,
+    format_generation_date,
+    parse_formats,
+    write_report_outputs
+)
 from services.openai_client import generate_image
 
 logger = logging.getLogger(__name__)
@@ -69,6 +78,14 @@ def install_glib_warning_filter():
         sys.stderr = StderrFilter(sys.stderr)
 
 
+def output_formats(value: str):
+    """argparse type of --format."""
+    try:
+        return parse_formats(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
 def parse_arguments():
     """Parse command line arguments."""
     parser = argparse.ArgumentParser(
@@ -79,8 +96,22 @@ Examples:
   %(prog)s
   %(prog)s --input transcripts/meeting_2026.txt
   %(prog)s --input data.txt --output reports/custom_report.pdf
+  %(prog)s --input data.txt --format json,html
   %(prog)s --no-cache --log-level DEBUG
   %(prog)s --template templates/custom_template.html
+  %(prog)s --input-dir transcripts/ --glob "**/*.txt" --workers 16
+  %(prog)s --input-dir transcripts/ --combined-output reports/digest.pdf
+  %(prog)s --input-dir transcripts/ --format jsonl
+  %(prog)s batch-api submit --input-dir transcripts/ --wait
+  %(prog)s serve --port 8080
+  %(prog)s cache migrate-backend --from files --to sqlite
+  %(prog)s cache gc --dry-run
+  %(prog)s cache normalization-report --input-dir transcripts/
+  %(prog)s cache warm --input-dir transcripts/ --concurrency 8 --max-tokens 500000
+  %(prog)s cache stats --window-hours 24 --json
+  %(prog)s cache reparse --dry-run
+  %(prog)s cache migrate-schema
+  %(prog)s benchmark --iterations 50
         """
     )
     
@@ -91,6 +122,54 @@ Examples:
         help='Path to transcript file (default: fixtures/sample_transcript.txt)'
     )
     
+    parser.add_argument(
+        '--input-dir',
+        type=Path,
+        default=None,
+        help='Batch mode: process every transcript in this directory'
+    )
+
+    parser.add_argument(
+        '--glob',
+        default='*.txt',
+        help='Batch mode: glob pattern for transcripts inside --input-dir (default: *.txt)'
+    )
+
+    parser.add_argument(
+        '--output-dir',
+        type=Path,
+        default=config.REPORTS_DIR,
+        help='Batch mode: directory for generated PDFs (default: reports/)'
+    )
+
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=config.BATCH_IO_WORKERS,
+        help=f'Batch mode: max concurrent AI requests (default: {config.BATCH_IO_WORKERS})'
+    )
+
+    parser.add_argument(
+        '--render-workers',
+        type=int,
+        default=config.BATCH_RENDER_WORKERS,
+        help='Batch mode: max concurrent PDF render processes (default: CPU count)'
+    )
+
+    parser.add_argument(
+        '--combined-output',
+        type=Path,
+        default=None,
+        help='Batch mode: also compile all finished reports into one PDF with a table of contents'
+    )
+
+    parser.add_argument(
+        '--job-db',
+        type=Path,
+        default=config.JOB_DB_PATH,
+        help='Batch mode: job store for resumable runs (default: jobs.sqlite3)'
+    )
+
     parser.add_argument(
         '--output',
         type=Path,
@@ -98,6 +177,16 @@ Examples:
         help='Output PDF path (default: auto-generated in reports/ with timestamp)'
     )
     
+    parser.add_argument(
+        '--format',
+        dest='formats',
+        type=output_formats,
+        default=DEFAULT_FORMATS,
+        metavar='FORMATS',
+        help=f'Comma-separated output formats: {",".join(FORMATS)} (default: pdf); '
+             'PDF is rendered only if requested'
+    )
+
     parser.add_argument(
         '--template',
         type=Path,
@@ -150,6 +239,449 @@ Examples:
     return args
 
 
+COMMANDS = ('batch-api', 'serve', 'cache', 'benchmark')
+
+
+def parse_command_arguments(argv: List[str]):
+    """Parse arguments for subcommands (batch-api, ...)."""
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument(
+        '--log-level',
+        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
+        default=config.LOG_LEVEL,
+        help=f'Logging level (default: {config.LOG_LEVEL})'
+    )
+
+    parser = argparse.ArgumentParser(
+        description='AI Client Report Generator - maintenance and bulk commands'
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    # OpenAI Batch API: bulk overnight analysis into the cache
+    batch_api = commands.add_parser('batch-api', help='Bulk analysis via the OpenAI Batch API')
+    batch_api.set_defaults(handler=run_batch_api_command)
+    batch_actions = batch_api.add_subparsers(dest='action', required=True)
+
+    submit = batch_actions.add_parser('submit', parents=[common], help='Build and submit a batch')
+    submit.add_argument('--input-dir', type=Path, required=True, help='Directory with transcripts')
+    submit.add_argument('--glob', default='*.txt', help='Glob pattern for transcripts (default: *.txt)')
+    submit.add_argument('--report-type', choices=['client', 'design'], default='client')
+    submit.add_argument('--wait', action='store_true', help='Wait for completion and collect results')
+
+    collect = batch_actions.add_parser('collect', parents=[common], help='Collect results of a batch into the cache')
+    collect.add_argument('batch_id', help='Batch identifier printed by submit')
+    collect.add_argument('--wait', action='store_true', help='Wait until the batch finishes')
+
+    for action in (submit, collect):
+        action.add_argument('--local', action='store_true', help='Use the local batch stand-in instead of OpenAI')
+        action.add_argument('--poll-interval', type=float, default=30.0, help='Seconds between status polls')
+
+    # Long-running HTTP report server
+    serve = commands.add_parser('serve', parents=[common], help='Run a local HTTP report server')
+    serve.set_defaults(handler=run_serve_command)
+    serve.add_argument('--host', default=config.SERVER_HOST, help=f'Bind address (default: {config.SERVER_HOST})')
+    serve.add_argument('--port', type=int, default=config.SERVER_PORT, help=f'Port (default: {config.SERVER_PORT})')
+
+    # WeasyPrint setup cost per render
+    benchmark = commands.add_parser(
+        'benchmark', parents=[common], help='Measure per-render savings of the shared stylesheet and fonts'
+    )
+    benchmark.set_defaults(handler=run_benchmark_command)
+    benchmark.add_argument('--report-type', choices=['client', 'design'], default='client')
+    benchmark.add_argument('--iterations', type=int, default=20, help='Timed renders per mode (default: 20)')
+    benchmark.add_argument('--json', action='store_true', help='Print machine-readable JSON')
+
+    # AI cache maintenance
+    cache = commands.add_parser('cache', help='AI cache maintenance')
+    cache.set_defaults(handler=run_cache_command)
+    cache_actions = cache.add_subparsers(dest='action', required=True)
+
+    migrate = cache_actions.add_parser(
+        'migrate-backend', parents=[common], help='Copy cache entries from one backend to another'
+    )
+    migrate.add_argument('--from', dest='source', choices=['files', 'sqlite'], default='files',
+                         help='Backend to read from (default: files)')
+    migrate.add_argument('--to', dest='target', choices=['files', 'sqlite'], default='sqlite',
+                         help='Backend to write to (default: sqlite)')
+    migrate.add_argument('--remove-source', action='store_true', help='Delete migrated entries from the source')
+
+    gc = cache_actions.add_parser(
+        'gc', parents=[common], help='Evict cache entries over the configured size/count/age limits'
+    )
+    gc.add_argument('--dry-run', action='store_true', help='Only show what would be removed')
+
+    normalization = cache_actions.add_parser(
+        'normalization-report', parents=[common],
+        help='Simulate cache hits of a transcript corpus with raw vs normalized keys'
+    )
+    normalization.add_argument('--input-dir', type=Path, required=True, help='Directory with transcripts')
+    normalization.add_argument('--glob', default='*.txt', help='Glob pattern for transcripts (default: *.txt)')
+    normalization.add_argument('--steps', default=None,
+                               help='Comma-separated normalization steps (default: TEXT_NORMALIZATION)')
+
+    warm = cache_actions.add_parser(
+        'warm', parents=[common], help='Analyze transcripts that are not cached yet'
+    )
+    warm.add_argument('--input-dir', type=Path, required=True, help='Directory with transcripts')
+    warm.add_argument('--glob', default='*.txt', help='Glob pattern for transcripts (default: *.txt)')
+    warm.add_argument('--report-type', choices=['client', 'design'], default='client')
+    warm.add_argument('--concurrency', type=int, default=config.AI_MAX_CONCURRENCY,
+                      help='Max concurrent AI requests; the effective limit, it replaces the '
+                           f'AI_MAX_CONCURRENCY ceiling of the rate limiter (default: {config.AI_MAX_CONCURRENCY})')
+    warm.add_argument('--max-tokens', type=int, default=0,
+                      help='Token budget of the run; no new requests once reached (default: unlimited)')
+    warm.add_argument('--images', action='store_true', help='Design: also generate images (outside the token budget)')
+    warm.add_argument('--dry-run', action='store_true', help='Only show misses and projected spend')
+
+    stats = cache_actions.add_parser(
+        'stats', parents=[common], help='Cache size, hit ratios, savings and invalid entries'
+    )
+    stats.add_argument('--window-hours', type=float, default=24 * 7,
+                       help='Time window of hit/miss counters in hours (default: 168)')
+    stats.add_argument('--json', action='store_true', help='Print machine-readable JSON')
+    stats.add_argument('--no-check', dest='check', action='store_false',
+                       help='Skip validating every entry (faster on large caches)')
+
+    reparse = cache_actions.add_parser(
+        'reparse', parents=[common],
+        help='Rebuild report/design brief entries from stored raw responses (no API calls)'
+    )
+    reparse.add_argument('--kind', choices=['report', 'design_brief', 'all'], default='all',
+                         help='Entries to rebuild (default: all)')
+    reparse.add_argument('--dry-run', action='store_true', help='Only show what would change')
+
+    migrate_schema = cache_actions.add_parser(
+        'migrate-schema', parents=[common],
+        help='Upgrade report/design brief entries to the current schema version'
+    )
+    migrate_schema.add_argument('--dry-run', action='store_true', help='Only show what would change')
+
+    for action in (migrate, gc, warm, stats, reparse, migrate_schema):
+        action.add_argument('--cache-dir', type=Path, default=config.CACHE_DIR,
+                            help=f'Cache directory (default: {config.CACHE_DIR})')
+
+    return parser.parse_args(argv)
+
+
+def run_batch_api_command(args) -> int:
+    """Submit transcripts to the Batch API or collect finished results into the cache."""
+    from services.batch_api import (
+        build_batch_requests,
+        write_batch_file,
+        submit_batch,
+        wait_for_batch,
+        collect_batch_results,
+        get_batch_client,
+        TERMINAL_STATUSES
+    )
+    from utils.batch import discover_transcripts
+
+    config.validate_config()
+    client = get_batch_client(local=args.local)
+
+    if args.action == 'submit':
+        inputs = discover_transcripts(args.input_dir, args.glob)
+        if not inputs:
+            print(f"\n✗ Нет файлов по шаблону '{args.glob}' в {args.input_dir}")
+            return 1
+
+        texts = [read_text_file(path) for path in inputs]
+        requests = build_batch_requests(
+            texts,
+            report_type=args.report_type,
+            model=config.OPENAI_MODEL,
+            temperature=config.AI_TEMPERATURE,
+            cache_dir=config.CACHE_DIR
+        )
+        print(f"\nТранскриптов: {len(inputs)}, запросов в пакете: {len(requests)}")
+        if not requests:
+            print("✓ Все транскрипты уже в кэше")
+            return 0
+
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        batch_file = write_batch_file(requests, config.BATCH_API_DIR / f"batch_{timestamp}.jsonl")
+        batch = submit_batch(client, batch_file, metadata={"report_type": args.report_type})
+        print(f"✓ Пакет отправлен: {batch.id}")
+        if not args.wait:
+            print(f"  Сбор результатов: python main.py batch-api collect {batch.id} --wait")
+            return 0
+        batch_id = batch.id
+    else:
+        batch_id = args.batch_id
+
+    if args.wait:
+        batch = wait_for_batch(client, batch_id, poll_interval=args.poll_interval)
+    else:
+        batch = client.batches.retrieve(batch_id)
+        if batch.status not in TERMINAL_STATUSES:
+            print(f"\nПакет {batch_id} ещё выполняется (статус: {batch.status})")
+            return 0
+
+    stats = collect_batch_results(client, batch, config.CACHE_DIR)
+    print(f"\nПакет {batch_id}: статус {batch.status}")
+    print(f"  Сохранено в кэш: {stats['saved']}")
+    print(f"  Невалидных ответов: {stats['invalid']}")
+    print(f"  Ошибок запросов: {stats['failed']}")
+    return 0 if batch.status == 'completed' and not stats['invalid'] and not stats['failed'] else 1
+
+
+def run_cache_command(args) -> int:
+    """Cache maintenance actions."""
+    from utils.cache_store import migrate_cache
+    from utils.cache_manager import collect_garbage
+
+    if args.action == 'gc':
+        results = collect_garbage(args.cache_dir, config.IMAGE_CACHE_DIR, dry_run=args.dry_run)
+        title = "Будет удалено" if args.dry_run else "Очистка кэша завершена"
+        print(f"\n✓ {title}:")
+        for result in results:
+            print(
+                f"  {result.kind:<13} удалено {result.removed} ({result.freed_bytes / 1024 / 1024:.1f} МБ), "
+                f"осталось {result.kept} ({result.kept_bytes / 1024 / 1024:.1f} МБ)"
+            )
+        return 0
+
+    if args.action == 'normalization-report':
+        return run_normalization_report(args)
+
+    if args.action == 'warm':
+        return run_cache_warm(args)
+
+    if args.action == 'stats':
+        return run_cache_stats(args)
+
+    if args.action == 'reparse':
+        return run_cache_reparse(args)
+
+    if args.action == 'migrate-schema':
+        return run_cache_migrate_schema(args)
+
+    if args.action == 'migrate-backend':
+        if args.source == args.target:
+            print("\n✗ Исходный и целевой бэкенды совпадают")
+            return 1
+        stats = migrate_cache(args.cache_dir, args.source, args.target, remove_source=args.remove_source)
+        print(f"\n✓ Кэш перенесён: {args.source} → {args.target} ({args.cache_dir})")
+        print(f"  Перенесено записей: {stats['migrated']}")
+        print(f"  Уже были в целевом бэкенде: {stats['skipped']}")
+        print(f"  Повреждённых записей: {stats['invalid']}")
+        return 0
+    return 1
+
+
+def run_cache_stats(args) -> int:
+    """Print cache statistics (human-readable or JSON)."""
+    import json
+    from utils.cache_metrics import collect_stats
+
+    stats = collect_stats(
+        args.cache_dir,
+        config.IMAGE_CACHE_DIR,
+        config.RENDER_CACHE_DIR,
+        window_hours=args.window_hours,
+        check=args.check
+    )
+    if args.json:
+        print(json.dumps(stats, ensure_ascii=False, indent=2))
+        return 0
+
+    print(f"\nКэш: {stats['cache_dir']} (бэкенд {stats['backend']}), окно {args.window_hours:g} ч")
+    print(f"  {'тип':<13} {'записей':>8} {'МБ':>8} {'попад.':>7} {'промах.':>8} {'доля':>6} {'сэкономлено':>16}")
+    for kind, item in stats['artifacts'].items():
+        ratio = item['hit_ratio']
+        ratio_text = f"{ratio:.0%}" if ratio is not None else "-"
+        saved = f"{item['saved_seconds']:.1f} с / {item['saved_tokens']} ток."
+        print(
+            f"  {kind:<13} {item['entries']:>8} {item['bytes'] / 1024 / 1024:>8.1f} "
+            f"{item['hit']:>7} {item['miss']:>8} {ratio_text:>6} {saved:>16}"
+        )
+    totals = stats['totals']
+    print(
+        f"\n  Всего: {totals['entries']} записей, {totals['bytes'] / 1024 / 1024:.1f} МБ; "
+        f"сэкономлено ~{totals['saved_seconds']:.0f} с API и ~{totals['saved_tokens']} токенов"
+    )
+    if not stats['metrics_enabled']:
+        print("  (учёт попаданий отключён: CACHE_METRICS=false)")
+    if args.check:
+        if stats['corrupt']:
+            print(f"\n✗ Повреждённых записей: {len(stats['corrupt'])} (будут перегенерированы при обращении)")
+            for item in stats['corrupt']:
+                print(f"  {item['kind']}/{item['key'][:16]}: {item['error']}")
+        else:
+            print("\n✓ Повреждённых записей нет")
+    return 0
+
+
+def run_cache_reparse(args) -> int:
+    """Rebuild cache entries from stored raw model responses."""
+    from utils.cache_reparse import reparse_cache, UPDATED, UNCHANGED, INVALID, WITHOUT_RAW
+
+    kinds = None if args.kind == 'all' else (args.kind,)
+    result = reparse_cache(args.cache_dir, kinds, dry_run=args.dry_run)
+
+    title = "Будет перестроено" if args.dry_run else "Перестроение кэша завершено"
+    print(f"\n✓ {title} (без запросов к API):")
+    for kind, counts in result.counts.items():
+        print(
+            f"  {kind:<13} обновлено {counts[UPDATED]}, без изменений {counts[UNCHANGED]}, "
+            f"не прошло проверку {counts[INVALID]}, без сохранённого ответа {counts[WITHOUT_RAW]}"
+        )
+    if result.total(WITHOUT_RAW):
+        print("  Записи без сохранённого ответа обновляются только новым запросом к API")
+    for item in result.invalid:
+        print(f"  ✗ {item['kind']}/{item['key'][:16]}: {item['error']}")
+    return 0
+
+
+def run_cache_migrate_schema(args) -> int:
+    """Upgrade cached entries to the current schema version offline."""
+    from utils.ai_processor import PROMPT_VERSIONS
+    from utils.migrations import migrate_store, SCHEMA_VERSIONS, UPGRADED, CURRENT, NEWER, FAILED, OLD_PROMPT
+
+    results = migrate_store(args.cache_dir, dry_run=args.dry_run, prompt_versions=PROMPT_VERSIONS)
+    title = "Будет обновлено" if args.dry_run else "Миграция схемы завершена"
+    print(f"\n✓ {title}:")
+    for kind, counts in results.items():
+        print(
+            f"  {kind:<13} (схема v{SCHEMA_VERSIONS[kind]}) обновлено {counts[UPGRADED]}, "
+            f"актуальных {counts[CURRENT]}, новее текущей {counts[NEWER]}, ошибок {counts[FAILED]}"
+        )
+        if counts[OLD_PROMPT]:
+            print(f"  {'':<13} созданы старой версией промпта: {counts[OLD_PROMPT]} (остаются валидными)")
+    failed = sum(counts[FAILED] for counts in results.values())
+    if failed:
+        print(f"\n✗ Не удалось обновить записей: {failed} (будут перегенерированы при обращении)")
+    return 0 if not failed else 1
+
+
+def run_cache_warm(args) -> int:
+    """Fill the AI cache for a transcript directory under concurrency and token caps."""
+    from utils.batch import discover_transcripts
+    from utils.cache_warm import plan_warm, warm_cache, CACHED, DUPLICATE, WARMED, FAILED, OVER_BUDGET
+
+    inputs = discover_transcripts(args.input_dir, args.glob)
+    if not inputs:
+        print(f"\n✗ Нет файлов по шаблону '{args.glob}' в {args.input_dir}")
+        return 1
+
+    items = plan_warm(inputs, args.report_type, args.cache_dir)
+    misses = [item for item in items if item.status not in (CACHED, DUPLICATE)]
+    projected = sum(item.projected_tokens for item in misses)
+    print(f"\nПрогрев кэша: {len(items)} файлов из {args.input_dir}")
+    print(f"  Уже в кэше: {sum(1 for item in items if item.status == CACHED)}")
+    print(f"  Повторы: {sum(1 for item in items if item.status == DUPLICATE)}")
+    print(f"  Промахов: {len(misses)}, прогноз расхода: ~{projected} токенов")
+    if args.max_tokens:
+        print(f"  Бюджет: {args.max_tokens} токенов")
+    if args.dry_run or not misses:
+        return 0
+
+    config.validate_config()
+    result = warm_cache(
+        items,
+        report_type=args.report_type,
+        cache_dir=args.cache_dir,
+        concurrency=args.concurrency,
+        max_tokens=args.max_tokens,
+        images=args.images
+    )
+
+    print(f"\n✓ Прогрев завершён за {result.elapsed:.1f} с")
+    print(f"  Проанализировано: {result.count(WARMED)}")
+    print(f"  Ошибок: {result.count(FAILED)}")
+    print(f"  Пропущено из-за бюджета: {result.count(OVER_BUDGET)}")
+    print(
+        f"  Токены: прогноз ~{projected}, фактически {result.actual['total_tokens']} "
+        f"(вход {result.actual['prompt_tokens']}, выход {result.actual['completion_tokens']}, "
+        f"запросов {result.actual['requests']})"
+    )
+    for item in result.items:
+        if item.status == FAILED:
+            print(f"  ✗ {item.path}: {item.error}")
+    return 0 if not result.count(FAILED) else 1
+
+
+def run_normalization_report(args) -> int:
+    """Replay a transcript corpus against an empty cache with raw and normalized keys."""
+    from utils.batch import discover_transcripts
+    from utils.normalize import parse_steps, simulate_hit_rate
+
+    inputs = discover_transcripts(args.input_dir, args.glob)
+    if not inputs:
+        print(f"\n✗ Нет файлов по шаблону '{args.glob}' в {args.input_dir}")
+        return 1
+    try:
+        steps = parse_steps(config.TEXT_NORMALIZATION if args.steps is None else args.steps)
+    except ValueError as e:
+        print(f"\n✗ {e}")
+        return 1
+
+    texts = [read_text_file(path) for path in inputs]
+    stats = simulate_hit_rate(texts, steps)
+    total = stats['total']
+    print(f"\n✓ Нормализация ключей кэша: {len(texts)} файлов ({', '.join(steps) or 'выключена'})")
+    print(f"  Попаданий с исходными ключами: {total - stats['raw_misses']} из {total}")
+    print(f"  Попаданий с нормализованными ключами: {total - stats['normalized_misses']} из {total}")
+    print(f"  Промахов превращено в попадания: {stats['converted']}")
+    # Contribution of each line-based step on top of the encoding/whitespace cleanup
+    base = simulate_hit_rate(texts, ('nfc', 'whitespace'))
+    print(f"    nfc+whitespace: {base['converted']}")
+    for name in ('headers', 'timestamps', 'speakers'):
+        single = simulate_hit_rate(texts, ('nfc', 'whitespace', name))
+        print(f"    nfc+whitespace+{name}: {single['converted']}")
+    return 0
+
+
+def run_serve_command(args) -> int:
+    """Run the report server until interrupted."""
+    from services.report_server import serve
+
+    config.validate_config()
+    print(f"\nСервер отчётов: http://{args.host}:{args.port} (POST /reports, GET /health)")
+    print("Остановка: Ctrl+C")
+    serve(args.host, args.port)
+    return 0
+
+
+def run_benchmark_command(args) -> int:
+    """Compare per-render time with and without the shared stylesheet and font configuration."""
+    import json
+    from utils.render_benchmark import run_render_benchmark
+
+    result = run_render_benchmark(args.report_type, iterations=args.iterations)
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return 0
+
+    print(f"\nРендер {result['iterations']} PDF ({result['report_type']}), стилей {result['css_lines']} строк")
+    print(f"  Разбор CSS: {result['setup_ms']['css_parse']} мс, FontConfiguration: {result['setup_ms']['font_config']} мс")
+    for mode, title in (('baseline', 'Встроенный CSS, новые шрифты'), ('shared', 'Общие CSS и шрифты')):
+        timings = result[mode]
+        print(
+            f"  {title:<29} среднее {timings['mean_ms']} мс, медиана {timings['median_ms']} мс, "
+            f"минимум {timings['min_ms']} мс"
+        )
+    print(f"\n✓ Экономия на рендер: {result['saved_ms_per_render']} мс ({result['saved_percent']}%)")
+    return 0
+
+
+def run_command(argv: List[str]) -> int:
+    """Dispatch a subcommand."""
+    args = parse_command_arguments(argv)
+    setup_logging(log_level=getattr(args, 'log_level', config.LOG_LEVEL))
+    try:
+        return args.handler(args)
+    except KeyboardInterrupt:
+        print("\n\n✗ Прервано пользователем")
+        logger.warning("Process interrupted by user")
+        return 130
+    except Exception as e:
+        error_msg = f"Ошибка выполнения команды: {e}"
+        logger.error(error_msg, exc_info=True)
+        print(f"\n✗ ОШИБКА: {error_msg}")
+        return 1
+
+
 def prompt_select(prompt_title: str, options: List[Path]) -> Path:
     """Prompt user to select a file from a list or enter a custom path."""
     print(f"\n{prompt_title}")
@@ -190,9 +722,90 @@ def apply_cli_menu(args):
     return args
 
 
+def run_batch_mode(args) -> int:
+    """Process every transcript in --input-dir and print a per-file summary."""
+    from utils.batch import discover_transcripts, run_batch, batch_label, combined_reports
+    from utils.job_store import JobStore
+
+    if not args.input_dir.is_dir():
+        error_msg = f"Директория не найдена: {args.input_dir}"
+        logger.error(error_msg)
+        print(f"\n✗ ОШИБКА: {error_msg}")
+        return 1
+
+    if not args.template.exists():
+        error_msg = f"Шаблон не найден: {args.template}"
+        logger.error(error_msg)
+        print(f"\n✗ ОШИБКА: {error_msg}")
+        return 1
+
+    inputs = discover_transcripts(args.input_dir, args.glob)
+    if not inputs:
+        print(f"\n✗ Нет файлов по шаблону '{args.glob}' в {args.input_dir}")
+        return 1
+
+    print(f"\nПакетная обработка: {len(inputs)} файлов из {args.input_dir}")
+    store = JobStore(
+        args.job_db,
+        lease_seconds=config.JOB_LEASE_SECONDS,
+        max_attempts=config.JOB_MAX_ATTEMPTS
+    )
+    batch = batch_label(args.input_dir, args.glob, args.report_type)
+    jsonl_path = args.output_dir / f"reports_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+    items = run_batch(
+        inputs=inputs,
+        output_dir=args.output_dir,
+        template_path=args.template,
+        store=store,
+        batch=batch,
+        report_type=args.report_type,
+        use_cache=args.use_cache,
+        io_workers=max(1, args.workers),
+        render_workers=args.render_workers,
+        log_level=args.log_level,
+        formats=args.formats,
+        jsonl_path=jsonl_path,
+        input_dir=args.input_dir
+    )
+
+    failed = [item for item in items if item.status == 'failed']
+    done = [item for item in items if item.ok]
+
+    print("\n" + "=" * 60)
+    print("ИТОГИ ПАКЕТНОЙ ОБРАБОТКИ")
+    print("=" * 60)
+    for item in items:
+        if item.ok:
+            written = [path for fmt, path in item.outputs.items() if fmt in args.formats and Path(path).exists()]
+            print(f"✓ {item.input_path.name} -> {', '.join(written)}")
+        elif item.status == 'failed':
+            print(f"✗ {item.input_path.name} [{item.failed_stage}]: {item.error}")
+        else:
+            print(f"… {item.input_path.name}: в работе у другого процесса")
+    print("=" * 60)
+    print(f"Успешно: {len(done)}, ошибок: {len(failed)}, в работе: {len(items) - len(done) - len(failed)}")
+    if 'jsonl' in args.formats and jsonl_path.exists():
+        print(f"JSONL: {jsonl_path}")
+    print("=" * 60)
+
+    if args.combined_output is not None and done:
+        from utils.pdf_generator import generate_combined_pdf
+        try:
+            generate_combined_pdf(combined_reports(store, batch), args.combined_output)
+        except Exception as e:
+            logger.error(f"Combined report failed: {e}", exc_info=True)
+            print(f"\n✗ ОШИБКА сводного отчёта: {e}")
+            return 1
+
+    return 1 if failed else 0
+
+
 def main():
     """Main application entry point."""
     install_glib_warning_filter()
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        return run_command(sys.argv[1:])
+
     # Parse arguments
     args = parse_arguments()
     if len(sys.argv) == 1:
@@ -204,6 +817,23 @@ def main():
     logger.info("=" * 60)
     logger.info("AI Client Report Generator - Starting")
     logger.info("=" * 60)
+
+    if args.input_dir is not None:
+        logger.info(f"Batch mode: {args.input_dir} ({args.glob})")
+        try:
+            config.validate_config()
+            return run_batch_mode(args)
+        except KeyboardInterrupt:
+            print("\n\n✗ Прервано пользователем")
+            logger.warning("Process interrupted by user")
+            return 130
+        except Exception as e:
+            error_msg = f"Неожиданная ошибка пакетной обработки: {e}"
+            logger.error(error_msg, exc_info=True)
+            print(f"\n✗ КРИТИЧЕСКАЯ ОШИБКА: {error_msg}")
+            print("Проверьте logs/app.log для подробной информации.")
+            return 1
+
     logger.info(f"Input file: {args.input}")
     logger.info(f"Output file: {args.output}")
     logger.info(f"Template: {args.template}")
@@ -271,24 +901,26 @@ def main():
                 print(f"\n✗ ОШИБКА: {error_msg}")
                 return 1
 
-            try:
-                logger.info("Step 2.1: Generating image prompt")
-                image_prompt = make_image_prompt_from_brief(
-                    brief=report_data,
-                    model=config.OPENAI_MODEL,
-                    api_key=config.OPENAI_API_KEY,
-                    cache_dir=config.CACHE_DIR,
-                    use_cache=args.use_cache
-                )
+            # The image is only embedded into the HTML/PDF outputs
+            if 'html' in args.formats or 'pdf' in args.formats:
+                try:
+                    logger.info("Step 2.1: Generating image prompt")
+                    image_prompt = make_image_prompt_from_brief(
+                        brief=report_data,
+                        model=config.OPENAI_MODEL,
+                        api_key=config.OPENAI_API_KEY,
+                        cache_dir=config.CACHE_DIR,
+                        use_cache=args.use_cache
+                    )
 
-                logger.info("Step 2.2: Generating image")
-                image_path = generate_image(image_prompt)
-                image_uri = image_path.as_uri()
-                print("✓ Изображение сгенерировано")
-            except Exception as e:
-                image_failed = True
-                logger.error(f"Image generation failed: {e}", exc_info=True)
-                print("! image failed")
+                    logger.info("Step 2.2: Generating image")
+                    image_path = generate_image(image_prompt)
+                    image_uri = image_path.as_uri()
+                    print("✓ Изображение сгенерировано")
+                except Exception as e:
+                    image_failed = True
+                    logger.error(f"Image generation failed: {e}", exc_info=True)
+                    print("! image failed")
         else:
             print(f"\n[2/3] Анализ диалога с помощью ИИ...")
             logger.info("Step 2: Processing with AI")
@@ -317,12 +949,12 @@ def main():
                 print(f"\n✗ ОШИБКА: {error_msg}")
                 return 1
         
-        # Step 3: Generate PDF
-        print(f"\n[3/3] Генерация PDF отчёта...")
-        logger.info("Step 3: Generating PDF report")
+        # Step 3: Write outputs (PDF only if requested)
+        print(f"\n[3/3] Сохранение результатов ({', '.join(args.formats)})...")
+        logger.info(f"Step 3: Writing outputs: {', '.join(args.formats)}")
         
         # Check template exists
-        if not args.template.exists():
+        if ('html' in args.formats or 'pdf' in args.formats) and not args.template.exists():
             error_msg = f"Шаблон не найден: {args.template}"
             logger.error(error_msg)
             print(f"\n✗ ОШИБКА: {error_msg}")
@@ -331,34 +963,77 @@ def main():
         # CSS path
         css_path = args.template.parent / 'style.css'
         
+        # One date and one HTML rendering for every output of this run; the date
+        # of the cached analysis keeps re-runs on the same render cache entry
+        # (a fresh analysis without the cache is dated now)
+        analyzed_at = (
+            analysis_created_at(transcript_text, args.report_type, config.CACHE_DIR) if args.use_cache else None
+        )
+        generation_date = format_generation_date(analyzed_at)
+        html = None
+        
         try:
-            from utils.pdf_generator import generate_pdf_report
-            generate_pdf_report(
+            if 'html' in args.formats:
+                html = render_html(
+                    report_data,
+                    args.template,
+                    css_path,
+                    args.input.name,
+                    image_uri=image_uri,
+                    image_failed=image_failed,
+                    generation_date=generation_date
+                )
+            written = write_report_outputs(
                 report_data=report_data,
                 output_path=args.output,
+                formats=args.formats,
                 template_path=args.template,
                 css_path=css_path,
                 transcript_filename=args.input.name,
                 image_uri=image_uri,
-                image_failed=image_failed
+                image_failed=image_failed,
+                generation_date=generation_date,
+                html=html
             )
-            
-            # Success summary
-            print("\n" + "=" * 60)
-            print("ГОТОВО!")
-            print("=" * 60)
-            print(f"Отчёт: {args.output.absolute()}")
-            print(f"Размер: {args.output.stat().st_size / 1024:.1f} KB")
-            print("=" * 60)
-            
-            logger.info("Report generation completed successfully")
-            return 0
-            
+            for path in written.values():
+                print(f"✓ Сохранено: {path}")
         except Exception as e:
-            error_msg = f"Ошибка генерации PDF: {e}"
+            error_msg = f"Ошибка сохранения результатов: {e}"
             logger.error(error_msg, exc_info=True)
             print(f"\n✗ ОШИБКА: {error_msg}")
             return 1
+        
+        if 'pdf' in args.formats:
+            try:
+                from utils.pdf_generator import generate_pdf_report
+                generate_pdf_report(
+                    report_data=report_data,
+                    output_path=args.output,
+                    template_path=args.template,
+                    css_path=css_path,
+                    transcript_filename=args.input.name,
+                    image_uri=image_uri,
+                    image_failed=image_failed,
+                    generation_date=generation_date,
+                    html=html
+                )
+                written['pdf'] = args.output
+            except Exception as e:
+                error_msg = f"Ошибка генерации PDF: {e}"
+                logger.error(error_msg, exc_info=True)
+                print(f"\n✗ ОШИБКА: {error_msg}")
+                return 1
+        
+        # Success summary
+        print("\n" + "=" * 60)
+        print("ГОТОВО!")
+        print("=" * 60)
+        for fmt, path in written.items():
+            print(f"{fmt.upper()}: {path.absolute()} ({path.stat().st_size / 1024:.1f} KB)")
+        print("=" * 60)
+        
+        logger.info("Report generation completed successfully")
+        return 0
     
     except KeyboardInterrupt:
         print("\n\n✗ Прервано пользователем")
@@ -0,0 +1,339 @@
+"""
+OpenAI Batch API submission mode.
+
+Builds one JSONL batch file from many transcripts (same prompts as the
+interactive calls), submits it, polls it and validates every result into
+the regular AI cache, so a later main.py run renders PDFs from cache hits.
+
+LocalBatchClient mimics the files/batches endpoints on disk and answers
+requests through a responder callable, which makes the flow testable offline.
+"""
+import json
+import logging
+import time
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+
+from pydantic import ValidationError
+
+import config
+from utils.io import read_json_file, write_json_file_atomic
+from utils.cache_store import get_cache_backend, REPORT, DESIGN_BRIEF
+from utils.normalize import transcript_cache_key, legacy_cache_key
+from utils.ai_processor import (
+    build_report_messages,
+    build_design_brief_messages,
+    parse_and_validate_response,
+    parse_and_validate_design_response,
+    save_raw_response,
+    PROMPT_VERSIONS
+)
+from utils.migrations import stamped_value
+
+logger = logging.getLogger(__name__)
+
+CHAT_COMPLETIONS_ENDPOINT = "/v1/chat/completions"
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def _custom_id(report_type: str, text_hash: str) -> str:
+    return f"{report_type}-{text_hash}"
+
+
+def _split_custom_id(custom_id: str):
+    report_type, _, text_hash = custom_id.partition("-")
+    return report_type, text_hash
+
+
+def _result_kind(report_type: str) -> str:
+    return DESIGN_BRIEF if report_type == "design" else REPORT
+
+
+def build_batch_requests(
+    texts: List[str],
+    report_type: str,
+    model: str,
+    temperature: float,
+    cache_dir: Path,
+    skip_cached: bool = True
+) -> List[dict]:
+    """
+    Build Batch API request lines for transcripts.
+
+    Args:
+        texts: Transcript texts
+        report_type: 'client' or 'design'
+        model: Model name
+        temperature: Temperature for client reports (design briefs always use 0)
+        cache_dir: AI cache directory
+        skip_cached: Skip transcripts that already have a cache entry
+
+    Returns:
+        List of request dicts (one JSONL line each), deduplicated by cache key
+    """
+    requests = []
+    seen = set()
+    backend = get_cache_backend(cache_dir)
+    for text in texts:
+        text_hash = transcript_cache_key(text)
+        if text_hash in seen:
+            continue
+        seen.add(text_hash)
+        legacy_hash = legacy_cache_key(text) or text_hash
+        kind = _result_kind(report_type)
+        if skip_cached and (backend.contains(kind, text_hash) or backend.contains(kind, legacy_hash)):
+            logger.info(f"Batch: skipping cached transcript {text_hash[:8]}...")
+            continue
+
+        if report_type == "design":
+            body = {"model": model, "messages": build_design_brief_messages(text), "temperature": 0}
+        else:
+            body = {"model": model, "messages": build_report_messages(text), "temperature": temperature}
+
+        requests.append({
+            "custom_id": _custom_id(report_type, text_hash),
+            "method": "POST",
+            "url": CHAT_COMPLETIONS_ENDPOINT,
+            "body": body
+        })
+    return requests
+
+
+def write_batch_file(requests: List[dict], path: Path) -> Path:
+    """Write request lines to a JSONL file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for request in requests:
+            f.write(json.dumps(request, ensure_ascii=False) + "\n")
+    logger.info(f"Batch file written: {path} ({len(requests)} requests)")
+    return path
+
+
+def submit_batch(client, batch_file: Path, metadata: Optional[Dict[str, str]] = None):
+    """
+    Upload a JSONL batch file and create a batch job.
+
+    Args:
+        client: OpenAI client (or LocalBatchClient)
+        batch_file: Path to JSONL request file
+        metadata: Optional batch metadata
+
+    Returns:
+        Batch object
+    """
+    with open(batch_file, "rb") as f:
+        uploaded = client.files.create(file=f, purpose="batch")
+    batch = client.batches.create(
+        input_file_id=uploaded.id,
+        endpoint=CHAT_COMPLETIONS_ENDPOINT,
+        completion_window="24h",
+        metadata=metadata
+    )
+    logger.info(f"Batch submitted: {batch.id} (input file {uploaded.id})")
+    return batch
+
+
+def wait_for_batch(client, batch_id: str, poll_interval: float = 30.0, timeout: Optional[float] = None):
+    """
+    Poll a batch until it reaches a terminal status.
+
+    Args:
+        client: OpenAI client (or LocalBatchClient)
+        batch_id: Batch identifier
+        poll_interval: Seconds between polls
+        timeout: Max seconds to wait (None = no limit)
+
+    Returns:
+        Final batch object
+
+    Raises:
+        TimeoutError: If the batch is still running after `timeout` seconds
+    """
+    started = time.monotonic()
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        counts = getattr(batch, "request_counts", None)
+        if counts is not None:
+            logger.info(
+                f"Batch {batch_id}: {batch.status} "
+                f"({counts.completed}/{counts.total} done, {counts.failed} failed)"
+            )
+        else:
+            logger.info(f"Batch {batch_id}: {batch.status}")
+        if batch.status in TERMINAL_STATUSES:
+            return batch
+        if timeout is not None and time.monotonic() - started > timeout:
+            raise TimeoutError(f"Batch {batch_id} did not finish within {timeout:.0f}s")
+        time.sleep(poll_interval)
+
+
+def collect_batch_results(client, batch, cache_dir: Path) -> Dict[str, int]:
+    """
+    Download batch output, validate each result and store valid ones in the cache.
+
+    Invalid or failed results are logged and left as cache misses, so the
+    regular synchronous pipeline (with its correction retry) handles them later.
+
+    Args:
+        client: OpenAI client (or LocalBatchClient)
+        batch: Completed batch object
+        cache_dir: AI cache directory
+
+    Returns:
+        Counters: saved, invalid, failed
+    """
+    stats = {"saved": 0, "invalid": 0, "failed": 0}
+    if not batch.output_file_id:
+        logger.error(f"Batch {batch.id} has no output file (status {batch.status})")
+        return stats
+
+    content = client.files.content(batch.output_file_id).text
+    for line in content.splitlines():
+        if not line.strip():
+            continue
+        result = json.loads(line)
+        custom_id = result.get("custom_id", "")
+        report_type, text_hash = _split_custom_id(custom_id)
+        response = result.get("response") or {}
+
+        if result.get("error") or response.get("status_code") != 200:
+            logger.warning(f"Batch request {custom_id} failed: {result.get('error') or response}")
+            stats["failed"] += 1
+            continue
+
+        kind = _result_kind(report_type)
+        try:
+            body = response["body"]
+            response_text = body["choices"][0]["message"]["content"]
+            # Kept even if invalid: `cache reparse` can recover it after a schema change
+            save_raw_response(
+                kind, text_hash, response_text, body.get("model") or "",
+                "design_brief" if report_type == "design" else "report", body.get("usage"), cache_dir
+            )
+            if report_type == "design":
+                data = parse_and_validate_design_response(response_text)
+            else:
+                data = parse_and_validate_response(response_text)
+        except (KeyError, IndexError, TypeError, json.JSONDecodeError, ValidationError) as e:
+            logger.warning(f"Batch result {custom_id} is invalid: {e}")
+            stats["invalid"] += 1
+            continue
+
+        get_cache_backend(cache_dir).put(
+            kind, text_hash, stamped_value(kind, data.model_dump(), PROMPT_VERSIONS[kind]), created_at=time.time()
+        )
+        logger.info(f"Batch result cached: {kind}/{text_hash[:8]}...")
+        stats["saved"] += 1
+
+    if batch.error_file_id:
+        errors = client.files.content(batch.error_file_id).text
+        stats["failed"] += sum(1 for line in errors.splitlines() if line.strip())
+
+    return stats
+
+
+class LocalBatchClient:
+    """
+    Offline stand-in for the OpenAI files/batches endpoints.
+
+    Files and batch records live under `storage_dir`. A batch is executed
+    synchronously at creation time by calling `responder(body)` for every
+    request line; the responder returns the assistant message content.
+
+    Args:
+        storage_dir: Directory for uploaded files, outputs and batch records
+        responder: Callable mapping a chat request body to response text
+            (default: send the request through the regular chat pipeline)
+    """
+
+    def __init__(self, storage_dir: Path, responder: Optional[Callable[[dict], str]] = None):
+        self.storage_dir = storage_dir
+        self.storage_dir.mkdir(parents=True, exist_ok=True)
+        self.responder = responder or self._default_responder
+        self.files = SimpleNamespace(create=self._create_file, content=self._file_content)
+        self.batches = SimpleNamespace(create=self._create_batch, retrieve=self._retrieve_batch)
+
+    @staticmethod
+    def _default_responder(body: dict) -> str:
+        from services.client_registry import get_openai_client
+        from services.openai_client import create_chat_completion
+        response = create_chat_completion(get_openai_client(), **body)
+        return response.choices[0].message.content
+
+    def _file_path(self, file_id: str) -> Path:
+        return self.storage_dir / f"{file_id}.jsonl"
+
+    def _batch_path(self, batch_id: str) -> Path:
+        return self.storage_dir / f"{batch_id}.json"
+
+    def _write_file(self, data: str) -> str:
+        file_id = f"file-local-{uuid.uuid4().hex[:12]}"
+        self._file_path(file_id).write_text(data, encoding="utf-8")
+        return file_id
+
+    def _create_file(self, file, purpose: str = "batch"):
+        data = file.read()
+        if isinstance(data, bytes):
+            data = data.decode("utf-8")
+        return SimpleNamespace(id=self._write_file(data), purpose=purpose)
+
+    def _file_content(self, file_id: str):
+        return SimpleNamespace(text=self._file_path(file_id).read_text(encoding="utf-8"))
+
+    def _create_batch(self, input_file_id: str, endpoint: str, completion_window: str, metadata=None):
+        batch_id = f"batch-local-{uuid.uuid4().hex[:12]}"
+        outputs, errors = [], []
+        lines = self._file_content(input_file_id).text.splitlines()
+
+        for line in lines:
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            try:
+                content = self.responder(request["body"])
+                outputs.append({
+                    "custom_id": request["custom_id"],
+                    "response": {
+                        "status_code": 200,
+                        "body": {
+                            "model": request["body"].get("model"),
+                            "choices": [{"message": {"role": "assistant", "content": content}}]
+                        }
+                    },
+                    "error": None
+                })
+            except Exception as e:
+                logger.warning(f"Local batch request {request.get('custom_id')} failed: {e}")
+                errors.append({
+                    "custom_id": request.get("custom_id"),
+                    "response": None,
+                    "error": {"message": str(e)}
+                })
+
+        record = {
+            "id": batch_id,
+            "status": "completed",
+            "endpoint": endpoint,
+            "input_file_id": input_file_id,
+            "output_file_id": self._write_file("".join(json.dumps(o) + "\n" for o in outputs)),
+            "error_file_id": self._write_file("".join(json.dumps(e) + "\n" for e in errors)) if errors else None,
+            "request_counts": {"total": len(outputs) + len(errors), "completed": len(outputs), "failed": len(errors)},
+            "metadata": metadata
+        }
+        write_json_file_atomic(self._batch_path(batch_id), record)
+        return self._retrieve_batch(batch_id)
+
+    def _retrieve_batch(self, batch_id: str):
+        record = read_json_file(self._batch_path(batch_id))
+        record["request_counts"] = SimpleNamespace(**record["request_counts"])
+        return SimpleNamespace(**record)
+
+
+def get_batch_client(local: bool = False):
+    """Return the batch-capable client: shared OpenAI client or the local stand-in."""
+    if local:
+        return LocalBatchClient(config.BATCH_API_DIR / "local")
+    from services.client_registry import get_openai_client
+    return get_openai_client()
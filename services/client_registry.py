@@ -0,0 +1,125 @@
+"""
+Process-wide OpenAI client registry.
+
+Creating OpenAI(api_key=...) per call opens a new HTTP connection pool
+(and TLS handshake) every time. The registry keeps one client per API key
+so keep-alive connections are reused across all AI and image calls.
+"""
+import asyncio
+import importlib.util
+import logging
+import os
+import threading
+import weakref
+from typing import Dict, Optional
+
+import httpx
+from openai import OpenAI, AsyncOpenAI, DefaultHttpxClient, DefaultAsyncHttpxClient
+
+import config
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_sync_clients: Dict[str, OpenAI] = {}
+# Async clients are bound to the event loop their connection pool runs on
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, AsyncOpenAI]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _http2_enabled() -> bool:
+    """Return True if HTTP/2 is requested and the h2 package is installed."""
+    if not config.OPENAI_HTTP2:
+        return False
+    if importlib.util.find_spec("h2") is None:
+        logger.warning("OPENAI_HTTP2 is enabled but 'h2' is not installed; falling back to HTTP/1.1")
+        return False
+    return True
+
+
+def _http_client_options() -> dict:
+    """Connection pool settings shared by sync and async clients."""
+    return {
+        "limits": httpx.Limits(
+            max_connections=config.OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=config.OPENAI_MAX_KEEPALIVE,
+            keepalive_expiry=config.OPENAI_KEEPALIVE_EXPIRY
+        ),
+        "timeout": httpx.Timeout(config.OPENAI_TIMEOUT, connect=config.OPENAI_CONNECT_TIMEOUT),
+        "http2": _http2_enabled()
+    }
+
+
+def get_openai_client(api_key: Optional[str] = None) -> OpenAI:
+    """
+    Return the shared OpenAI client for an API key.
+
+    Args:
+        api_key: OpenAI API key (default: config.OPENAI_API_KEY)
+
+    Returns:
+        OpenAI client with a pooled keep-alive HTTP connection
+    """
+    api_key = api_key or config.OPENAI_API_KEY
+    with _lock:
+        client = _sync_clients.get(api_key)
+        if client is None:
+            logger.debug("Creating shared OpenAI client")
+            client = OpenAI(
+                api_key=api_key,
+                max_retries=0,  # retries are owned by services.retry_policy
+                http_client=DefaultHttpxClient(**_http_client_options())
+            )
+            _sync_clients[api_key] = client
+        return client
+
+
+def get_async_openai_client(api_key: Optional[str] = None) -> AsyncOpenAI:
+    """
+    Return the shared AsyncOpenAI client for an API key and the running event loop.
+
+    Args:
+        api_key: OpenAI API key (default: config.OPENAI_API_KEY)
+
+    Returns:
+        AsyncOpenAI client with a pooled keep-alive HTTP connection
+    """
+    api_key = api_key or config.OPENAI_API_KEY
+    loop = asyncio.get_running_loop()
+    with _lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(api_key)
+        if client is None:
+            logger.debug("Creating shared AsyncOpenAI client")
+            client = AsyncOpenAI(
+                api_key=api_key,
+                max_retries=0,  # retries are owned by services.retry_policy
+                http_client=DefaultAsyncHttpxClient(**_http_client_options())
+            )
+            clients[api_key] = client
+        return client
+
+
+def close_clients():
+    """Close all shared sync clients and drop cached async clients."""
+    with _lock:
+        for client in _sync_clients.values():
+            try:
+                client.close()
+            except Exception as e:
+                logger.debug(f"Error closing OpenAI client: {e}")
+        _sync_clients.clear()
+        _async_clients.clear()
+
+
+def _reset_after_fork():
+    """Connection pools must not be shared with forked children."""
+    global _lock
+    _lock = threading.Lock()
+    _sync_clients.clear()
+    _async_clients.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
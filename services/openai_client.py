@@ -1,32 +1,394 @@
 """
-OpenAI image generation utilities.
+Rate-limited OpenAI call wrappers shared by the AI and image pipelines.
+
+Every chat completion (plain or streamed) and image request goes through
+here: the shared pooled client (services.client_registry), the adaptive
+rate limiter, transport retries and usage accounting. Also holds image
+generation with its on-disk image cache and the async request semaphore.
 """
+import asyncio
 import base64
 import hashlib
 import logging
+import time
+import weakref
 from pathlib import Path
+from typing import Callable, Optional
 
-from openai import OpenAI, OpenAIError, APIError, APIConnectionError, RateLimitError, APITimeoutError
+from openai import (
+    OpenAI,
+    AsyncOpenAI,
+    OpenAIError,
+    APIError,
+    APIConnectionError,
+    RateLimitError,
+    APITimeoutError
+)
 
 import config
+from services.client_registry import get_openai_client, get_async_openai_client
+from services.rate_limiter import get_rate_limiter, estimate_tokens, set_max_concurrency
+from services.retry_policy import get_retry_policy
+from services.usage_tracker import get_usage_tracker, metered, current_usage_scope
+from utils.single_flight import deduplicated
+from utils.cache_manager import IMAGE, touch_file, adopt_legacy_image, maybe_collect_garbage
+from utils.cache_metrics import HIT, MISS, record_event, record_cost
 
 logger = logging.getLogger(__name__)
 
+# One semaphore per event loop: asyncio primitives cannot be shared across loops
+_async_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+_async_concurrency = config.AI_MAX_CONCURRENCY
+
+
+def set_async_concurrency(limit: int):
+    """
+    Set the max number of concurrent async OpenAI requests.
+    
+    Applies to semaphores created after the call (i.e. to new event loops)
+    and moves the rate limiters' in-flight ceiling to the same value.
+    
+    Args:
+        limit: Max in-flight requests per event loop
+    """
+    global _async_concurrency
+    if limit < 1:
+        raise ValueError("Concurrency limit must be >= 1")
+    _async_concurrency = limit
+    _async_semaphores.clear()
+    set_max_concurrency(limit)
 
-def _prompt_hash(prompt: str) -> str:
-    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
 
+def get_async_semaphore() -> asyncio.Semaphore:
+    """Return the request semaphore for the running event loop."""
+    loop = asyncio.get_running_loop()
+    semaphore = _async_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(_async_concurrency)
+        _async_semaphores[loop] = semaphore
+    return semaphore
 
-def generate_image(prompt: str) -> Path:
+
+def _error_headers(e: Exception):
+    """Return response headers attached to an OpenAI error, if any."""
+    response = getattr(e, "response", None)
+    return getattr(response, "headers", None)
+
+
+def _handle_rate_limit(e: RateLimitError, limiter, deadline: float):
     """
-    Generate an image using OpenAI and return file path.
+    Register a 429 with the limiter and decide whether the caller may wait.
+    
+    Raises:
+        RateLimitError: If the quota is exhausted or the wait would exceed the deadline
+    """
+    if getattr(e, "code", None) == "insufficient_quota":
+        logger.error("OpenAI quota exhausted (insufficient_quota) - not retrying")
+        raise e
+    delay = limiter.record_rate_limited(_error_headers(e))
+    if time.monotonic() + delay > deadline:
+        logger.error(f"Rate limit wait budget exhausted for '{limiter.name}'")
+        raise e
+    logger.info(f"Rate limited - request queued for retry in {delay:.2f}s")
+
+
+def create_chat_completion(client: OpenAI, **kwargs):
+    """
+    Call chat.completions.create under the shared rate limiter and retry policy.
+    
+    Rate-limited requests are queued and re-sent once the limiter allows,
+    up to OPENAI_RATE_LIMIT_MAX_WAIT seconds. Transient transport errors
+    (connection, timeout, 5xx) are retried with backoff by the retry policy.
     
     Args:
-        prompt: Image generation prompt
+        client: OpenAI client instance
+        **kwargs: Arguments for chat.completions.create
         
     Returns:
-        Path to saved PNG file
+        Parsed ChatCompletion
+    """
+    limiter = get_rate_limiter("chat")
+    estimated = estimate_tokens(kwargs.get("messages", []), kwargs.get("max_tokens"))
+
+    def attempt():
+        deadline = time.monotonic() + config.OPENAI_RATE_LIMIT_MAX_WAIT
+        while True:
+            try:
+                with limiter.slot(estimated):
+                    raw = client.chat.completions.with_raw_response.create(**kwargs)
+                response = raw.parse()
+                usage = getattr(response, "usage", None)
+                limiter.record_response(raw.headers, estimated, getattr(usage, "total_tokens", None))
+                get_usage_tracker().record(usage)
+                return response
+            except RateLimitError as e:
+                _handle_rate_limit(e, limiter, deadline)
+
+    return get_retry_policy().call(attempt, description=f"Chat completion ({kwargs.get('model')})")
+
+
+async def async_create_chat_completion(client: AsyncOpenAI, **kwargs):
+    """
+    Async twin of create_chat_completion (also bounded by the loop semaphore).
+    
+    Args:
+        client: AsyncOpenAI client instance
+        **kwargs: Arguments for chat.completions.create
+        
+    Returns:
+        Parsed ChatCompletion
+    """
+    limiter = get_rate_limiter("chat")
+    estimated = estimate_tokens(kwargs.get("messages", []), kwargs.get("max_tokens"))
+
+    async def attempt():
+        deadline = time.monotonic() + config.OPENAI_RATE_LIMIT_MAX_WAIT
+        while True:
+            try:
+                async with get_async_semaphore():
+                    async with limiter.async_slot(estimated):
+                        raw = await client.chat.completions.with_raw_response.create(**kwargs)
+                response = raw.parse()
+                usage = getattr(response, "usage", None)
+                limiter.record_response(raw.headers, estimated, getattr(usage, "total_tokens", None))
+                get_usage_tracker().record(usage)
+                return response
+            except RateLimitError as e:
+                _handle_rate_limit(e, limiter, deadline)
+
+    return await get_retry_policy().async_call(attempt, description=f"Chat completion ({kwargs.get('model')})")
+
+
+class StreamResult:
+    """
+    Text and timing of a streamed chat completion.
+
+    Attributes:
+        text: Concatenated message content
+        usage: Usage block from the final chunk (None if not reported)
+        time_to_first_token: Seconds from request start to the first content delta
+        time_to_complete: Seconds from request start to the end of the stream
+        chunks: Number of content deltas received
     """
+
+    def __init__(self):
+        self.parts = []
+        self.usage = None
+        self.time_to_first_token: Optional[float] = None
+        self.time_to_complete: Optional[float] = None
+        self.chunks = 0
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+    def add_delta(self, content: str, started: float):
+        if self.time_to_first_token is None:
+            self.time_to_first_token = time.monotonic() - started
+        self.parts.append(content)
+        self.chunks += 1
+
+
+def _stream_kwargs(kwargs: dict) -> dict:
+    return {**kwargs, "stream": True, "stream_options": {"include_usage": True}}
+
+
+def _consume_chunk(chunk, result: StreamResult, on_delta: Optional[Callable[[str], None]], started: float):
+    """Record one stream chunk; on_delta may raise to abort the stream."""
+    if getattr(chunk, "usage", None) is not None:
+        result.usage = chunk.usage
+    if not chunk.choices:
+        return
+    content = chunk.choices[0].delta.content
+    if content:
+        result.add_delta(content, started)
+        if on_delta:
+            on_delta(content)
+
+
+def _log_stream_metrics(result: StreamResult, model: Optional[str], aborted: bool = False):
+    ttft = f"{result.time_to_first_token:.2f}s" if result.time_to_first_token is not None else "n/a"
+    state = "aborted" if aborted else "completed"
+    logger.info(
+        f"Chat stream {state} ({model}): time to first token {ttft}, "
+        f"total {result.time_to_complete:.2f}s, {result.chunks} chunks"
+    )
+
+
+def stream_chat_completion(
+    client: OpenAI,
+    make_delta_handler: Optional[Callable[[], Callable[[str], None]]] = None,
+    **kwargs
+) -> StreamResult:
+    """
+    Stream chat.completions.create under the shared rate limiter and retry policy.
+
+    Every content delta is passed to a handler as it arrives; if the handler
+    raises, the HTTP stream is closed immediately (no further tokens are
+    generated or billed) and the exception propagates to the caller.
+
+    Args:
+        client: OpenAI client instance
+        make_delta_handler: Factory returning a fresh delta handler per attempt
+            (a retried request starts with clean handler state)
+        **kwargs: Arguments for chat.completions.create (stream is forced on)
+
+    Returns:
+        StreamResult with text, usage and time-to-first-token/complete metrics
+    """
+    limiter = get_rate_limiter("chat")
+    estimated = estimate_tokens(kwargs.get("messages", []), kwargs.get("max_tokens"))
+    model = kwargs.get("model")
+
+    def attempt():
+        deadline = time.monotonic() + config.OPENAI_RATE_LIMIT_MAX_WAIT
+        while True:
+            try:
+                with limiter.slot(estimated):
+                    started = time.monotonic()
+                    raw = client.chat.completions.with_raw_response.create(**_stream_kwargs(kwargs))
+                    stream = raw.parse()
+                    result = StreamResult()
+                    on_delta = make_delta_handler() if make_delta_handler else None
+                    try:
+                        for chunk in stream:
+                            _consume_chunk(chunk, result, on_delta, started)
+                    except Exception:
+                        result.time_to_complete = time.monotonic() - started
+                        _log_stream_metrics(result, model, aborted=True)
+                        raise
+                    finally:
+                        stream.close()
+                    result.time_to_complete = time.monotonic() - started
+                limiter.record_response(raw.headers, estimated, getattr(result.usage, "total_tokens", None))
+                get_usage_tracker().record(result.usage)
+                _log_stream_metrics(result, model)
+                return result
+            except RateLimitError as e:
+                _handle_rate_limit(e, limiter, deadline)
+
+    return get_retry_policy().call(attempt, description=f"Chat completion stream ({model})")
+
+
+async def async_stream_chat_completion(
+    client: AsyncOpenAI,
+    make_delta_handler: Optional[Callable[[], Callable[[str], None]]] = None,
+    **kwargs
+) -> StreamResult:
+    """
+    Async twin of stream_chat_completion (also bounded by the loop semaphore).
+
+    Args:
+        client: AsyncOpenAI client instance
+        make_delta_handler: Factory returning a fresh delta handler per attempt
+        **kwargs: Arguments for chat.completions.create (stream is forced on)
+
+    Returns:
+        StreamResult with text, usage and time-to-first-token/complete metrics
+    """
+    limiter = get_rate_limiter("chat")
+    estimated = estimate_tokens(kwargs.get("messages", []), kwargs.get("max_tokens"))
+    model = kwargs.get("model")
+
+    async def attempt():
+        deadline = time.monotonic() + config.OPENAI_RATE_LIMIT_MAX_WAIT
+        while True:
+            try:
+                async with get_async_semaphore():
+                    async with limiter.async_slot(estimated):
+                        started = time.monotonic()
+                        raw = await client.chat.completions.with_raw_response.create(**_stream_kwargs(kwargs))
+                        stream = raw.parse()
+                        result = StreamResult()
+                        on_delta = make_delta_handler() if make_delta_handler else None
+                        try:
+                            async for chunk in stream:
+                                _consume_chunk(chunk, result, on_delta, started)
+                        except Exception:
+                            result.time_to_complete = time.monotonic() - started
+                            _log_stream_metrics(result, model, aborted=True)
+                            raise
+                        finally:
+                            await stream.close()
+                        result.time_to_complete = time.monotonic() - started
+                limiter.record_response(raw.headers, estimated, getattr(result.usage, "total_tokens", None))
+                get_usage_tracker().record(result.usage)
+                _log_stream_metrics(result, model)
+                return result
+            except RateLimitError as e:
+                _handle_rate_limit(e, limiter, deadline)
+
+    return await get_retry_policy().async_call(attempt, description=f"Chat completion stream ({model})")
+
+
+def create_image(client: OpenAI, **kwargs):
+    """
+    Call images.generate under the shared 'images' rate limiter and retry policy.
+    
+    Args:
+        client: OpenAI client instance
+        **kwargs: Arguments for images.generate
+        
+    Returns:
+        Parsed ImagesResponse
+    """
+    limiter = get_rate_limiter("images")
+
+    def attempt():
+        deadline = time.monotonic() + config.OPENAI_RATE_LIMIT_MAX_WAIT
+        while True:
+            try:
+                with limiter.slot():
+                    raw = client.images.with_raw_response.generate(**kwargs)
+                limiter.record_response(raw.headers)
+                response = raw.parse()
+                get_usage_tracker().record(getattr(response, "usage", None))
+                return response
+            except RateLimitError as e:
+                _handle_rate_limit(e, limiter, deadline)
+
+    # Image generation is slow and billed per call: retried only if it never reached the server
+    return get_retry_policy().call(attempt, idempotent=False, description="Image generation")
+
+
+async def async_create_image(client: AsyncOpenAI, **kwargs):
+    """
+    Async twin of create_image.
+    
+    Args:
+        client: AsyncOpenAI client instance
+        **kwargs: Arguments for images.generate
+        
+    Returns:
+        Parsed ImagesResponse
+    """
+    limiter = get_rate_limiter("images")
+
+    async def attempt():
+        deadline = time.monotonic() + config.OPENAI_RATE_LIMIT_MAX_WAIT
+        while True:
+            try:
+                async with get_async_semaphore():
+                    async with limiter.async_slot():
+                        raw = await client.images.with_raw_response.generate(**kwargs)
+                limiter.record_response(raw.headers)
+                response = raw.parse()
+                get_usage_tracker().record(getattr(response, "usage", None))
+                return response
+            except RateLimitError as e:
+                _handle_rate_limit(e, limiter, deadline)
+
+    return await get_retry_policy().async_call(attempt, idempotent=False, description="Image generation")
+
+
+def _prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+def _get_image_path(prompt: str) -> Path:
+    """Validate image settings and return the cache path for a prompt."""
     if not config.OPENAI_IMAGE_MODEL:
         raise Exception("OPENAI_IMAGE_MODEL is not configured")
 
@@ -34,49 +396,144 @@ def generate_image(prompt: str) -> Path:
         raise Exception("OPENAI_IMAGE_SIZE is not configured")
 
     image_hash = _prompt_hash(prompt)
-    image_path = config.ASSETS_DIR / f"design_{image_hash}.png"
+    return config.IMAGE_CACHE_DIR / f"design_{image_hash}.png"
+
+
+def _image_key(image_path: Path) -> str:
+    return image_path.stem[len("design_"):]
+
 
-    if image_path.exists():
+def _cached_image(image_path: Path) -> bool:
+    """True on an image cache hit (legacy assets/ images are adopted on first use)."""
+    if image_path.exists() or adopt_legacy_image(image_path):
         logger.info(f"Image cache hit: {image_path}")
+        touch_file(image_path)
+        record_event(config.CACHE_DIR, IMAGE, HIT, _image_key(image_path))
+        return True
+    record_event(config.CACHE_DIR, IMAGE, MISS, _image_key(image_path))
+    return False
+
+
+def _image_artifact(args: dict):
+    image_path = _get_image_path(args["prompt"])
+    return None if image_path.exists() else (config.CACHE_DIR, image_path.name)
+
+
+def openai_error_to_exception(e: Exception) -> Exception:
+    """
+    Log an OpenAI error and convert it to a user-facing exception.
+
+    Args:
+        e: Error raised by the OpenAI SDK
+
+    Returns:
+        Exception with a human-readable message
+    """
+    if isinstance(e, APITimeoutError):
+        logger.error(f"API timeout: {e}", exc_info=True)
+        return Exception("Request timed out. Please try again.")
+    if isinstance(e, APIConnectionError):
+        logger.error(f"Network error connecting to OpenAI: {e}", exc_info=True)
+        return Exception("Network error: Unable to connect to OpenAI API. Check your internet connection.")
+    if isinstance(e, RateLimitError):
+        logger.error(f"Rate limit exceeded: {e}", exc_info=True)
+        return Exception("Rate limit exceeded. Please try again later or check your OpenAI plan.")
+    if isinstance(e, APIError):
+        logger.error(f"OpenAI API error: {e}", exc_info=True)
+        return Exception(f"OpenAI API error: {e.message if hasattr(e, 'message') else str(e)}")
+    logger.error(f"OpenAI error: {e}", exc_info=True)
+    return Exception(f"OpenAI error: {str(e)}")
+
+
+def _save_image(response, image_path: Path) -> Path:
+    """Decode a b64 image response and write it to image_path."""
+    image_b64 = response.data[0].b64_json
+    image_bytes = base64.b64decode(image_b64)
+    # Write-then-rename: concurrent readers never see a partial PNG
+    tmp_path = image_path.with_suffix(".png.tmp")
+    tmp_path.write_bytes(image_bytes)
+    tmp_path.replace(image_path)
+
+    logger.info(f"Image saved: {image_path}")
+    record_cost(config.CACHE_DIR, IMAGE, _image_key(image_path), current_usage_scope())
+    maybe_collect_garbage()
+    return image_path
+
+
+@deduplicated(_image_artifact)
+@metered
+def generate_image(prompt: str, client: Optional[OpenAI] = None) -> Path:
+    """
+    Generate an image using OpenAI and return file path.
+    
+    Args:
+        prompt: Image generation prompt
+        client: Optional OpenAI client (default: shared client from the registry)
+        
+    Returns:
+        Path to saved PNG file
+    """
+    image_path = _get_image_path(prompt)
+
+    if _cached_image(image_path):
         return image_path
 
     logger.info("Image cache miss - generating image")
-    client = OpenAI(api_key=config.OPENAI_API_KEY)
+    client = client or get_openai_client()
 
     try:
-        response = client.images.generate(
+        response = create_image(
+            client,
             model=config.OPENAI_IMAGE_MODEL,
             prompt=prompt,
             size=config.OPENAI_IMAGE_SIZE,
             response_format="b64_json"
         )
 
-        image_b64 = response.data[0].b64_json
-        image_bytes = base64.b64decode(image_b64)
-        image_path.write_bytes(image_bytes)
+        return _save_image(response, image_path)
 
-        logger.info(f"Image saved: {image_path}")
-        return image_path
+    except OpenAIError as e:
+        raise openai_error_to_exception(e)
 
-    except APIConnectionError as e:
-        logger.error(f"Network error connecting to OpenAI: {e}", exc_info=True)
-        raise Exception("Network error: Unable to connect to OpenAI API. Check your internet connection.")
+    except Exception as e:
+        logger.error(f"Unexpected error in image generation: {e}", exc_info=True)
+        raise
 
-    except RateLimitError as e:
-        logger.error(f"Rate limit exceeded: {e}", exc_info=True)
-        raise Exception("Rate limit exceeded. Please try again later or check your OpenAI plan.")
 
-    except APITimeoutError as e:
-        logger.error(f"API timeout: {e}", exc_info=True)
-        raise Exception("Request timed out. Please try again.")
+@deduplicated(_image_artifact)
+@metered
+async def async_generate_image(prompt: str, client: Optional[AsyncOpenAI] = None) -> Path:
+    """
+    Async twin of generate_image built on AsyncOpenAI.
+    
+    Args:
+        prompt: Image generation prompt
+        client: Optional AsyncOpenAI client (default: shared client from the registry)
+        
+    Returns:
+        Path to saved PNG file
+    """
+    image_path = _get_image_path(prompt)
 
-    except APIError as e:
-        logger.error(f"OpenAI API error: {e}", exc_info=True)
-        raise Exception(f"OpenAI API error: {e.message if hasattr(e, 'message') else str(e)}")
+    if await asyncio.to_thread(_cached_image, image_path):
+        return image_path
+
+    logger.info("Image cache miss - generating image")
+    client = client or get_async_openai_client()
+
+    try:
+        response = await async_create_image(
+            client,
+            model=config.OPENAI_IMAGE_MODEL,
+            prompt=prompt,
+            size=config.OPENAI_IMAGE_SIZE,
+            response_format="b64_json"
+        )
+
+        return await asyncio.to_thread(_save_image, response, image_path)
 
     except OpenAIError as e:
-        logger.error(f"OpenAI error: {e}", exc_info=True)
-        raise Exception(f"OpenAI error: {str(e)}")
+        raise openai_error_to_exception(e)
 
     except Exception as e:
         logger.error(f"Unexpected error in image generation: {e}", exc_info=True)
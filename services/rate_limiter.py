@@ -0,0 +1,369 @@
+"""
+Adaptive rate limiting for OpenAI calls.
+
+Tracks requests-per-minute and tokens-per-minute budgets with token buckets,
+learns the real account limits from x-ratelimit-* response headers, honors
+Retry-After on 429 and adjusts the number of in-flight requests AIMD-style:
+halved on every rate-limit response, grown by one after a full window of
+successful calls. The ceiling of in-flight requests is AI_MAX_CONCURRENCY
+unless a caller sets another one (set_max_concurrency).
+"""
+import asyncio
+import logging
+import re
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Mapping, Optional
+
+import config
+
+logger = logging.getLogger(__name__)
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_reset_duration(value: Optional[str]) -> Optional[float]:
+    """
+    Parse an OpenAI reset duration header ('20ms', '1s', '6m0s') into seconds.
+
+    Args:
+        value: Header value
+
+    Returns:
+        Seconds, or None if the value cannot be parsed
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def parse_retry_after(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """
+    Extract the server-requested delay from Retry-After style headers.
+
+    Args:
+        headers: Response headers (case-insensitive mapping)
+
+    Returns:
+        Delay in seconds, or None if the server gave no hint
+    """
+    if not headers:
+        return None
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000.0
+        except ValueError:
+            pass
+    retry_after = headers.get("retry-after")
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    return parse_reset_duration(headers.get("x-ratelimit-reset-requests")) or \
+        parse_reset_duration(headers.get("x-ratelimit-reset-tokens"))
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at capacity-per-minute."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / 60.0
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` tokens are available (0 if available now)."""
+        self._refill(now)
+        # Requests larger than the bucket may run once it is full
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float, now: float):
+        self._refill(now)
+        self.tokens -= amount
+
+    def set_capacity(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.tokens = min(self.tokens, self.capacity)
+
+    def set_remaining(self, remaining: float, now: float):
+        self._refill(now)
+        self.tokens = min(self.tokens, float(remaining))
+
+
+class RateLimiter:
+    """
+    Request/token budgets plus AIMD concurrency control for one API family.
+
+    Callers wait (queue) for budget instead of failing. Use `slot()` or
+    `async_slot()` around each request and report the outcome with
+    `record_response()` / `record_rate_limited()`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: float,
+        tokens_per_minute: Optional[float] = None,
+        max_concurrency: int = 8,
+        min_concurrency: int = 1
+    ):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.concurrency = self.max_concurrency
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.rate_limited_count = 0
+        self._successes = 0
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+
+    def _try_reserve(self, estimated_tokens: float) -> float:
+        """Reserve a slot and budget; return 0 on success or seconds to wait."""
+        now = time.monotonic()
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.in_flight >= self.concurrency:
+            return 0.05
+        wait = self.requests.wait_time(1, now)
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.wait_time(estimated_tokens, now))
+        if wait > 0:
+            return wait
+        self.requests.consume(1, now)
+        if self.tokens is not None:
+            self.tokens.consume(estimated_tokens, now)
+        self.in_flight += 1
+        return 0.0
+
+    def _release(self):
+        with self._condition:
+            self.in_flight = max(0, self.in_flight - 1)
+            self._condition.notify_all()
+
+    def acquire(self, estimated_tokens: float = 0):
+        """Block until a request slot and budget are available."""
+        waited = 0.0
+        with self._condition:
+            while True:
+                wait = self._try_reserve(estimated_tokens)
+                if wait <= 0:
+                    break
+                if waited == 0:
+                    logger.debug(f"Rate limiter '{self.name}': queued, waiting {wait:.2f}s")
+                self._condition.wait(timeout=min(wait, 1.0))
+                waited += wait
+        if waited:
+            logger.debug(f"Rate limiter '{self.name}': slot acquired")
+
+    async def async_acquire(self, estimated_tokens: float = 0):
+        """Async variant of acquire(): waits without blocking the event loop."""
+        while True:
+            with self._lock:
+                wait = self._try_reserve(estimated_tokens)
+            if wait <= 0:
+                return
+            await asyncio.sleep(min(wait, 1.0))
+
+    @contextmanager
+    def slot(self, estimated_tokens: float = 0):
+        """Context manager holding one request slot."""
+        self.acquire(estimated_tokens)
+        try:
+            yield
+        finally:
+            self._release()
+
+    @asynccontextmanager
+    async def async_slot(self, estimated_tokens: float = 0):
+        """Async context manager holding one request slot."""
+        await self.async_acquire(estimated_tokens)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def record_response(
+        self,
+        headers: Optional[Mapping[str, str]] = None,
+        estimated_tokens: float = 0,
+        actual_tokens: Optional[int] = None
+    ):
+        """
+        Update budgets after a successful call.
+
+        Args:
+            headers: Response headers with x-ratelimit-* values
+            estimated_tokens: Tokens reserved before the call
+            actual_tokens: Tokens reported in the response usage block
+        """
+        with self._condition:
+            now = time.monotonic()
+            if self.tokens is not None and actual_tokens is not None:
+                # Return (or charge) the difference between estimate and real usage
+                self.tokens.consume(actual_tokens - estimated_tokens, now)
+            if headers:
+                self._apply_headers(headers, now)
+
+            # Additive increase: one extra slot per full window of successes
+            self._successes += 1
+            if self.concurrency < self.max_concurrency and self._successes >= self.concurrency:
+                self.concurrency += 1
+                self._successes = 0
+                logger.debug(f"Rate limiter '{self.name}': concurrency raised to {self.concurrency}")
+            self._condition.notify_all()
+
+    def record_rate_limited(self, headers: Optional[Mapping[str, str]] = None) -> float:
+        """
+        Register a 429 response: pause all callers and halve concurrency.
+
+        Args:
+            headers: Headers of the 429 response
+
+        Returns:
+            Seconds the limiter will hold new requests
+        """
+        with self._condition:
+            now = time.monotonic()
+            if headers:
+                self._apply_headers(headers, now)
+            delay = parse_retry_after(headers) or 1.0
+            self.blocked_until = max(self.blocked_until, now + delay)
+            self.rate_limited_count += 1
+            self._successes = 0
+            previous = self.concurrency
+            self.concurrency = max(self.min_concurrency, self.concurrency // 2)
+            logger.warning(
+                f"Rate limiter '{self.name}': 429 received, pausing {delay:.2f}s, "
+                f"concurrency {previous} -> {self.concurrency}"
+            )
+            return delay
+
+    def set_max_concurrency(self, limit: int):
+        """
+        Change the ceiling of in-flight requests.
+
+        An unthrottled limiter moves to the new ceiling at once; one that
+        was halved after a 429 keeps its lower level and grows back to it.
+        """
+        with self._condition:
+            limit = max(1, limit)
+            if self.concurrency >= self.max_concurrency:
+                self.concurrency = limit
+            self.max_concurrency = limit
+            self.min_concurrency = min(self.min_concurrency, limit)
+            self.concurrency = max(self.min_concurrency, min(self.concurrency, limit))
+            self._condition.notify_all()
+
+    def _apply_headers(self, headers: Mapping[str, str], now: float):
+        """Learn limits and remaining budget from x-ratelimit-* headers."""
+        for bucket, suffix in ((self.requests, "requests"), (self.tokens, "tokens")):
+            if bucket is None:
+                continue
+            limit = headers.get(f"x-ratelimit-limit-{suffix}")
+            remaining = headers.get(f"x-ratelimit-remaining-{suffix}")
+            try:
+                if limit:
+                    bucket.set_capacity(float(limit))
+                if remaining is not None:
+                    bucket.set_remaining(float(remaining), now)
+                    if float(remaining) <= 0:
+                        reset = parse_reset_duration(headers.get(f"x-ratelimit-reset-{suffix}"))
+                        if reset:
+                            self.blocked_until = max(self.blocked_until, now + reset)
+            except ValueError:
+                logger.debug(f"Ignoring malformed rate limit header for {suffix}")
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+_max_concurrency = config.AI_MAX_CONCURRENCY
+
+
+def set_max_concurrency(limit: int):
+    """
+    Set the in-flight request ceiling of every limiter (existing and future).
+
+    The limiters cap concurrency for the whole process, so a caller that
+    runs more requests at once (batch --workers, cache warm --concurrency)
+    must raise the ceiling, or it is silently held at AI_MAX_CONCURRENCY.
+
+    Args:
+        limit: Max in-flight requests per API family
+    """
+    global _max_concurrency
+    if limit < 1:
+        raise ValueError("Concurrency limit must be >= 1")
+    with _limiters_lock:
+        _max_concurrency = limit
+        limiters = list(_limiters.values())
+    for limiter in limiters:
+        limiter.set_max_concurrency(limit)
+
+
+def get_rate_limiter(name: str = "chat") -> RateLimiter:
+    """
+    Return the process-wide rate limiter for an API family.
+
+    Args:
+        name: 'chat' (requests + tokens budgets) or 'images' (requests budget)
+
+    Returns:
+        Shared RateLimiter
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            if name == "images":
+                limiter = RateLimiter(
+                    name,
+                    requests_per_minute=config.OPENAI_IMAGES_PER_MINUTE,
+                    max_concurrency=_max_concurrency
+                )
+            else:
+                limiter = RateLimiter(
+                    name,
+                    requests_per_minute=config.OPENAI_RPM_LIMIT,
+                    tokens_per_minute=config.OPENAI_TPM_LIMIT,
+                    max_concurrency=_max_concurrency
+                )
+            _limiters[name] = limiter
+        return limiter
+
+
+def estimate_tokens(messages, max_completion_tokens: Optional[int] = None) -> int:
+    """
+    Rough token estimate for budgeting before a chat call.
+
+    Uses ~3 characters per token (conservative for mixed Russian/English text)
+    plus the expected completion size.
+    """
+    chars = sum(len(str(message.get("content") or "")) for message in messages)
+    return chars // 3 + (max_completion_tokens or config.OPENAI_EXPECTED_COMPLETION_TOKENS)
@@ -0,0 +1,267 @@
+"""
+Long-running local report server.
+
+Keeps the heavy parts of the pipeline resident across requests: imported
+openai/pydantic/weasyprint modules, Jinja2 environments, the parsed
+stylesheet, the WeasyPrint font configuration and the pooled OpenAI
+client. Each request then only pays for the AI call (or cache hit) and
+PDF layout.
+
+Endpoints:
+    GET  /health   -> {"status": "ok", "memory_cache": {hits, misses, ...}}
+    POST /reports  -> PDF (application/pdf) or report JSON
+
+POST body (JSON):
+    transcript           transcript text (required)
+    report_type          'client' (default) or 'design'
+    format               'pdf' (default) or 'json'
+    transcript_filename  name printed in the report (default: transcript.txt)
+    use_cache            use cached AI results (default: true)
+"""
+import json
+import logging
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+
+import config
+from utils.ai_processor import (
+    analysis_created_at,
+    process_dialog_with_ai,
+    extract_design_brief,
+    make_image_prompt_from_brief
+)
+from utils.pdf_generator import load_css_content, render_html, html_to_pdf, get_font_config, get_stylesheet
+from utils.template_env import get_template
+from utils.render_cache import render_key, lookup_render, store_render
+from utils.report_output import format_generation_date
+from services.usage_tracker import get_usage_tracker
+from utils.memory_cache import get_memory_cache
+from services.client_registry import get_openai_client
+from services.openai_client import generate_image
+
+logger = logging.getLogger(__name__)
+
+REPORT_TEMPLATES = {
+    'client': 'report_template.html',
+    'design': 'design_report_template.html'
+}
+
+
+class BadRequest(Exception):
+    """Invalid client request (HTTP 400)."""
+
+
+class WarmRenderer:
+    """
+    Report pipeline with resident templates, CSS, fonts and OpenAI client.
+
+    Args:
+        templates_dir: Directory with report templates and style.css
+    """
+
+    def __init__(self, templates_dir: Path):
+        self.templates_dir = templates_dir
+        self.css_path = templates_dir / 'style.css'
+        self.css_content = load_css_content(self.css_path)
+        self.font_config = get_font_config()
+        stylesheet = get_stylesheet(self.css_path, self.css_content)
+        self.stylesheets = [stylesheet] if stylesheet is not None else None
+        self.client = get_openai_client()
+        # WeasyPrint layout is CPU-bound and holds the GIL; serialize renders
+        # so the shared font configuration is never used concurrently
+        self._render_lock = threading.Lock()
+
+        for template_name in REPORT_TEMPLATES.values():
+            get_template(templates_dir / template_name)
+        logger.info(f"Report server warmed up: templates from {templates_dir}")
+
+    def analyze(self, transcript: str, report_type: str, use_cache: bool):
+        """Run the AI stage; returns (report_data, image_uri, image_failed)."""
+        if report_type == 'client':
+            report_data = process_dialog_with_ai(
+                text=transcript,
+                model=config.OPENAI_MODEL,
+                temperature=config.AI_TEMPERATURE,
+                api_key=config.OPENAI_API_KEY,
+                cache_dir=config.CACHE_DIR,
+                use_cache=use_cache,
+                client=self.client
+            )
+            return report_data, None, False
+
+        report_data = extract_design_brief(
+            text=transcript,
+            model=config.OPENAI_MODEL,
+            api_key=config.OPENAI_API_KEY,
+            cache_dir=config.CACHE_DIR,
+            use_cache=use_cache,
+            client=self.client
+        )
+        try:
+            image_prompt = make_image_prompt_from_brief(
+                brief=report_data,
+                model=config.OPENAI_MODEL,
+                api_key=config.OPENAI_API_KEY,
+                cache_dir=config.CACHE_DIR,
+                use_cache=use_cache,
+                client=self.client
+            )
+            return report_data, generate_image(image_prompt, client=self.client).as_uri(), False
+        except Exception as e:
+            logger.error(f"Image generation failed: {e}", exc_info=True)
+            return report_data, None, True
+
+    def render_pdf(
+        self,
+        report_data,
+        report_type: str,
+        transcript_filename: str,
+        image_uri: Optional[str],
+        image_failed: bool,
+        generation_date: str
+    ) -> bytes:
+        """Render a report to PDF bytes using the resident resources (or the render cache)."""
+        template_path = self.templates_dir / REPORT_TEMPLATES[report_type]
+        key = None
+        if config.RENDER_CACHE:
+            key = render_key(
+                report_data, template_path, self.css_path, transcript_filename, image_uri, image_failed,
+                css_content=self.css_content,
+                generation_date=generation_date
+            )
+            cached = lookup_render(key)
+            if cached is not None:
+                return cached.read_bytes()
+        html = render_html(
+            report_data,
+            template_path,
+            self.css_path,
+            transcript_filename,
+            image_uri=image_uri,
+            image_failed=image_failed,
+            generation_date=generation_date,
+            css_content=self.css_content,
+            inline_css=False
+        )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_path = Path(tmp_dir) / 'report.pdf'
+            with self._render_lock:
+                html_to_pdf(html, output_path, font_config=self.font_config, stylesheets=self.stylesheets)
+            if key is not None:
+                store_render(key, output_path)
+            return output_path.read_bytes()
+
+    def handle(self, payload: Dict) -> Tuple[str, bytes]:
+        """
+        Process one report request.
+
+        Returns:
+            (content type, response body)
+        """
+        transcript = payload.get('transcript')
+        if not isinstance(transcript, str) or not transcript.strip():
+            raise BadRequest("'transcript' must be a non-empty string")
+
+        report_type = payload.get('report_type', 'client')
+        if report_type not in REPORT_TEMPLATES:
+            raise BadRequest(f"'report_type' must be one of {sorted(REPORT_TEMPLATES)}")
+
+        output_format = payload.get('format', 'pdf')
+        if output_format not in ('pdf', 'json'):
+            raise BadRequest("'format' must be 'pdf' or 'json'")
+
+        use_cache = bool(payload.get('use_cache', True))
+        report_data, image_uri, image_failed = self.analyze(transcript, report_type, use_cache)
+
+        if output_format == 'json':
+            body = json.dumps(report_data.model_dump(), ensure_ascii=False).encode('utf-8')
+            return 'application/json; charset=utf-8', body
+
+        # Dated by the cached analysis, so repeated requests hit the render cache
+        # (a fresh analysis without the cache is dated now)
+        analyzed_at = analysis_created_at(transcript, report_type, config.CACHE_DIR) if use_cache else None
+        generation_date = format_generation_date(analyzed_at)
+        pdf = self.render_pdf(
+            report_data,
+            report_type,
+            str(payload.get('transcript_filename') or 'transcript.txt'),
+            image_uri,
+            image_failed,
+            generation_date
+        )
+        return 'application/pdf', pdf
+
+
+class ReportRequestHandler(BaseHTTPRequestHandler):
+    """HTTP handler delegating to the server's WarmRenderer."""
+
+    server_version = "AIReportServer/1.0"
+
+    def _send(self, status: int, content_type: str, body: bytes):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, data: Dict):
+        self._send(status, 'application/json; charset=utf-8', json.dumps(data, ensure_ascii=False).encode('utf-8'))
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {
+                "status": "ok",
+                "memory_cache": get_memory_cache().stats(),
+                "usage": get_usage_tracker().snapshot()
+            })
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if self.path != '/reports':
+            self._send_json(404, {"error": "Not found"})
+            return
+
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > config.SERVER_MAX_BODY_BYTES:
+            self._send_json(413, {"error": "Request body too large"})
+            return
+
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+            if not isinstance(payload, dict):
+                raise BadRequest("Request body must be a JSON object")
+            content_type, body = self.server.renderer.handle(payload)
+            self._send(200, content_type, body)
+        except (BadRequest, json.JSONDecodeError, UnicodeDecodeError) as e:
+            self._send_json(400, {"error": str(e)})
+        except Exception as e:
+            logger.error(f"Report request failed: {e}", exc_info=True)
+            self._send_json(500, {"error": str(e)})
+
+    def log_message(self, format, *args):
+        logger.info(f"{self.address_string()} - {format % args}")
+
+
+class ReportServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding one WarmRenderer."""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], renderer: WarmRenderer):
+        super().__init__(address, ReportRequestHandler)
+        self.renderer = renderer
+
+
+def serve(host: str, port: int, templates_dir: Path = config.TEMPLATES_DIR):
+    """Start the report server and block until interrupted."""
+    server = ReportServer((host, port), WarmRenderer(templates_dir))
+    logger.info(f"Report server listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
@@ -0,0 +1,210 @@
+"""
+Transport-level retry policy for OpenAI calls.
+
+Retries transient failures (connection errors, timeouts, 5xx) with
+per-error-class exponential backoff and full jitter, bounded by a max
+attempt count and a max elapsed time. Rate limits (429) are not handled
+here - they are queued by services.rate_limiter.
+
+Non-idempotent requests (image generation) are retried only when the
+connection was never established (httpx.ConnectError/ConnectTimeout):
+after a read timeout, a dropped response or a protocol error the server
+may already have done the work and billed it.
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+from typing import Callable, Optional, TypeVar
+
+import httpx
+from openai import APIConnectionError, APIStatusError, APITimeoutError
+
+import config
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Transport errors raised before any byte of the request was sent
+PRE_SEND_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+
+
+def _never_sent(error: Exception) -> bool:
+    """Whether the error (or the transport error it wraps) happened before the request was sent."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        if isinstance(error, PRE_SEND_ERRORS):
+            return True
+        seen.add(id(error))
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class BackoffRule:
+    """Exponential backoff parameters for one error class."""
+
+    def __init__(self, name: str, base_delay: float, max_delay: float, retry_non_idempotent: bool = False):
+        self.name = name
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        # Safe to re-send a non-idempotent request only if it never reached the server
+        self.retry_non_idempotent = retry_non_idempotent
+
+    def delay(self, attempt: int) -> float:
+        """Full-jitter delay before retry number `attempt` (1-based)."""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+
+class RetryPolicy:
+    """
+    Retry policy shared by chat and image calls.
+
+    Args:
+        max_attempts: Total attempts for idempotent requests (first call included)
+        max_elapsed: Give up once this many seconds have passed since the first attempt
+        non_idempotent_max_attempts: Total attempts for non-idempotent requests
+        base_delay: Base backoff delay in seconds (scaled per error class)
+        max_delay: Upper bound for a single backoff delay
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 5,
+        max_elapsed: float = 120.0,
+        non_idempotent_max_attempts: int = 2,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0
+    ):
+        self.max_attempts = max(1, max_attempts)
+        self.max_elapsed = max_elapsed
+        self.non_idempotent_max_attempts = max(1, non_idempotent_max_attempts)
+        self.timeout_rule = BackoffRule("timeout", base_delay * 2, max_delay)
+        self.connect_rule = BackoffRule("connect error", base_delay / 2, max_delay, retry_non_idempotent=True)
+        self.connection_rule = BackoffRule("connection", base_delay / 2, max_delay)
+        self.server_rule = BackoffRule("server error", base_delay, max_delay)
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def classify(self, error: Exception) -> Optional[BackoffRule]:
+        """Return the backoff rule for a transient error, or None if not retryable."""
+        # Connection never established: the request did not reach the server
+        if isinstance(error, APIConnectionError) and _never_sent(error):
+            return self.connect_rule
+        # APITimeoutError subclasses APIConnectionError - check it first
+        if isinstance(error, APITimeoutError):
+            return self.timeout_rule
+        if isinstance(error, APIConnectionError):
+            return self.connection_rule
+        if isinstance(error, APIStatusError):
+            status = getattr(error, "status_code", 0) or 0
+            if status >= 500 or status in (408, 409):
+                return self.server_rule
+        return None
+
+    def _next_delay(
+        self,
+        error: Exception,
+        attempt: int,
+        started: float,
+        idempotent: bool,
+        description: str
+    ) -> Optional[float]:
+        """Return the delay before the next attempt, or None to give up."""
+        rule = self.classify(error)
+        if rule is None:
+            return None
+        if not idempotent and not rule.retry_non_idempotent:
+            logger.warning(f"{description}: {rule.name} on non-idempotent request - not retrying")
+            return None
+
+        max_attempts = self.max_attempts if idempotent else self.non_idempotent_max_attempts
+        if attempt >= max_attempts:
+            logger.error(f"{description}: giving up after {attempt} attempts ({rule.name}: {error})")
+            return None
+
+        delay = rule.delay(attempt)
+        if time.monotonic() - started + delay > self.max_elapsed:
+            logger.error(f"{description}: retry budget of {self.max_elapsed:.0f}s exhausted ({rule.name}: {error})")
+            return None
+
+        with self._lock:
+            self.retries += 1
+        logger.warning(
+            f"{description}: {rule.name} (attempt {attempt}/{max_attempts}): {error}. "
+            f"Retrying in {delay:.2f}s"
+        )
+        return delay
+
+    def call(self, fn: Callable[[], T], idempotent: bool = True, description: str = "OpenAI request") -> T:
+        """
+        Run fn, retrying transient failures.
+
+        Args:
+            fn: Zero-argument callable performing one request
+            idempotent: Whether re-sending the request is safe
+            description: Label used in log messages
+
+        Returns:
+            Result of fn
+        """
+        started = time.monotonic()
+        attempt = 1
+        while True:
+            try:
+                result = fn()
+                if attempt > 1:
+                    logger.info(f"{description}: succeeded after {attempt - 1} retries")
+                return result
+            except Exception as e:
+                delay = self._next_delay(e, attempt, started, idempotent, description)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+            attempt += 1
+
+    async def async_call(self, fn, idempotent: bool = True, description: str = "OpenAI request"):
+        """
+        Async variant of call(): fn returns an awaitable.
+
+        Args:
+            fn: Zero-argument callable returning a coroutine for one request
+            idempotent: Whether re-sending the request is safe
+            description: Label used in log messages
+
+        Returns:
+            Result of the awaited coroutine
+        """
+        started = time.monotonic()
+        attempt = 1
+        while True:
+            try:
+                result = await fn()
+                if attempt > 1:
+                    logger.info(f"{description}: succeeded after {attempt - 1} retries")
+                return result
+            except Exception as e:
+                delay = self._next_delay(e, attempt, started, idempotent, description)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+_policy: Optional[RetryPolicy] = None
+
+
+def get_retry_policy() -> RetryPolicy:
+    """Return the process-wide retry policy built from config."""
+    global _policy
+    if _policy is None:
+        _policy = RetryPolicy(
+            max_attempts=config.OPENAI_RETRY_MAX_ATTEMPTS,
+            max_elapsed=config.OPENAI_RETRY_MAX_ELAPSED,
+            non_idempotent_max_attempts=config.OPENAI_RETRY_NON_IDEMPOTENT_ATTEMPTS,
+            base_delay=config.OPENAI_RETRY_BASE_DELAY,
+            max_delay=config.OPENAI_RETRY_MAX_DELAY
+        )
+    return _policy
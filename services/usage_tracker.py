@@ -0,0 +1,127 @@
+"""
+Process-wide accounting of OpenAI token usage.
+
+Every chat completion (plain or streamed) and image generation reports
+its usage block here,
+so commands can show what a run actually spent next to their estimates.
+Usage scopes additionally attribute usage and wall time to one unit of
+work (e.g. producing one cache entry); they follow contextvars, so
+concurrent threads and tasks each see their own scope.
+"""
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+
+class UsageTracker:
+    """Thread-safe counters of OpenAI requests and tokens."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.unreported = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.total_tokens = 0
+
+    def record(self, usage):
+        """
+        Add one response's usage.
+
+        Args:
+            usage: Usage block of a completion (None if the API did not report it)
+        """
+        with self._lock:
+            self.requests += 1
+            if usage is None:
+                self.unreported += 1
+                return
+            self.prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+            self.completion_tokens += getattr(usage, "completion_tokens", 0) or 0
+            self.total_tokens += getattr(usage, "total_tokens", 0) or 0
+        scope = _current_scope.get()
+        while scope is not None:
+            scope.add(usage)
+            scope = scope.parent
+
+    def snapshot(self) -> Dict[str, int]:
+        """Current counters."""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "unreported": self.unreported,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "total_tokens": self.total_tokens
+            }
+
+
+_tracker = UsageTracker()
+
+
+def get_usage_tracker() -> UsageTracker:
+    """Return the process-wide usage tracker."""
+    return _tracker
+
+
+class UsageScope:
+    """Usage and elapsed time of one unit of work."""
+
+    def __init__(self, parent: Optional["UsageScope"] = None):
+        self.parent = parent
+        self.started = time.monotonic()
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.total_tokens = 0
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the scope was opened."""
+        return time.monotonic() - self.started
+
+    def add(self, usage):
+        self.requests += 1
+        if usage is not None:
+            self.prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+            self.completion_tokens += getattr(usage, "completion_tokens", 0) or 0
+            self.total_tokens += getattr(usage, "total_tokens", 0) or 0
+
+
+_current_scope: ContextVar[Optional[UsageScope]] = ContextVar("usage_scope", default=None)
+
+
+@contextmanager
+def usage_scope():
+    """Open a usage scope (nested scopes also count towards their parents)."""
+    scope = UsageScope(_current_scope.get())
+    token = _current_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _current_scope.reset(token)
+
+
+def current_usage_scope() -> Optional[UsageScope]:
+    """Innermost open usage scope of the current thread/task, if any."""
+    return _current_scope.get()
+
+
+def metered(fn):
+    """Decorator running a (sync or async) function inside its own usage scope."""
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            with usage_scope():
+                return await fn(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with usage_scope():
+            return fn(*args, **kwargs)
+    return wrapper
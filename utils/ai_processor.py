@@ -2,15 +2,17 @@
 AI processing module.
 Handles OpenAI API calls, caching, and retry logic.
 """
+import asyncio
+import difflib
 import hashlib
 import json
 import logging
 import time
 from pathlib import Path
-from typing import Optional
+from typing import Callable, List, Optional, Type
 
-from openai import OpenAI, OpenAIError, APIError, APIConnectionError, RateLimitError, APITimeoutError
-from pydantic import ValidationError
+from openai import OpenAI, AsyncOpenAI, OpenAIError
+from pydantic import BaseModel, ValidationError
 
 from utils.schema import (
     ReportData,
@@ -18,11 +20,147 @@ from utils.schema import (
     DesignBrief,
     DESIGN_BRIEF_SCHEMA_DESCRIPTION
 )
-from utils.io import read_json_file, write_json_file_atomic, get_cache_path, read_text_file
+import config
+from utils.cache_store import get_cache_backend, response_key, REPORT, DESIGN_BRIEF, IMAGE_PROMPT, RESPONSE
+from utils.cache_manager import maybe_collect_garbage
+from utils.memory_cache import get_memory_cache
+from utils.json_stream import JSONShapeChecker
+from utils.single_flight import deduplicated
+from utils.normalize import transcript_cache_key, legacy_cache_key, normalization_tag, normalize_text
+from utils.similarity import NearDuplicate, find_near_duplicate, record_transcript
+from utils.cache_metrics import HIT, MISS, INVALID, record_event, record_cost
+from utils.migrations import read_versions, stamped_value, upgrade
+from services.usage_tracker import metered, current_usage_scope, usage_scope, UsageScope
+from services.openai_client import (
+    openai_error_to_exception,
+    create_chat_completion,
+    async_create_chat_completion,
+    stream_chat_completion,
+    async_stream_chat_completion
+)
+from services.client_registry import get_openai_client, get_async_openai_client
 
 logger = logging.getLogger(__name__)
 
 
+IMAGE_PROMPT_SYSTEM_PROMPT = (
+    "You are an expert visual prompt writer. "
+    "Return a single-line image prompt with no explanations. "
+    "Maximum length: 900 characters."
+)
+
+REPORT_SYSTEM_PROMPT = f"""You are an expert analyst for client conversations.
+Analyze the provided dialogue transcript and extract structured information.
+
+You MUST respond with ONLY valid JSON, no additional text or explanations.
+Use the following schema:
+
+{REPORT_SCHEMA_DESCRIPTION}
+
+Important:
+- Extract the client's name from the dialogue
+- Identify the main topic and primary request
+- Analyze sentiment (positive/neutral/negative) and rate it 1-5
+- Provide a concise summary
+- List 3-7 key points discussed
+- Suggest 2-5 concrete next steps
+- Extract desired timeline/deadline if mentioned (or null if not)
+- Extract budget/cost expectations if mentioned (or null if not)
+- List core requirements - specific features/capabilities that MUST be in the final product
+- Output ONLY the JSON object, nothing else"""
+
+DESIGN_BRIEF_SYSTEM_PROMPT = f"""You are an expert design strategist.
+Extract a design brief from the provided transcript.
+
+You MUST respond with ONLY valid JSON, no additional text or explanations.
+Use the following schema:
+
+{DESIGN_BRIEF_SCHEMA_DESCRIPTION}
+
+Important:
+- Provide clear, concise strings
+- All list fields must be arrays (can be empty if not mentioned)
+- content_notes should be null if not mentioned
+- Output ONLY the JSON object, nothing else"""
+
+# Bump when a prompt changes meaningfully (stamped on cache entries and raw responses;
+# entries of older prompts stay valid, `cache migrate-schema` counts them)
+PROMPT_VERSIONS = {
+    REPORT: 1,
+    "report_refresh": 1,
+    DESIGN_BRIEF: 1,
+    "correction": 1
+}
+
+
+def build_report_messages(text: str) -> List[dict]:
+    """Build chat messages for client dialogue analysis."""
+    user_prompt = f"""Analyze this client dialogue transcript:
+
+{text}
+
+Respond with ONLY valid JSON following the schema provided."""
+    return [
+        {"role": "system", "content": REPORT_SYSTEM_PROMPT},
+        {"role": "user", "content": user_prompt}
+    ]
+
+
+def build_report_refresh_messages(text: str, previous: NearDuplicate) -> List[dict]:
+    """Build chat messages updating the report of a near-duplicate transcript from the diff."""
+    diff = "\n".join(difflib.unified_diff(
+        previous.text.split("\n"), normalize_text(text).split("\n"), lineterm="", n=1
+    ))
+    previous_json = json.dumps(previous.report.model_dump(), ensure_ascii=False)
+    user_prompt = f"""An earlier version of this client dialogue transcript was already analyzed.
+
+Previous analysis:
+{previous_json}
+
+Changes in the transcript since then (unified diff, '-' removed lines, '+' added lines):
+{diff}
+
+Update the analysis to reflect the changes and keep everything they do not affect.
+Respond with ONLY valid JSON following the schema provided."""
+    return [
+        {"role": "system", "content": REPORT_SYSTEM_PROMPT},
+        {"role": "user", "content": user_prompt}
+    ]
+
+
+def build_design_brief_messages(text: str) -> List[dict]:
+    """Build chat messages for design brief extraction."""
+    user_prompt = f"""Extract a design brief from this transcript:
+
+{text}
+
+Respond with ONLY valid JSON following the schema provided."""
+    return [
+        {"role": "system", "content": DESIGN_BRIEF_SYSTEM_PROMPT},
+        {"role": "user", "content": user_prompt}
+    ]
+
+
+def build_image_prompt_messages(brief_json: str) -> List[dict]:
+    """Build chat messages for image prompt generation."""
+    return [
+        {"role": "system", "content": IMAGE_PROMPT_SYSTEM_PROMPT},
+        {"role": "user", "content": brief_json}
+    ]
+
+
+def build_correction_messages(error: Exception, schema_description: str) -> List[dict]:
+    """Build the correction request sent after an invalid JSON response."""
+    correction_prompt = f"""The previous response was not valid JSON or didn't match the required schema.
+Error: {str(error)}
+
+Please provide ONLY valid JSON following this exact schema:
+{schema_description}
+
+No explanations, no markdown formatting, just pure JSON."""
+    return [{"role": "user", "content": correction_prompt}]
+
+
 def compute_text_hash(text: str) -> str:
     """
     Compute SHA256 hash of text for caching.
@@ -36,102 +174,298 @@ def compute_text_hash(text: str) -> str:
     return hashlib.sha256(text.encode('utf-8')).hexdigest()
 
 
-def load_from_cache(text: str, cache_dir: Path) -> Optional[ReportData]:
+def _cache_key(text: str) -> str:
+    """Cache key of a transcript (normalized, see utils.normalize)."""
+    return transcript_cache_key(text)
+
+
+def _adopt_legacy_entry(kind: str, text: str, key: str, cache_dir: Path, label: str) -> bool:
     """
-    Try to load cached AI response.
-    
+    Copy an entry stored under the raw-text key to the normalized key.
+
+    Entries written before normalization existed (or with it disabled) stay
+    reachable after TEXT_NORMALIZATION is enabled; each is copied once, on
+    its first lookup, together with its raw response. The raw-text entry is
+    kept, so it still serves lookups if normalization is turned off again.
+    Only called on a miss of the normalized key, so hits never hash the raw text.
+
     Args:
-        text: Input text (used for hash computation)
-        cache_dir: Directory containing cache files
-        
+        key: Normalized key of the text (already computed by the lookup)
+
     Returns:
-        ReportData if cache hit and valid, None otherwise
+        True if an entry was copied to `key`
     """
-    text_hash = compute_text_hash(text)
-    cache_path = get_cache_path(text_hash, cache_dir)
-    
-    if not cache_path.exists():
-        logger.info(f"Cache miss for hash {text_hash[:8]}...")
+    legacy_key = legacy_cache_key(text)
+    if legacy_key is None or legacy_key == key:
+        return False
+    try:
+        backend = get_cache_backend(cache_dir)
+        if backend.contains(kind, key):
+            return False
+        entry = backend.get(kind, legacy_key)
+        if entry is None:
+            return False
+        backend.put(
+            kind, key, entry.value, {**entry.meta, "normalization": normalization_tag()},
+            created_at=entry.created_at
+        )
+        logger.info(f"{label} cache entry {legacy_key[:8]}... copied to normalized key {key[:8]}...")
+    except Exception as e:
+        logger.error(f"Failed to adopt legacy {label.lower()} entry: {e}", exc_info=True)
+        return False
+    _copy_raw_response(kind, legacy_key, key, cache_dir)
+    return True
+
+
+def _load_json_entry(
+    kind: str,
+    key: str,
+    cache_dir: Path,
+    model_cls,
+    label: str,
+    adopt: Optional[Callable[[], bool]] = None
+):
+    """
+    Load and validate a cached JSON artifact; None on miss or invalid entry.
+
+    Validated objects are served from the in-process memory tier while the
+    backend entry's version token is unchanged (one version query per hit).
+    Entries of an older schema version are migrated (utils.migrations) and
+    written back in place. `adopt` runs only when the backend has no entry
+    under `key`; if it returns True (an entry was copied there) the entry is
+    read again.
+    """
+    memory = get_memory_cache()
+    cache_id = str(cache_dir)
+    try:
+        backend = get_cache_backend(cache_dir)
+        token = backend.version(kind, key)
+        if token is not None:
+            data = memory.get(cache_id, kind, key, token)
+            if data is not None:
+                logger.debug(f"{label} memory cache hit for hash {key[:8]}...")
+                # Keep the entry's accessed_at current for LRU/TTL eviction
+                backend.touch(kind, key)
+                record_event(cache_dir, kind, HIT, key)
+                return data
+        if token is None and adopt is not None and adopt():
+            token = backend.version(kind, key)
+        entry = backend.get(kind, key) if token is not None else None
+    except Exception as e:
+        logger.error(f"Error loading {label} cache: {e}", exc_info=True)
         return None
-    
+
+    if entry is None:
+        logger.info(f"{label} cache miss for hash {key[:8]}...")
+        memory.invalidate(cache_id, kind, key)
+        record_event(cache_dir, kind, MISS, key)
+        return None
+
     try:
-        logger.info(f"Cache hit for hash {text_hash[:8]}...")
-        cached_data = read_json_file(cache_path)
-        report_data = ReportData(**cached_data)
-        logger.info("Cache data is valid")
-        return report_data
-    except (json.JSONDecodeError, ValidationError) as e:
-        logger.warning(f"Cached data is invalid: {e}. Will regenerate.")
+        logger.info(f"{label} cache hit for hash {key[:8]}...")
+        stored = json.loads(entry.value)
+        schema_version, prompt_version = read_versions(stored)
+        fields, rewrite = upgrade(kind, stored)
+        data = model_cls(**fields)
+        logger.info(f"{label} cache data is valid")
+    except (json.JSONDecodeError, ValidationError, ValueError, TypeError, AttributeError) as e:
+        logger.warning(f"{label} cache data is invalid: {e}. Will regenerate.")
+        record_event(cache_dir, kind, INVALID, key)
         return None
+    if rewrite:
+        try:
+            backend.put(kind, key, stamped_value(kind, data.model_dump(), prompt_version), entry.meta)
+            token = backend.version(kind, key)
+            logger.info(f"{label} cache entry {key[:8]}... migrated from schema v{schema_version}")
+        except Exception as e:
+            logger.warning(f"Failed to write back migrated {label.lower()} entry: {e}")
+    memory.put(cache_id, kind, key, token, data)
+    record_event(cache_dir, kind, HIT, key)
+    return data
+
+
+def _save_json_entry(kind: str, key: str, data, cache_dir: Path, label: str, meta: Optional[dict] = None):
+    """Store a validated artifact stamped with schema and prompt versions; write failures are logged, not raised."""
+    try:
+        value = stamped_value(kind, data.model_dump(), PROMPT_VERSIONS.get(kind))
+        backend = get_cache_backend(cache_dir)
+        # A new analysis: its creation time is the date its reports show
+        backend.put(kind, key, value, meta={"normalization": normalization_tag(), **(meta or {})}, created_at=time.time())
+        get_memory_cache().put(str(cache_dir), kind, key, backend.version(kind, key), data)
+        logger.info(f"Saved {label.lower()} to cache: {kind}/{key[:8]}...")
     except Exception as e:
-        logger.error(f"Error loading cache: {e}", exc_info=True)
+        logger.error(f"Failed to save {label.lower()} cache: {e}", exc_info=True)
+        return
+    record_cost(cache_dir, kind, key, current_usage_scope())
+    maybe_collect_garbage(cache_dir)
+
+
+def scope_usage(scope: Optional[UsageScope]) -> Optional[dict]:
+    """Usage block of a scope wrapping one API call (None if nothing was requested)."""
+    if scope is None or not scope.requests:
         return None
+    return {
+        "prompt_tokens": scope.prompt_tokens,
+        "completion_tokens": scope.completion_tokens,
+        "total_tokens": scope.total_tokens
+    }
 
 
-def save_to_cache(text: str, report_data: ReportData, cache_dir: Path):
+def save_raw_response(
+    kind: str,
+    key: str,
+    raw: Optional[str],
+    model: str,
+    prompt: str,
+    usage: Optional[dict],
+    cache_dir: Path
+):
     """
-    Save AI response to cache.
-    
+    Store the raw completion a `kind` entry is parsed from.
+
+    Saved before validation, so `main.py cache reparse` can rebuild the
+    entry without an API call after the schema or a validator changes,
+    including responses the old schema rejected. A later response for the
+    same entry (e.g. the correction retry) replaces the earlier one.
+    Errors are logged and never propagate into the calling pipeline.
+
     Args:
-        text: Input text (used for hash computation)
-        report_data: Report data to cache
-        cache_dir: Directory for cache files
+        kind: Artifact kind (REPORT or DESIGN_BRIEF)
+        key: Artifact cache key
+        raw: Completion text
+        model: Model name
+        prompt: Prompt name (key of PROMPT_VERSIONS)
+        usage: Usage block of the call (see scope_usage)
+        cache_dir: Cache directory
     """
-    text_hash = compute_text_hash(text)
-    cache_path = get_cache_path(text_hash, cache_dir)
-    
+    if not config.CACHE_RAW_RESPONSES or raw is None:
+        return
+    record = {
+        "kind": kind,
+        "raw": raw,
+        "model": model,
+        "prompt": prompt,
+        "prompt_version": PROMPT_VERSIONS.get(prompt),
+        "usage": usage,
+        "normalization": normalization_tag(),
+        "created_at": time.time()
+    }
+    try:
+        get_cache_backend(cache_dir).put(
+            RESPONSE,
+            response_key(kind, key),
+            json.dumps(record, ensure_ascii=False),
+            meta={"model": model, "prompt": prompt}
+        )
+        logger.debug(f"Saved raw response: {kind}/{key[:8]}...")
+    except Exception as e:
+        logger.error(f"Failed to save raw response: {e}", exc_info=True)
+
+
+def _copy_raw_response(kind: str, source_key: str, key: str, cache_dir: Path):
+    """Give an entry reused from another key that key's raw response."""
     try:
-        data_dict = report_data.model_dump()
-        write_json_file_atomic(cache_path, data_dict)
-        logger.info(f"Saved to cache: {cache_path}")
+        backend = get_cache_backend(cache_dir)
+        entry = backend.get(RESPONSE, response_key(kind, source_key))
+        if entry is None:
+            return
+        record = {**json.loads(entry.value), "copied_from": source_key}
+        backend.put(RESPONSE, response_key(kind, key), json.dumps(record, ensure_ascii=False), entry.meta)
     except Exception as e:
-        logger.error(f"Failed to save cache: {e}", exc_info=True)
+        logger.error(f"Failed to copy raw response: {e}", exc_info=True)
 
 
-def get_design_brief_cache_path(text: str, cache_dir: Path) -> Path:
+def load_from_cache(text: str, cache_dir: Path) -> Optional[ReportData]:
     """
-    Generate cache file path for design brief.
+    Try to load cached AI response.
     
     Args:
-        text: Input text to hash
-        cache_dir: Directory for cache files
+        text: Input text (used for hash computation)
+        cache_dir: Cache directory
         
     Returns:
-        Path to design brief cache file
+        ReportData if cache hit and valid, None otherwise
     """
-    text_hash = compute_text_hash(text)
-    return cache_dir / f"design_brief_{text_hash}.json"
+    key = _cache_key(text)
+    return _load_json_entry(
+        REPORT, key, cache_dir, ReportData, "Report",
+        adopt=lambda: _adopt_legacy_entry(REPORT, text, key, cache_dir, "Report")
+    )
 
 
-def load_design_brief_from_cache(text: str, cache_dir: Path) -> Optional[DesignBrief]:
+def save_to_cache(
+    text: str,
+    report_data: ReportData,
+    cache_dir: Path,
+    near_duplicate: Optional[NearDuplicate] = None
+):
     """
-    Try to load cached design brief.
+    Save AI response to cache.
     
     Args:
         text: Input text (used for hash computation)
-        cache_dir: Directory containing cache files
-        
+        report_data: Report data to cache
+        cache_dir: Cache directory
+        near_duplicate: Transcript the report was reused or refreshed from (recorded in entry meta)
+    """
+    key = _cache_key(text)
+    meta = None
+    if near_duplicate is not None:
+        meta = {
+            "near_duplicate_of": near_duplicate.key,
+            "similarity": round(near_duplicate.similarity, 4),
+            "similarity_mode": config.SIMILARITY_REUSE
+        }
+    _save_json_entry(REPORT, key, report_data, cache_dir, "Report", meta)
+    if near_duplicate is not None and config.SIMILARITY_REUSE == "reuse":
+        _copy_raw_response(REPORT, near_duplicate.key, key, cache_dir)
+    if config.SIMILARITY_REUSE != "off":
+        record_transcript(text, key, cache_dir)
+
+
+def find_near_duplicate_report(text: str, cache_dir: Path) -> Optional[NearDuplicate]:
+    """
+    Look up a cached report of a near-duplicate transcript (config.SIMILARITY_REUSE).
+
     Returns:
-        DesignBrief if cache hit and valid, None otherwise
+        NearDuplicate with its validated report loaded, or None
     """
-    cache_path = get_design_brief_cache_path(text, cache_dir)
-    
-    if not cache_path.exists():
-        logger.info("Design brief cache miss")
+    if config.SIMILARITY_REUSE == "off":
         return None
-    
+    key = _cache_key(text)
     try:
-        logger.info("Design brief cache hit")
-        cached_data = read_json_file(cache_path)
-        design_brief = DesignBrief(**cached_data)
-        logger.info("Design brief cache data is valid")
-        return design_brief
-    except (json.JSONDecodeError, ValidationError) as e:
-        logger.warning(f"Design brief cache data is invalid: {e}. Will regenerate.")
-        return None
+        near = find_near_duplicate(text, key, REPORT, cache_dir)
     except Exception as e:
-        logger.error(f"Error loading design brief cache: {e}", exc_info=True)
+        logger.error(f"Near-duplicate lookup failed: {e}", exc_info=True)
+        return None
+    if near is None:
+        return None
+    near.report = _load_json_entry(REPORT, near.key, cache_dir, ReportData, "Near-duplicate report")
+    if near.report is None:
         return None
+    logger.info(
+        f"Near-duplicate {config.SIMILARITY_REUSE}: report {key[:8]}... from {near.key[:8]}... "
+        f"(similarity {near.similarity:.3f})"
+    )
+    return near
+
+
+def load_design_brief_from_cache(text: str, cache_dir: Path) -> Optional[DesignBrief]:
+    """
+    Try to load cached design brief.
+    
+    Args:
+        text: Input text (used for hash computation)
+        cache_dir: Cache directory
+        
+    Returns:
+        DesignBrief if cache hit and valid, None otherwise
+    """
+    key = _cache_key(text)
+    return _load_json_entry(
+        DESIGN_BRIEF, key, cache_dir, DesignBrief, "Design brief",
+        adopt=lambda: _adopt_legacy_entry(DESIGN_BRIEF, text, key, cache_dir, "Design brief")
+    )
 
 
 def save_design_brief_to_cache(text: str, design_brief: DesignBrief, cache_dir: Path):
@@ -141,31 +475,32 @@ def save_design_brief_to_cache(text: str, design_brief: DesignBrief, cache_dir:
     Args:
         text: Input text (used for hash computation)
         design_brief: Design brief data to cache
-        cache_dir: Directory for cache files
+        cache_dir: Cache directory
     """
-    cache_path = get_design_brief_cache_path(text, cache_dir)
-    
-    try:
-        data_dict = design_brief.model_dump()
-        write_json_file_atomic(cache_path, data_dict)
-        logger.info(f"Saved design brief to cache: {cache_path}")
-    except Exception as e:
-        logger.error(f"Failed to save design brief cache: {e}", exc_info=True)
+    _save_json_entry(DESIGN_BRIEF, _cache_key(text), design_brief, cache_dir, "Design brief")
 
 
-def get_image_prompt_cache_path(brief_json: str, cache_dir: Path) -> Path:
+def analysis_created_at(text: str, report_type: str, cache_dir: Path) -> Optional[float]:
     """
-    Generate cache file path for image prompt.
-    
+    Time the cached analysis of a transcript was produced.
+
+    Used as the generation date of its reports, so renders of an unchanged
+    analysis show the same date and hit the render cache.
+
     Args:
-        brief_json: JSON string of design brief
-        cache_dir: Directory for cache files
-        
+        text: Input text (used for hash computation)
+        report_type: 'client' or 'design'
+        cache_dir: Cache directory
+
     Returns:
-        Path to image prompt cache file
+        Unix timestamp, or None if the analysis is not cached
     """
-    text_hash = compute_text_hash(brief_json)
-    return cache_dir / f"image_prompt_{text_hash}.txt"
+    kind = DESIGN_BRIEF if report_type == 'design' else REPORT
+    try:
+        return get_cache_backend(cache_dir).created_at(kind, _cache_key(text))
+    except Exception as e:
+        logger.warning(f"Could not read the date of the cached analysis: {e}")
+        return None
 
 
 def load_image_prompt_from_cache(brief_json: str, cache_dir: Path) -> Optional[str]:
@@ -174,26 +509,28 @@ def load_image_prompt_from_cache(brief_json: str, cache_dir: Path) -> Optional[s
     
     Args:
         brief_json: JSON string of design brief
-        cache_dir: Directory containing cache files
+        cache_dir: Cache directory
         
     Returns:
         Prompt string if cache hit, None otherwise
     """
-    cache_path = get_image_prompt_cache_path(brief_json, cache_dir)
-    
-    if not cache_path.exists():
-        logger.info("Image prompt cache miss")
-        return None
-    
+    key = compute_text_hash(brief_json)
     try:
-        logger.info("Image prompt cache hit")
-        prompt = read_text_file(cache_path)
-        prompt = " ".join(prompt.split())
-        return prompt if prompt else None
+        entry = get_cache_backend(cache_dir).get(IMAGE_PROMPT, key)
     except Exception as e:
         logger.error(f"Error loading image prompt cache: {e}", exc_info=True)
         return None
 
+    if entry is None:
+        logger.info("Image prompt cache miss")
+        record_event(cache_dir, IMAGE_PROMPT, MISS, key)
+        return None
+
+    logger.info("Image prompt cache hit")
+    prompt = " ".join(entry.value.split())
+    record_event(cache_dir, IMAGE_PROMPT, HIT if prompt else INVALID, key)
+    return prompt if prompt else None
+
 
 def save_image_prompt_to_cache(brief_json: str, prompt: str, cache_dir: Path):
     """
@@ -202,24 +539,68 @@ def save_image_prompt_to_cache(brief_json: str, prompt: str, cache_dir: Path):
     Args:
         brief_json: JSON string of design brief
         prompt: Prompt text to cache
-        cache_dir: Directory for cache files
+        cache_dir: Cache directory
     """
-    cache_path = get_image_prompt_cache_path(brief_json, cache_dir)
-    
+    key = compute_text_hash(brief_json)
     try:
-        cache_path.write_text(prompt, encoding="utf-8")
-        logger.info(f"Saved image prompt to cache: {cache_path}")
+        get_cache_backend(cache_dir).put(IMAGE_PROMPT, key, prompt)
+        logger.info("Saved image prompt to cache")
     except Exception as e:
         logger.error(f"Failed to save image prompt cache: {e}", exc_info=True)
+        return
+    record_cost(cache_dir, IMAGE_PROMPT, key, current_usage_scope())
+    maybe_collect_garbage(cache_dir)
+
+
+def brief_to_json(brief: DesignBrief) -> str:
+    """Canonical JSON of a design brief (image prompt cache key)."""
+    return json.dumps(brief.model_dump(), ensure_ascii=False, sort_keys=True)
+
+
+def _flight(kind: str, key: str, args: dict):
+    """Single-flight target for a cache entry, or None if caching is off or it is cached."""
+    if not args["use_cache"] or get_cache_backend(args["cache_dir"]).contains(kind, key):
+        return None
+    return args["cache_dir"], f"{kind}_{key}"
+
+
+def _report_artifact(args: dict):
+    return _flight(REPORT, _cache_key(args["text"]), args)
+
+
+def _design_brief_artifact(args: dict):
+    return _flight(DESIGN_BRIEF, _cache_key(args["text"]), args)
+
+
+def _image_prompt_artifact(args: dict):
+    return _flight(IMAGE_PROMPT, compute_text_hash(brief_to_json(args["brief"])), args)
+
+
+def validate_image_prompt(raw_prompt: Optional[str]) -> str:
+    """
+    Normalize an image prompt to a single line and check its length.
+    
+    Raises:
+        ValueError: If the prompt is empty or longer than 900 characters
+    """
+    prompt = " ".join((raw_prompt or "").strip().split())
+    if not prompt:
+        raise ValueError("Empty prompt")
+    if len(prompt) > 900:
+        raise ValueError("Prompt exceeds 900 characters")
+    return prompt
 
 
+@deduplicated(_image_prompt_artifact)
+@metered
 def make_image_prompt_from_brief(
     brief: DesignBrief,
     model: str,
     api_key: str,
     cache_dir: Path,
     use_cache: bool = True,
-    max_retries: int = 2
+    max_retries: int = 2,
+    client: Optional[OpenAI] = None
 ) -> str:
     """
     Generate an image prompt from a design brief using OpenAI.
@@ -231,42 +612,30 @@ def make_image_prompt_from_brief(
         cache_dir: Directory for cache files
         use_cache: Whether to use cached results
         max_retries: Maximum number of retry attempts for invalid output
+        client: Optional OpenAI client (default: shared client from the registry)
         
     Returns:
         Single-line prompt (<= 900 characters)
     """
-    brief_json = json.dumps(brief.model_dump(), ensure_ascii=False, sort_keys=True)
+    brief_json = brief_to_json(brief)
     
     if use_cache:
         cached = load_image_prompt_from_cache(brief_json, cache_dir)
         if cached:
             return cached
     
-    client = OpenAI(api_key=api_key)
-    system_prompt = (
-        "You are an expert visual prompt writer. "
-        "Return a single-line image prompt with no explanations. "
-        "Maximum length: 900 characters."
-    )
+    client = client or get_openai_client(api_key)
     
     for attempt in range(1, max_retries + 2):
         try:
             logger.info(f"Requesting image prompt (attempt {attempt}/{max_retries + 1})")
-            response = client.chat.completions.create(
+            response = create_chat_completion(
+                client,
                 model=model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": brief_json}
-                ],
+                messages=build_image_prompt_messages(brief_json),
                 temperature=0
             )
-            prompt = response.choices[0].message.content
-            prompt = " ".join(prompt.strip().split())
-            
-            if not prompt:
-                raise ValueError("Empty prompt")
-            if len(prompt) > 900:
-                raise ValueError("Prompt exceeds 900 characters")
+            prompt = validate_image_prompt(response.choices[0].message.content)
             
             if use_cache:
                 save_image_prompt_to_cache(brief_json, prompt, cache_dir)
@@ -279,11 +648,64 @@ def make_image_prompt_from_brief(
             if attempt == max_retries + 1:
                 raise
 
+
+def _shape_checker_factory(schema_model: Type[BaseModel]):
+    """Delta handler factory aborting a stream that diverges from schema_model."""
+    return lambda: JSONShapeChecker.for_model(schema_model).feed
+
+
+def request_json_text(
+    client: OpenAI,
+    model: str,
+    messages: List[dict],
+    temperature: float,
+    schema_model: Type[BaseModel],
+    stream: Optional[bool] = None
+) -> str:
+    """
+    Request a JSON completion and return its raw text.
+
+    In streaming mode the output is checked incrementally against
+    schema_model and the request is aborted as soon as it diverges
+    (StreamDivergedError, a json.JSONDecodeError), so the caller's
+    correction retry starts without waiting for the full completion.
+
+    Args:
+        client: OpenAI client instance
+        model: Model name to use
+        messages: Chat messages
+        temperature: Temperature parameter
+        schema_model: Pydantic model the JSON must match
+        stream: Stream the completion (default: config.OPENAI_STREAMING)
+
+    Returns:
+        Raw response text from the API
+    """
+    if config.OPENAI_STREAMING if stream is None else stream:
+        return stream_chat_completion(
+            client,
+            _shape_checker_factory(schema_model),
+            model=model,
+            messages=messages,
+            temperature=temperature
+        ).text
+
+    response = create_chat_completion(
+        client,
+        model=model,
+        messages=messages,
+        temperature=temperature
+    )
+    return response.choices[0].message.content
+
+
 def call_openai_api(
     client: OpenAI,
     text: str,
     model: str,
-    temperature: float
+    temperature: float,
+    stream: Optional[bool] = None,
+    previous: Optional[NearDuplicate] = None
 ) -> str:
     """
     Make a call to OpenAI API.
@@ -293,6 +715,8 @@ def call_openai_api(
         text: Input transcript text
         model: Model name to use
         temperature: Temperature parameter
+        stream: Stream with early abort on non-JSON output (default: config.OPENAI_STREAMING)
+        previous: Near-duplicate whose report is refreshed from the diff instead of a full analysis
         
     Returns:
         Raw response text from the API
@@ -300,44 +724,10 @@ def call_openai_api(
     Raises:
         OpenAIError: On API errors
     """
-    system_prompt = f"""You are an expert analyst for client conversations.
-Analyze the provided dialogue transcript and extract structured information.
-
-You MUST respond with ONLY valid JSON, no additional text or explanations.
-Use the following schema:
-
-{REPORT_SCHEMA_DESCRIPTION}
-
-Important:
-- Extract the client's name from the dialogue
-- Identify the main topic and primary request
-- Analyze sentiment (positive/neutral/negative) and rate it 1-5
-- Provide a concise summary
-- List 3-7 key points discussed
-- Suggest 2-5 concrete next steps
-- Extract desired timeline/deadline if mentioned (or null if not)
-- Extract budget/cost expectations if mentioned (or null if not)
-- List core requirements - specific features/capabilities that MUST be in the final product
-- Output ONLY the JSON object, nothing else"""
-
-    user_prompt = f"""Analyze this client dialogue transcript:
-
-{text}
-
-Respond with ONLY valid JSON following the schema provided."""
-
     logger.debug(f"Calling OpenAI API with model {model}")
     
-    response = client.chat.completions.create(
-        model=model,
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-        ],
-        temperature=temperature
-    )
-    
-    result = response.choices[0].message.content
+    messages = build_report_refresh_messages(text, previous) if previous else build_report_messages(text)
+    result = request_json_text(client, model, messages, temperature, ReportData, stream)
     logger.debug(f"Received response: {len(result)} characters")
     
     return result
@@ -384,7 +774,8 @@ def parse_and_validate_response(response_text: str, attempt: int = 1) -> ReportD
 def call_openai_design_brief(
     client: OpenAI,
     text: str,
-    model: str
+    model: str,
+    stream: Optional[bool] = None
 ) -> str:
     """
     Make a call to OpenAI API for design brief extraction.
@@ -393,45 +784,17 @@ def call_openai_design_brief(
         client: OpenAI client instance
         text: Input transcript text
         model: Model name to use
+        stream: Stream with early abort on non-JSON output (default: config.OPENAI_STREAMING)
         
     Returns:
         Raw response text from the API
     """
-    system_prompt = f"""You are an expert design strategist.
-Extract a design brief from the provided transcript.
-
-You MUST respond with ONLY valid JSON, no additional text or explanations.
-Use the following schema:
-
-{DESIGN_BRIEF_SCHEMA_DESCRIPTION}
-
-Important:
-- Provide clear, concise strings
-- All list fields must be arrays (can be empty if not mentioned)
-- content_notes should be null if not mentioned
-- Output ONLY the JSON object, nothing else"""
-
-    user_prompt = f"""Extract a design brief from this transcript:
-
-{text}
-
-Respond with ONLY valid JSON following the schema provided."""
-
-    logger.debug(f"Calling OpenAI API for design brief with model {model}")
-    
-    response = client.chat.completions.create(
-        model=model,
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-        ],
-        temperature=0
-    )
-    
-    result = response.choices[0].message.content
-    logger.debug(f"Received design brief response: {len(result)} characters")
-    
-    return result
+    logger.debug(f"Calling OpenAI API for design brief with model {model}")
+    
+    result = request_json_text(client, model, build_design_brief_messages(text), 0, DesignBrief, stream)
+    logger.debug(f"Received design brief response: {len(result)} characters")
+    
+    return result
 
 
 def parse_and_validate_design_response(response_text: str, attempt: int = 1) -> DesignBrief:
@@ -458,13 +821,16 @@ def parse_and_validate_design_response(response_text: str, attempt: int = 1) ->
     return design_brief
 
 
+@deduplicated(_design_brief_artifact)
+@metered
 def extract_design_brief(
     text: str,
     model: str,
     api_key: str,
     cache_dir: Path,
     use_cache: bool = True,
-    max_retries: int = 2
+    max_retries: int = 2,
+    client: Optional[OpenAI] = None
 ) -> DesignBrief:
     """
     Extract design brief from transcript using OpenAI API.
@@ -476,6 +842,7 @@ def extract_design_brief(
         cache_dir: Directory for cache files
         use_cache: Whether to use cached results
         max_retries: Maximum number of retry attempts for invalid JSON
+        client: Optional OpenAI client (default: shared client from the registry)
         
     Returns:
         Validated DesignBrief
@@ -485,17 +852,23 @@ def extract_design_brief(
         if cached:
             return cached
     
-    client = OpenAI(api_key=api_key)
+    client = client or get_openai_client(api_key)
     
     for attempt in range(1, max_retries + 2):
         try:
             logger.info(f"Requesting design brief (attempt {attempt}/{max_retries + 1})")
             start_time = time.time()
             
-            response_text = call_openai_design_brief(client, text, model)
+            with usage_scope() as call:
+                response_text = call_openai_design_brief(client, text, model)
             
             elapsed = time.time() - start_time
             logger.info(f"Design brief API call completed in {elapsed:.2f}s")
+            if use_cache:
+                save_raw_response(
+                    DESIGN_BRIEF, _cache_key(text), response_text, model,
+                    "design_brief", scope_usage(call), cache_dir
+                )
             
             design_brief = parse_and_validate_design_response(response_text, attempt)
             
@@ -509,22 +882,20 @@ def extract_design_brief(
             
             if attempt <= max_retries:
                 logger.info("Asking AI to fix the design brief response...")
-                correction_prompt = f"""The previous response was not valid JSON or didn't match the required schema.
-Error: {str(e)}
-
-Please provide ONLY valid JSON following this exact schema:
-{DESIGN_BRIEF_SCHEMA_DESCRIPTION}
-
-No explanations, no markdown formatting, just pure JSON."""
-                
                 try:
-                    response_text = client.chat.completions.create(
-                        model=model,
-                        messages=[
-                            {"role": "user", "content": correction_prompt}
-                        ],
-                        temperature=0
-                    ).choices[0].message.content
+                    with usage_scope() as call:
+                        response_text = request_json_text(
+                            client,
+                            model,
+                            build_correction_messages(e, DESIGN_BRIEF_SCHEMA_DESCRIPTION),
+                            0,
+                            DesignBrief
+                        )
+                    if use_cache:
+                        save_raw_response(
+                            DESIGN_BRIEF, _cache_key(text), response_text, model,
+                            "correction", scope_usage(call), cache_dir
+                        )
                     
                     design_brief = parse_and_validate_design_response(response_text, attempt)
                     
@@ -541,30 +912,15 @@ No explanations, no markdown formatting, just pure JSON."""
                 logger.error("Exhausted all retries for valid design brief JSON response")
                 raise
                 
-        except APIConnectionError as e:
-            logger.error(f"Network error connecting to OpenAI: {e}", exc_info=True)
-            raise Exception("Network error: Unable to connect to OpenAI API. Check your internet connection.")
-            
-        except RateLimitError as e:
-            logger.error(f"Rate limit exceeded: {e}", exc_info=True)
-            raise Exception("Rate limit exceeded. Please try again later or check your OpenAI plan.")
-            
-        except APITimeoutError as e:
-            logger.error(f"API timeout: {e}", exc_info=True)
-            raise Exception("Request timed out. Please try again.")
-            
-        except APIError as e:
-            logger.error(f"OpenAI API error: {e}", exc_info=True)
-            raise Exception(f"OpenAI API error: {e.message if hasattr(e, 'message') else str(e)}")
-            
         except OpenAIError as e:
-            logger.error(f"OpenAI error: {e}", exc_info=True)
-            raise Exception(f"OpenAI error: {str(e)}")
+            raise openai_error_to_exception(e)
             
         except Exception as e:
             logger.error(f"Unexpected error in design brief extraction: {e}", exc_info=True)
             raise
 
+@deduplicated(_report_artifact)
+@metered
 def process_dialog_with_ai(
     text: str,
     model: str,
@@ -572,7 +928,8 @@ def process_dialog_with_ai(
     api_key: str,
     cache_dir: Path,
     use_cache: bool = True,
-    max_retries: int = 2
+    max_retries: int = 2,
+    client: Optional[OpenAI] = None
 ) -> ReportData:
     """
     Process dialogue transcript with OpenAI API.
@@ -587,6 +944,7 @@ def process_dialog_with_ai(
         cache_dir: Directory for cache files
         use_cache: Whether to use cached results
         max_retries: Maximum number of retry attempts for invalid JSON
+        client: Optional OpenAI client (default: shared client from the registry)
         
     Returns:
         Validated ReportData
@@ -595,13 +953,19 @@ def process_dialog_with_ai(
         Various exceptions on unrecoverable errors
     """
     # Check cache first
+    near = None
     if use_cache:
         cached = load_from_cache(text, cache_dir)
         if cached:
             return cached
+        # Opt-in: reuse or refresh the report of a near-duplicate transcript
+        near = find_near_duplicate_report(text, cache_dir)
+        if near is not None and config.SIMILARITY_REUSE == "reuse":
+            save_to_cache(text, near.report, cache_dir, near)
+            return near.report
     
-    # Initialize OpenAI client
-    client = OpenAI(api_key=api_key)
+    # Shared OpenAI client (pooled keep-alive connections)
+    client = client or get_openai_client(api_key)
     
     # Try to get valid response
     for attempt in range(1, max_retries + 2):  # +2 because first is not a retry
@@ -609,17 +973,23 @@ def process_dialog_with_ai(
             logger.info(f"Requesting AI analysis (attempt {attempt}/{max_retries + 1})")
             start_time = time.time()
             
-            response_text = call_openai_api(client, text, model, temperature)
+            with usage_scope() as call:
+                response_text = call_openai_api(client, text, model, temperature, previous=near)
             
             elapsed = time.time() - start_time
             logger.info(f"API call completed in {elapsed:.2f}s")
+            if use_cache:
+                save_raw_response(
+                    REPORT, _cache_key(text), response_text, model,
+                    "report_refresh" if near else "report", scope_usage(call), cache_dir
+                )
             
             # Try to parse and validate
             report_data = parse_and_validate_response(response_text, attempt)
             
             # Success - save to cache
             if use_cache:
-                save_to_cache(text, report_data, cache_dir)
+                save_to_cache(text, report_data, cache_dir, near)
             
             return report_data
             
@@ -629,28 +999,26 @@ def process_dialog_with_ai(
             if attempt <= max_retries:
                 # Retry with correction prompt
                 logger.info("Asking AI to fix the response...")
-                correction_prompt = f"""The previous response was not valid JSON or didn't match the required schema.
-Error: {str(e)}
-
-Please provide ONLY valid JSON following this exact schema:
-{REPORT_SCHEMA_DESCRIPTION}
-
-No explanations, no markdown formatting, just pure JSON."""
-                
                 try:
-                    response_text = client.chat.completions.create(
-                        model=model,
-                        messages=[
-                            {"role": "user", "content": correction_prompt}
-                        ],
-                        temperature=0
-                    ).choices[0].message.content
+                    with usage_scope() as call:
+                        response_text = request_json_text(
+                            client,
+                            model,
+                            build_correction_messages(e, REPORT_SCHEMA_DESCRIPTION),
+                            0,
+                            ReportData
+                        )
+                    if use_cache:
+                        save_raw_response(
+                            REPORT, _cache_key(text), response_text, model,
+                            "correction", scope_usage(call), cache_dir
+                        )
                     
                     # Try to parse corrected response
                     report_data = parse_and_validate_response(response_text, attempt)
                     
                     if use_cache:
-                        save_to_cache(text, report_data, cache_dir)
+                        save_to_cache(text, report_data, cache_dir, near)
                     
                     return report_data
                     
@@ -663,25 +1031,376 @@ No explanations, no markdown formatting, just pure JSON."""
                 logger.error("Exhausted all retries for valid JSON response")
                 raise
                 
-        except APIConnectionError as e:
-            logger.error(f"Network error connecting to OpenAI: {e}", exc_info=True)
-            raise Exception(f"Network error: Unable to connect to OpenAI API. Check your internet connection.")
+        except OpenAIError as e:
+            raise openai_error_to_exception(e)
             
-        except RateLimitError as e:
-            logger.error(f"Rate limit exceeded: {e}", exc_info=True)
-            raise Exception(f"Rate limit exceeded. Please try again later or check your OpenAI plan.")
+        except Exception as e:
+            logger.error(f"Unexpected error in AI processing: {e}", exc_info=True)
+            raise
+
+
+# ---------------------------------------------------------------------------
+# Async pipeline (AsyncOpenAI)
+#
+# Async twins of the blocking functions above. They share cache lookup,
+# validation and correction-retry behavior; concurrency is bounded by the
+# per-event-loop semaphore and the shared rate limiter in services.openai_client.
+# ---------------------------------------------------------------------------
+
+
+async def async_request_json_text(
+    client: AsyncOpenAI,
+    model: str,
+    messages: List[dict],
+    temperature: float,
+    schema_model: Type[BaseModel],
+    stream: Optional[bool] = None
+) -> str:
+    """Async twin of request_json_text."""
+    if config.OPENAI_STREAMING if stream is None else stream:
+        result = await async_stream_chat_completion(
+            client,
+            _shape_checker_factory(schema_model),
+            model=model,
+            messages=messages,
+            temperature=temperature
+        )
+        return result.text
+
+    response = await async_create_chat_completion(
+        client,
+        model=model,
+        messages=messages,
+        temperature=temperature
+    )
+    return response.choices[0].message.content
+
+
+async def async_call_openai_api(
+    client: AsyncOpenAI,
+    text: str,
+    model: str,
+    temperature: float,
+    stream: Optional[bool] = None,
+    previous: Optional[NearDuplicate] = None
+) -> str:
+    """
+    Async twin of call_openai_api.
+    
+    Args:
+        client: AsyncOpenAI client instance
+        text: Input transcript text
+        model: Model name to use
+        temperature: Temperature parameter
+        stream: Stream with early abort on non-JSON output (default: config.OPENAI_STREAMING)
+        previous: Near-duplicate whose report is refreshed from the diff instead of a full analysis
+        
+    Returns:
+        Raw response text from the API
+    """
+    logger.debug(f"Calling OpenAI API (async) with model {model}")
+    
+    messages = build_report_refresh_messages(text, previous) if previous else build_report_messages(text)
+    result = await async_request_json_text(client, model, messages, temperature, ReportData, stream)
+    logger.debug(f"Received response: {len(result)} characters")
+    
+    return result
+
+
+async def async_call_openai_design_brief(
+    client: AsyncOpenAI,
+    text: str,
+    model: str,
+    stream: Optional[bool] = None
+) -> str:
+    """
+    Async twin of call_openai_design_brief.
+    
+    Args:
+        client: AsyncOpenAI client instance
+        text: Input transcript text
+        model: Model name to use
+        stream: Stream with early abort on non-JSON output (default: config.OPENAI_STREAMING)
+        
+    Returns:
+        Raw response text from the API
+    """
+    logger.debug(f"Calling OpenAI API (async) for design brief with model {model}")
+    
+    result = await async_request_json_text(
+        client, model, build_design_brief_messages(text), 0, DesignBrief, stream
+    )
+    logger.debug(f"Received design brief response: {len(result)} characters")
+    
+    return result
+
+
+async def _async_request_correction(
+    client: AsyncOpenAI,
+    model: str,
+    error: Exception,
+    schema_description: str,
+    schema_model: Type[BaseModel]
+) -> str:
+    """Ask the model to fix an invalid JSON response (async)."""
+    return await async_request_json_text(
+        client, model, build_correction_messages(error, schema_description), 0, schema_model
+    )
+
+
+@deduplicated(_image_prompt_artifact)
+@metered
+async def async_make_image_prompt_from_brief(
+    brief: DesignBrief,
+    model: str,
+    api_key: str,
+    cache_dir: Path,
+    use_cache: bool = True,
+    max_retries: int = 2,
+    client: Optional[AsyncOpenAI] = None
+) -> str:
+    """
+    Async twin of make_image_prompt_from_brief.
+    
+    Args:
+        brief: DesignBrief data
+        model: OpenAI model name
+        api_key: OpenAI API key
+        cache_dir: Directory for cache files
+        use_cache: Whether to use cached results
+        max_retries: Maximum number of retry attempts for invalid output
+        client: Optional AsyncOpenAI client (default: shared client from the registry)
+        
+    Returns:
+        Single-line prompt (<= 900 characters)
+    """
+    brief_json = brief_to_json(brief)
+    
+    if use_cache:
+        cached = await asyncio.to_thread(load_image_prompt_from_cache, brief_json, cache_dir)
+        if cached:
+            return cached
+    
+    client = client or get_async_openai_client(api_key)
+    
+    for attempt in range(1, max_retries + 2):
+        try:
+            logger.info(f"Requesting image prompt (attempt {attempt}/{max_retries + 1})")
+            response = await async_create_chat_completion(
+                client,
+                model=model,
+                messages=build_image_prompt_messages(brief_json),
+                temperature=0
+            )
+            prompt = validate_image_prompt(response.choices[0].message.content)
             
-        except APITimeoutError as e:
-            logger.error(f"API timeout: {e}", exc_info=True)
-            raise Exception(f"Request timed out. Please try again.")
+            if use_cache:
+                await asyncio.to_thread(save_image_prompt_to_cache, brief_json, prompt, cache_dir)
             
-        except APIError as e:
-            logger.error(f"OpenAI API error: {e}", exc_info=True)
-            raise Exception(f"OpenAI API error: {e.message if hasattr(e, 'message') else str(e)}")
+            logger.info("Image prompt generated successfully")
+            return prompt
             
+        except Exception as e:
+            logger.warning(f"Failed to generate image prompt (attempt {attempt}): {e}")
+            if attempt == max_retries + 1:
+                raise
+
+
+@deduplicated(_design_brief_artifact)
+@metered
+async def async_extract_design_brief(
+    text: str,
+    model: str,
+    api_key: str,
+    cache_dir: Path,
+    use_cache: bool = True,
+    max_retries: int = 2,
+    client: Optional[AsyncOpenAI] = None
+) -> DesignBrief:
+    """
+    Async twin of extract_design_brief.
+    
+    Args:
+        text: Transcript text to analyze
+        model: OpenAI model name
+        api_key: OpenAI API key
+        cache_dir: Directory for cache files
+        use_cache: Whether to use cached results
+        max_retries: Maximum number of retry attempts for invalid JSON
+        client: Optional AsyncOpenAI client (default: shared client from the registry)
+        
+    Returns:
+        Validated DesignBrief
+    """
+    if use_cache:
+        cached = await asyncio.to_thread(load_design_brief_from_cache, text, cache_dir)
+        if cached:
+            return cached
+    
+    client = client or get_async_openai_client(api_key)
+    
+    for attempt in range(1, max_retries + 2):
+        try:
+            logger.info(f"Requesting design brief (attempt {attempt}/{max_retries + 1})")
+            start_time = time.time()
+            
+            with usage_scope() as call:
+                response_text = await async_call_openai_design_brief(client, text, model)
+            
+            elapsed = time.time() - start_time
+            logger.info(f"Design brief API call completed in {elapsed:.2f}s")
+            if use_cache:
+                await asyncio.to_thread(
+                    save_raw_response,
+                    DESIGN_BRIEF, _cache_key(text), response_text, model,
+                    "design_brief", scope_usage(call), cache_dir
+                )
+            
+            design_brief = parse_and_validate_design_response(response_text, attempt)
+            
+            if use_cache:
+                await asyncio.to_thread(save_design_brief_to_cache, text, design_brief, cache_dir)
+            
+            return design_brief
+            
+        except (json.JSONDecodeError, ValidationError) as e:
+            logger.warning(f"Failed to parse/validate design brief (attempt {attempt}): {e}")
+            
+            if attempt <= max_retries:
+                logger.info("Asking AI to fix the design brief response...")
+                try:
+                    with usage_scope() as call:
+                        response_text = await _async_request_correction(
+                            client, model, e, DESIGN_BRIEF_SCHEMA_DESCRIPTION, DesignBrief
+                        )
+                    if use_cache:
+                        await asyncio.to_thread(
+                            save_raw_response,
+                            DESIGN_BRIEF, _cache_key(text), response_text, model,
+                            "correction", scope_usage(call), cache_dir
+                        )
+                    
+                    design_brief = parse_and_validate_design_response(response_text, attempt)
+                    
+                    if use_cache:
+                        await asyncio.to_thread(save_design_brief_to_cache, text, design_brief, cache_dir)
+                    
+                    return design_brief
+                    
+                except Exception as retry_error:
+                    logger.warning(f"Design brief retry {attempt} also failed: {retry_error}")
+                    if attempt == max_retries:
+                        raise
+            else:
+                logger.error("Exhausted all retries for valid design brief JSON response")
+                raise
+                
+        except OpenAIError as e:
+            raise openai_error_to_exception(e)
+            
+        except Exception as e:
+            logger.error(f"Unexpected error in design brief extraction: {e}", exc_info=True)
+            raise
+
+
+@deduplicated(_report_artifact)
+@metered
+async def async_process_dialog_with_ai(
+    text: str,
+    model: str,
+    temperature: float,
+    api_key: str,
+    cache_dir: Path,
+    use_cache: bool = True,
+    max_retries: int = 2,
+    client: Optional[AsyncOpenAI] = None
+) -> ReportData:
+    """
+    Async twin of process_dialog_with_ai.
+    
+    Args:
+        text: Transcript text to analyze
+        model: OpenAI model name
+        temperature: Temperature parameter
+        api_key: OpenAI API key
+        cache_dir: Directory for cache files
+        use_cache: Whether to use cached results
+        max_retries: Maximum number of retry attempts for invalid JSON
+        client: Optional AsyncOpenAI client (default: shared client from the registry)
+        
+    Returns:
+        Validated ReportData
+    """
+    near = None
+    if use_cache:
+        cached = await asyncio.to_thread(load_from_cache, text, cache_dir)
+        if cached:
+            return cached
+        near = await asyncio.to_thread(find_near_duplicate_report, text, cache_dir)
+        if near is not None and config.SIMILARITY_REUSE == "reuse":
+            await asyncio.to_thread(save_to_cache, text, near.report, cache_dir, near)
+            return near.report
+    
+    client = client or get_async_openai_client(api_key)
+    
+    for attempt in range(1, max_retries + 2):
+        try:
+            logger.info(f"Requesting AI analysis (attempt {attempt}/{max_retries + 1})")
+            start_time = time.time()
+            
+            with usage_scope() as call:
+                response_text = await async_call_openai_api(client, text, model, temperature, previous=near)
+            
+            elapsed = time.time() - start_time
+            logger.info(f"API call completed in {elapsed:.2f}s")
+            if use_cache:
+                await asyncio.to_thread(
+                    save_raw_response,
+                    REPORT, _cache_key(text), response_text, model,
+                    "report_refresh" if near else "report", scope_usage(call), cache_dir
+                )
+            
+            report_data = parse_and_validate_response(response_text, attempt)
+            
+            if use_cache:
+                await asyncio.to_thread(save_to_cache, text, report_data, cache_dir, near)
+            
+            return report_data
+            
+        except (json.JSONDecodeError, ValidationError) as e:
+            logger.warning(f"Failed to parse/validate response (attempt {attempt}): {e}")
+            
+            if attempt <= max_retries:
+                logger.info("Asking AI to fix the response...")
+                try:
+                    with usage_scope() as call:
+                        response_text = await _async_request_correction(
+                            client, model, e, REPORT_SCHEMA_DESCRIPTION, ReportData
+                        )
+                    if use_cache:
+                        await asyncio.to_thread(
+                            save_raw_response,
+                            REPORT, _cache_key(text), response_text, model,
+                            "correction", scope_usage(call), cache_dir
+                        )
+                    
+                    report_data = parse_and_validate_response(response_text, attempt)
+                    
+                    if use_cache:
+                        await asyncio.to_thread(save_to_cache, text, report_data, cache_dir, near)
+                    
+                    return report_data
+                    
+                except Exception as retry_error:
+                    logger.warning(f"Retry {attempt} also failed: {retry_error}")
+                    if attempt == max_retries:
+                        raise
+            else:
+                logger.error("Exhausted all retries for valid JSON response")
+                raise
+                
         except OpenAIError as e:
-            logger.error(f"OpenAI error: {e}", exc_info=True)
-            raise Exception(f"OpenAI error: {str(e)}")
+            raise openai_error_to_exception(e)
             
         except Exception as e:
             logger.error(f"Unexpected error in AI processing: {e}", exc_info=True)
@@ -0,0 +1,431 @@
+"""
+Batch processing module.
+Runs many transcripts through the AI and PDF stages concurrently:
+AI requests share a bounded thread pool (I/O-bound), PDF rendering
+goes to a pool of warm rendering processes (CPU-bound WeasyPrint layout,
+see utils.render_pool).
+Progress is persisted in a JobStore, so restarted runs resume and
+several worker processes can share one batch.
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import config
+from utils.io import read_text_file
+from utils.schema import ReportData, DesignBrief
+from utils.ai_processor import (
+    analysis_created_at,
+    compute_text_hash,
+    process_dialog_with_ai,
+    extract_design_brief,
+    make_image_prompt_from_brief
+)
+from utils.job_store import Job, JobStore, make_owner_id, dump_report_json
+from utils.render_cache import file_digest
+from utils.render_pool import RenderPool
+from utils.report_output import DEFAULT_FORMATS, format_generation_date, write_report_outputs
+from services.openai_client import generate_image
+from services.rate_limiter import set_max_concurrency
+
+logger = logging.getLogger(__name__)
+
+
+class BatchItem:
+    """Outcome of a single transcript in a batch run (summary view of a job)."""
+
+    def __init__(self, job: Job):
+        self.input_path = job.input_path
+        self.output_path = job.output_path
+        self.status = job.status
+        self.outputs = job.outputs
+        self.error: Optional[str] = job.last_error if job.status == 'failed' else None
+        self.failed_stage: Optional[str] = job.failed_stage if job.status == 'failed' else None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == 'done'
+
+
+class StageError(Exception):
+    """Failure of a pipeline stage for one job."""
+
+    def __init__(self, stage: str, error: Exception):
+        super().__init__(str(error))
+        self.stage = stage
+
+
+class PreparedJob:
+    """Job whose AI stages are done and which is ready to render."""
+
+    def __init__(self, job: Job, report_data, image_uri: Optional[str], image_failed: bool):
+        self.job = job
+        self.report_data = report_data
+        self.image_uri = image_uri
+        self.image_failed = image_failed
+        # Every output of the job shows the time of its analysis (stable across runs)
+        self.generation_date = format_generation_date(job.analyzed_at)
+
+
+def discover_transcripts(input_dir: Path, pattern: str = "*.txt") -> List[Path]:
+    """
+    Find transcript files in a directory.
+
+    Args:
+        input_dir: Directory to search
+        pattern: Glob pattern relative to input_dir (e.g. '*.txt', '**/*.txt')
+
+    Returns:
+        Sorted list of matching files
+    """
+    return sorted(path for path in input_dir.glob(pattern) if path.is_file())
+
+
+def build_output_path(input_path: Path, output_dir: Path, timestamp: str, input_dir: Optional[Path] = None) -> Path:
+    """
+    Build a per-transcript output PDF path inside output_dir.
+
+    Transcripts in subdirectories of input_dir (e.g. --glob '**/*.txt') get a
+    short hash of their relative path in the name, so files with the same
+    name in different subdirectories do not overwrite each other's outputs.
+    """
+    relative = Path(os.path.relpath(input_path, input_dir)) if input_dir is not None else Path(input_path.name)
+    if relative.parent == Path('.'):
+        return output_dir / f"report_{input_path.stem}_{timestamp}.pdf"
+    path_hash = hashlib.sha256(relative.as_posix().encode('utf-8')).hexdigest()[:8]
+    return output_dir / f"report_{input_path.stem}_{path_hash}_{timestamp}.pdf"
+
+
+def batch_label(input_dir: Path, pattern: str, report_type: str) -> str:
+    """Stable identifier of a batch in the job store."""
+    return f"{report_type}:{input_dir.resolve()}:{pattern}"
+
+
+def output_signature(template_path: Path, css_path: Path) -> str:
+    """Digest of what a done job's outputs depend on besides the transcript: template and stylesheet."""
+    parts = {
+        "template": file_digest(template_path),
+        "css": file_digest(css_path)
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _read_transcripts(inputs: List[Path]) -> Dict[str, Optional[str]]:
+    """Current text of every transcript by path; None if it cannot be read (the job's read stage reports it)."""
+    texts = {}
+    for input_path in inputs:
+        try:
+            texts[str(input_path)] = read_text_file(input_path)
+        except Exception:
+            texts[str(input_path)] = None
+    return texts
+
+
+def combined_reports(store: JobStore, batch: str) -> list:
+    """
+    Finished reports of a batch, in input order, for generate_combined_pdf.
+
+    Args:
+        store: Job store of the batch
+        batch: Batch label (see batch_label)
+
+    Returns:
+        List of CombinedReport for every done job
+    """
+    from utils.pdf_generator import CombinedReport
+
+    reports = []
+    for job in store.jobs(batch):
+        if job.status != 'done' or not job.report_json:
+            continue
+        model_cls = DesignBrief if job.report_type == 'design' else ReportData
+        reports.append(CombinedReport(
+            model_cls(**json.loads(job.report_json)),
+            transcript_filename=job.input_path.name,
+            image_uri=job.image_uri,
+            image_failed=job.image_failed
+        ))
+    return reports
+
+
+def _analysis_time(text: str, report_type: str, use_cache: bool) -> float:
+    """Time a job's analysis was produced: its AI cache entry's, or now when the cache is not used."""
+    cached_at = analysis_created_at(text, report_type, config.CACHE_DIR) if use_cache else None
+    return cached_at or time.time()
+
+
+def _prepare(
+    job: Job,
+    store: JobStore,
+    owner: str,
+    use_cache: bool,
+    with_image: bool = True,
+    text: Optional[str] = None
+) -> PreparedJob:
+    """
+    Run the read/analyze/image stages of one job (executed in the I/O thread pool).
+
+    Stages already recorded in the job store are skipped, and so is the image
+    stage unless with_image (the image is only embedded into HTML/PDF).
+    The transcript is read here only if registration could not pass its text.
+    """
+    if text is None:
+        try:
+            text = read_text_file(job.input_path)
+        except Exception as e:
+            raise StageError('read', e)
+
+    text_hash = compute_text_hash(text)
+    if job.text_hash and job.text_hash != text_hash:
+        logger.info(f"Transcript changed since last run, restarting job: {job.input_path}")
+        store.reset_input(job.id, owner, text_hash)
+        job.stage, job.report_json, job.image_uri, job.image_failed = 'read', None, None, False
+        job.analyzed_at = None
+    elif not job.reached('read'):
+        store.advance(job.id, owner, 'read', text_hash=text_hash)
+        job.stage = 'read'
+
+    model_cls = DesignBrief if job.report_type == 'design' else ReportData
+    if job.reached('analyzed') and job.report_json:
+        report_data = model_cls(**json.loads(job.report_json))
+        if job.analyzed_at is None:
+            # Analyzed before analysis times were recorded
+            job.analyzed_at = _analysis_time(text, job.report_type, use_cache)
+            store.advance(job.id, owner, job.stage, analyzed_at=job.analyzed_at)
+    else:
+        try:
+            if job.report_type == 'design':
+                report_data = extract_design_brief(
+                    text=text,
+                    model=config.OPENAI_MODEL,
+                    api_key=config.OPENAI_API_KEY,
+                    cache_dir=config.CACHE_DIR,
+                    use_cache=use_cache
+                )
+            else:
+                report_data = process_dialog_with_ai(
+                    text=text,
+                    model=config.OPENAI_MODEL,
+                    temperature=config.AI_TEMPERATURE,
+                    api_key=config.OPENAI_API_KEY,
+                    cache_dir=config.CACHE_DIR,
+                    use_cache=use_cache
+                )
+        except Exception as e:
+            raise StageError('analyzed', e)
+        analyzed_at = _analysis_time(text, job.report_type, use_cache)
+        store.advance(job.id, owner, 'analyzed', report_json=dump_report_json(report_data), analyzed_at=analyzed_at)
+        job.stage, job.analyzed_at = 'analyzed', analyzed_at
+
+    if job.report_type == 'design' and with_image and not job.reached('image'):
+        image_uri, image_failed = None, False
+        try:
+            image_prompt = make_image_prompt_from_brief(
+                brief=report_data,
+                model=config.OPENAI_MODEL,
+                api_key=config.OPENAI_API_KEY,
+                cache_dir=config.CACHE_DIR,
+                use_cache=use_cache
+            )
+            image_uri = generate_image(image_prompt).as_uri()
+        except Exception as e:
+            image_failed = True
+            logger.error(f"Image generation failed for {job.input_path}: {e}", exc_info=True)
+        store.advance(job.id, owner, 'image', image_uri=image_uri, image_failed=int(image_failed))
+        job.stage, job.image_uri, job.image_failed = 'image', image_uri, image_failed
+
+    return PreparedJob(job, report_data, job.image_uri, job.image_failed)
+
+
+def run_batch(
+    inputs: List[Path],
+    output_dir: Path,
+    template_path: Path,
+    store: JobStore,
+    batch: str,
+    report_type: str = 'client',
+    use_cache: bool = True,
+    io_workers: int = 8,
+    render_workers: Optional[int] = None,
+    log_level: str = "INFO",
+    formats: Tuple[str, ...] = DEFAULT_FORMATS,
+    jsonl_path: Optional[Path] = None,
+    input_dir: Optional[Path] = None
+) -> List[BatchItem]:
+    """
+    Process a list of transcripts concurrently.
+
+    Transcripts are registered in the job store, then leased in chunks:
+    each leased job is read and analyzed on a bounded thread pool and
+    rendered on the warm render pool as soon as its analysis completes.
+    JSON/JSONL/HTML outputs are written as soon as the analysis completes;
+    without 'pdf' in formats no render pool is started at all.
+    A failure in one transcript never aborts the others.
+
+    Args:
+        inputs: Transcript files to process
+        output_dir: Directory for generated PDFs
+        template_path: Path to HTML template
+        store: Job store tracking per-transcript progress
+        batch: Batch label in the job store (see batch_label)
+        report_type: 'client' or 'design'
+        use_cache: Whether to use cached AI results
+        io_workers: Max concurrent AI requests (also the rate limiters' in-flight ceiling)
+        render_workers: Max concurrent PDF renders (default: CPU count)
+        log_level: Logging level for render worker processes
+        formats: Output formats (see utils.report_output.FORMATS)
+        jsonl_path: JSON Lines file of the run (default: reports_<timestamp>.jsonl in output_dir)
+        input_dir: Directory the inputs were discovered in; output names are unique
+            per path relative to it (default: the inputs' common parent directory)
+
+    Returns:
+        List of BatchItem for every job of the batch
+    """
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    css_path = template_path.parent / 'style.css'
+    render_workers = render_workers or config.BATCH_RENDER_WORKERS or os.cpu_count() or 1
+    owner = make_owner_id()
+    jsonl_path = jsonl_path or output_dir / f"reports_{timestamp}.jsonl"
+    with_render = 'pdf' in formats
+    with_image = with_render or 'html' in formats
+    if input_dir is None and inputs:
+        input_dir = Path(os.path.commonpath([path.parent for path in inputs]))
+
+    # The rate limiters would otherwise hold the I/O pool at AI_MAX_CONCURRENCY
+    set_max_concurrency(io_workers)
+
+    signature = output_signature(template_path, css_path)
+
+    # Every transcript is read once: the text hashed here is handed to its job when claimed
+    texts = _read_transcripts(inputs)
+    store.register(
+        batch,
+        inputs,
+        report_type,
+        [build_output_path(path, output_dir, timestamp, input_dir) for path in inputs],
+        text_hashes=[
+            compute_text_hash(texts[str(path)]) if texts[str(path)] is not None else None for path in inputs
+        ],
+        output_signature=signature,
+        formats=formats
+    )
+    for job in store.jobs(batch):
+        if job.status == 'done':
+            texts.pop(str(job.input_path), None)
+
+    logger.info(
+        f"Batch run {owner}: {len(inputs)} transcripts, {io_workers} AI workers, "
+        f"{render_workers if with_render else 'no'} render workers, formats: {', '.join(formats)}"
+    )
+
+    with ThreadPoolExecutor(max_workers=io_workers) as io_pool, (
+            RenderPool([template_path], css_path, workers=render_workers, log_level=log_level)
+            if with_render else nullcontext()
+    ) as render_pool:
+        analysis_futures = {}
+        render_futures = {}
+        outputs = {}  # job id -> outputs written so far (format -> file)
+        # Leases are renewed at this interval for every held job, also while it waits for a render
+        heartbeat = max(1.0, store.lease_seconds / 3)
+        renewed_at = time.monotonic()
+
+        def renew_leases():
+            nonlocal renewed_at
+            held = [job.id for job in list(analysis_futures.values()) + list(render_futures.values())]
+            store.renew(held, owner)
+            renewed_at = time.monotonic()
+
+        def claim_more():
+            # Leases run while a job waits for a render too: hold at most one queued render per worker
+            free = min(
+                io_workers - len(analysis_futures),
+                io_workers + render_workers - len(analysis_futures) - len(render_futures)
+            )
+            if free <= 0:
+                return
+            for job in store.claim(batch, owner, free):
+                text = texts.pop(str(job.input_path), None)
+                analysis_futures[io_pool.submit(_prepare, job, store, owner, use_cache, with_image, text)] = job
+
+        def finish_analysis(prepared: PreparedJob):
+            job = prepared.job
+            try:
+                written = write_report_outputs(
+                    prepared.report_data,
+                    job.output_path,
+                    formats,
+                    template_path,
+                    css_path,
+                    transcript_filename=job.input_path.name,
+                    image_uri=prepared.image_uri,
+                    image_failed=prepared.image_failed,
+                    jsonl_path=jsonl_path,
+                    generation_date=prepared.generation_date
+                )
+            except Exception as e:
+                raise StageError('rendered', e)
+            outputs[job.id] = {**job.outputs, **{fmt: str(path) for fmt, path in written.items()}}
+            if with_render:
+                submit_render(prepared)
+            else:
+                store.complete(job.id, owner, signature, outputs.pop(job.id))
+
+        def submit_render(prepared: PreparedJob):
+            job = prepared.job
+            render_future = render_pool.submit(
+                prepared.report_data,
+                job.output_path,
+                template_path,
+                css_path,
+                job.input_path.name,
+                prepared.image_uri,
+                prepared.image_failed,
+                prepared.generation_date
+            )
+            render_futures[render_future] = job
+            # Submitting may have blocked on a full queue; the render itself may wait further
+            store.renew([job.id], owner)
+
+        claim_more()
+        while analysis_futures or render_futures:
+            done, _ = wait(
+                list(analysis_futures) + list(render_futures),
+                timeout=max(0.0, heartbeat - (time.monotonic() - renewed_at)),
+                return_when=FIRST_COMPLETED
+            )
+            if time.monotonic() - renewed_at >= heartbeat:
+                renew_leases()
+            for future in done:
+                if future in analysis_futures:
+                    job = analysis_futures.pop(future)
+                    try:
+                        finish_analysis(future.result())
+                    except StageError as e:
+                        logger.error(f"Stage '{e.stage}' failed for {job.input_path}: {e}", exc_info=True)
+                        store.fail(job.id, owner, e.stage, str(e))
+                    except Exception as e:
+                        logger.error(f"Job failed for {job.input_path}: {e}", exc_info=True)
+                        store.fail(job.id, owner, job.stage, str(e))
+                else:
+                    job = render_futures.pop(future)
+                    job_outputs = outputs.pop(job.id)
+                    try:
+                        job_outputs['pdf'] = future.result()
+                        store.complete(job.id, owner, signature, job_outputs)
+                    except Exception as e:
+                        logger.error(f"PDF stage failed for {job.input_path}: {e}", exc_info=True)
+                        store.fail(job.id, owner, 'rendered', str(e))
+            claim_more()
+
+    items = [BatchItem(job) for job in store.jobs(batch)]
+    failed = sum(1 for item in items if item.status == 'failed')
+    done = sum(1 for item in items if item.ok)
+    logger.info(f"Batch finished: {done} done, {failed} failed, {len(items) - done - failed} in progress elsewhere")
+    return items
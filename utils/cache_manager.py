@@ -0,0 +1,231 @@
+"""
+Cache eviction for AI artifacts, generated images and rendered PDFs.
+
+Every artifact type has its own limits (max bytes, max entries, TTL; see
+config.CACHE_LIMITS). Entries older than the TTL are dropped first, then
+the least recently accessed ones until the type fits its size and count
+limits. Collection runs from `main.py cache gc` and opportunistically
+after cache writes, at most once per CACHE_GC_INTERVAL per process.
+"""
+import logging
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import config
+from utils.cache_store import get_cache_backend, KINDS
+from utils.single_flight import sweep_lock_files
+
+logger = logging.getLogger(__name__)
+
+IMAGE = "image"
+IMAGE_PATTERN = "design_*.png"
+RENDER = "render"
+RENDER_PATTERN = "*.pdf"
+
+_gc_lock = threading.Lock()
+_last_gc: Dict[str, float] = {}
+
+
+class CachePolicy:
+    """
+    Eviction limits of one artifact type (0 = unlimited).
+
+    Args:
+        max_bytes: Max total size of the type's entries
+        max_entries: Max number of entries
+        ttl_seconds: Max age since last access
+    """
+
+    def __init__(self, max_bytes: int = 0, max_entries: int = 0, ttl_seconds: float = 0):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+    @classmethod
+    def for_kind(cls, kind: str) -> "CachePolicy":
+        """Policy configured for an artifact type."""
+        return cls(**config.CACHE_LIMITS.get(kind, {}))
+
+    @property
+    def unlimited(self) -> bool:
+        return not (self.max_bytes or self.max_entries or self.ttl_seconds)
+
+
+class GCResult:
+    """Outcome of collecting one artifact type."""
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.removed = 0
+        self.freed_bytes = 0
+        self.kept = 0
+        self.kept_bytes = 0
+
+
+def select_evictions(entries: Iterable, policy: CachePolicy, now: Optional[float] = None) -> List:
+    """
+    Choose entries to evict under a policy.
+
+    Args:
+        entries: Objects with `accessed_at` and `size` attributes
+        policy: Limits to enforce
+        now: Current time (default: time.time())
+
+    Returns:
+        Entries to remove (expired first, then least recently accessed)
+    """
+    now = time.time() if now is None else now
+    # Most recently used first: everything past the limits is evicted
+    ordered = sorted(entries, key=lambda entry: entry.accessed_at, reverse=True)
+    evict = []
+    kept_count, kept_bytes = 0, 0
+    for entry in ordered:
+        expired = policy.ttl_seconds and now - entry.accessed_at > policy.ttl_seconds
+        over_count = policy.max_entries and kept_count + 1 > policy.max_entries
+        over_bytes = policy.max_bytes and kept_bytes + entry.size > policy.max_bytes
+        if expired or over_count or over_bytes:
+            evict.append(entry)
+        else:
+            kept_count += 1
+            kept_bytes += entry.size
+    return evict
+
+
+class _FileEntry:
+    def __init__(self, path: Path):
+        stat = path.stat()
+        self.path = path
+        self.size = stat.st_size
+        # File cache hits refresh mtime (see touch_file), so mtime is the access time
+        self.accessed_at = stat.st_mtime
+
+
+def touch_file(path: Path):
+    """Mark a cached image or rendered PDF as recently used."""
+    try:
+        os.utime(path)
+    except OSError as e:
+        logger.debug(f"Could not touch {path}: {e}")
+
+
+def collect_kind(kind: str, cache_dir: Path, dry_run: bool = False) -> GCResult:
+    """Evict entries of one AI artifact type from the cache backend."""
+    result = GCResult(kind)
+    policy = CachePolicy.for_kind(kind)
+    backend = get_cache_backend(cache_dir)
+    entries = list(backend.entries(kind, values=False))
+    evict = [] if policy.unlimited else select_evictions(entries, policy)
+
+    result.removed = len(evict)
+    result.freed_bytes = sum(entry.size for entry in evict)
+    result.kept = len(entries) - result.removed
+    result.kept_bytes = sum(entry.size for entry in entries) - result.freed_bytes
+    if evict and not dry_run:
+        backend.delete_many(kind, [entry.key for entry in evict])
+    return result
+
+
+def collect_files(kind: str, directory: Path, pattern: str, dry_run: bool = False) -> GCResult:
+    """Evict files of a file-based cache (images, rendered PDFs) from a directory."""
+    result = GCResult(kind)
+    policy = CachePolicy.for_kind(kind)
+    entries = []
+    if directory.exists():
+        for path in directory.glob(pattern):
+            try:
+                entries.append(_FileEntry(path))
+            except FileNotFoundError:
+                continue
+    evict = [] if policy.unlimited else select_evictions(entries, policy)
+
+    result.removed = len(evict)
+    result.freed_bytes = sum(entry.size for entry in evict)
+    result.kept = len(entries) - result.removed
+    result.kept_bytes = sum(entry.size for entry in entries) - result.freed_bytes
+    if not dry_run:
+        for entry in evict:
+            try:
+                entry.path.unlink()
+            except FileNotFoundError:
+                pass
+    return result
+
+
+def collect_garbage(
+    cache_dir: Path = config.CACHE_DIR,
+    image_dir: Path = config.IMAGE_CACHE_DIR,
+    dry_run: bool = False,
+    render_dir: Path = config.RENDER_CACHE_DIR
+) -> List[GCResult]:
+    """
+    Enforce the configured limits on every artifact type.
+
+    Args:
+        cache_dir: AI cache directory
+        image_dir: Generated image cache directory
+        dry_run: Only report what would be removed
+        render_dir: Rendered PDF cache directory
+
+    Returns:
+        GCResult per artifact type
+    """
+    results = [collect_kind(kind, cache_dir, dry_run) for kind in KINDS]
+    results.append(collect_files(IMAGE, image_dir, IMAGE_PATTERN, dry_run))
+    results.append(collect_files(RENDER, render_dir, RENDER_PATTERN, dry_run))
+
+    locks = sweep_lock_files(cache_dir, dry_run)
+    if locks:
+        logger.info(f"Cache GC {'would remove' if dry_run else 'removed'} {locks} stale lock files")
+    if not dry_run:
+        from utils.cache_metrics import prune_events
+        prune_events(cache_dir)
+
+    removed = sum(result.removed for result in results)
+    freed = sum(result.freed_bytes for result in results)
+    action = "would remove" if dry_run else "removed"
+    logger.info(f"Cache GC {action} {removed} entries ({freed / 1024 / 1024:.1f} MB)")
+    return results
+
+
+def maybe_collect_garbage(cache_dir: Path = config.CACHE_DIR, image_dir: Path = config.IMAGE_CACHE_DIR):
+    """
+    Opportunistic GC after a cache write (at most once per CACHE_GC_INTERVAL).
+
+    Errors are logged and never propagate into the calling pipeline.
+    """
+    if config.CACHE_GC_INTERVAL <= 0:
+        return
+    marker = str(cache_dir)
+    now = time.monotonic()
+    with _gc_lock:
+        last = _last_gc.get(marker)
+        if last is not None and now - last < config.CACHE_GC_INTERVAL:
+            return
+        _last_gc[marker] = now
+    try:
+        collect_garbage(cache_dir, image_dir)
+    except Exception as e:
+        logger.warning(f"Opportunistic cache GC failed: {e}")
+
+
+def adopt_legacy_image(image_path: Path, legacy_dir: Path = config.ASSETS_DIR) -> bool:
+    """
+    Copy an image generated before the image cache existed (assets/design_*.png).
+
+    Returns:
+        True if a legacy image was copied to image_path
+    """
+    legacy_path = legacy_dir / image_path.name
+    if not legacy_path.exists():
+        return False
+    image_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = image_path.with_suffix(".png.tmp")
+    shutil.copy2(legacy_path, tmp_path)
+    tmp_path.replace(image_path)
+    touch_file(image_path)
+    logger.info(f"Legacy image adopted into cache: {legacy_path} -> {image_path}")
+    return True
@@ -0,0 +1,371 @@
+"""
+Cache observability.
+
+Every cache lookup records a hit, miss or invalid event, and every
+produced entry records what it cost: wall time of the producing call
+(including retries) and tokens used. Both live in a small SQLite file
+next to the cache (`metrics.sqlite3`), independent of CACHE_BACKEND, so
+`main.py cache stats` can report hit ratios over a time window and the
+API seconds and tokens saved by hits. Recording never raises into the
+pipeline; CACHE_METRICS=false turns it off.
+
+Lookup events are buffered in process and written in one transaction
+every EVENT_FLUSH_SIZE events or EVENT_FLUSH_INTERVAL seconds, before
+stats are read and at exit, so a lookup (even a memory-tier hit) never
+waits for a metrics write.
+"""
+import atexit
+import json
+import logging
+import multiprocessing.util
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+import config
+from utils.cache_store import get_cache_backend, KINDS, REPORT, DESIGN_BRIEF, IMAGE_PROMPT, SIGNATURE, RESPONSE
+from utils.cache_manager import IMAGE, IMAGE_PATTERN, RENDER, RENDER_PATTERN
+from utils.schema import ReportData, DesignBrief
+from utils.migrations import upgrade
+
+logger = logging.getLogger(__name__)
+
+METRICS_DB_NAME = "metrics.sqlite3"
+
+HIT = "hit"
+MISS = "miss"
+INVALID = "invalid"
+
+# Buffered lookup events are written once this many are pending or this long after the last write
+EVENT_FLUSH_SIZE = 200
+EVENT_FLUSH_INTERVAL = 10.0
+
+_PNG_MAGIC = b"\x89PNG\r\n\x1a\n"
+_PDF_MAGIC = b"%PDF"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    ts REAL NOT NULL,
+    kind TEXT NOT NULL,
+    event TEXT NOT NULL,
+    key TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_ts ON events (ts, kind);
+CREATE TABLE IF NOT EXISTS costs (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    tokens INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (kind, key)
+) WITHOUT ROWID;
+"""
+
+_lock = threading.Lock()
+_stores: Dict[str, "CacheMetrics"] = {}
+
+
+class CacheMetrics:
+    """
+    Event and cost log of one cache directory.
+
+    Args:
+        db_path: Path to the SQLite file
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._pending: List[tuple] = []
+        self._pending_lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def record_event(self, kind: str, event: str, key: str):
+        """Log one lookup outcome (buffered, see flush)."""
+        with self._pending_lock:
+            self._pending.append((time.time(), kind, event, key))
+            due = (
+                len(self._pending) >= EVENT_FLUSH_SIZE
+                or time.monotonic() - self._flushed_at >= EVENT_FLUSH_INTERVAL
+            )
+        if due:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write the buffered events in one transaction; returns the number written."""
+        with self._pending_lock:
+            events, self._pending = self._pending, []
+            self._flushed_at = time.monotonic()
+        if not events:
+            return 0
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            conn.executemany("INSERT INTO events (ts, kind, event, key) VALUES (?, ?, ?, ?)", events)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return len(events)
+
+    def record_cost(self, kind: str, key: str, seconds: float, tokens: int):
+        """Log what producing an entry cost (replaces an earlier record)."""
+        self._conn().execute(
+            "INSERT OR REPLACE INTO costs (kind, key, seconds, tokens, created_at) VALUES (?, ?, ?, ?, ?)",
+            (kind, key, seconds, tokens, time.time())
+        )
+
+    def prune(self, older_than: float) -> int:
+        """Drop events recorded before a timestamp; returns the number removed."""
+        self.flush()
+        return self._conn().execute("DELETE FROM events WHERE ts < ?", (older_than,)).rowcount
+
+    def summary(self, since: float) -> Dict[str, dict]:
+        """
+        Per-kind lookup counters and savings since a timestamp.
+
+        Savings of a hit are the recorded cost of the entry it hit, or the
+        kind's average cost if the entry predates cost recording.
+        """
+        self.flush()
+        conn = self._conn()
+        averages = {
+            kind: (seconds, tokens, count)
+            for kind, seconds, tokens, count in conn.execute(
+                "SELECT kind, AVG(seconds), AVG(tokens), COUNT(*) FROM costs GROUP BY kind"
+            )
+        }
+        result = {}
+        rows = conn.execute(
+            "SELECT e.kind, e.event, COUNT(*), SUM(c.seconds), SUM(c.tokens), COUNT(c.key) "
+            "FROM events e LEFT JOIN costs c ON c.kind = e.kind AND c.key = e.key "
+            "WHERE e.ts >= ? GROUP BY e.kind, e.event",
+            (since,)
+        )
+        for kind, event, count, seconds, tokens, costed in rows:
+            stats = result.setdefault(kind, {HIT: 0, MISS: 0, INVALID: 0, "saved_seconds": 0.0, "saved_tokens": 0})
+            stats[event] = count
+            if event == HIT:
+                avg_seconds, avg_tokens, _ = averages.get(kind, (0.0, 0.0, 0))
+                # Hits on entries without a cost record are valued at the kind's average
+                stats["saved_seconds"] = (seconds or 0.0) + (count - costed) * (avg_seconds or 0.0)
+                stats["saved_tokens"] = int((tokens or 0) + (count - costed) * (avg_tokens or 0))
+        for kind, (avg_seconds, avg_tokens, count) in averages.items():
+            stats = result.setdefault(kind, {HIT: 0, MISS: 0, INVALID: 0, "saved_seconds": 0.0, "saved_tokens": 0})
+            stats["avg_call_seconds"] = round(avg_seconds, 3)
+            stats["avg_call_tokens"] = round(avg_tokens, 1)
+            stats["costed_entries"] = count
+        return result
+
+    def close(self):
+        self.flush()
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def get_cache_metrics(cache_dir: Path = config.CACHE_DIR) -> Optional[CacheMetrics]:
+    """Shared metrics store of a cache directory (None if CACHE_METRICS is off)."""
+    if not config.CACHE_METRICS:
+        return None
+    marker = str(Path(cache_dir).resolve())
+    with _lock:
+        store = _stores.get(marker)
+        if store is None:
+            store = _stores[marker] = CacheMetrics(Path(cache_dir) / METRICS_DB_NAME)
+        return store
+
+
+def record_event(cache_dir: Path, kind: str, event: str, key: str):
+    """Log a lookup outcome; failures are logged at DEBUG and swallowed."""
+    try:
+        store = get_cache_metrics(cache_dir)
+        if store is not None:
+            store.record_event(kind, event, key)
+    except Exception as e:
+        logger.debug(f"Could not record cache event: {e}")
+
+
+def flush_events():
+    """Write the buffered events of every metrics store (at exit, also in worker processes)."""
+    with _lock:
+        stores = list(_stores.values())
+    for store in stores:
+        try:
+            store.flush()
+        except Exception as e:
+            logger.debug(f"Could not write cache events: {e}")
+
+
+def record_cost(cache_dir: Path, kind: str, key: str, scope):
+    """
+    Log the production cost of an entry from the enclosing usage scope.
+
+    Args:
+        cache_dir: Cache directory
+        kind: Artifact kind
+        key: Entry key
+        scope: services.usage_tracker.UsageScope of the producing call (None: nothing recorded)
+    """
+    if scope is None or not scope.requests:
+        # Nothing was requested (entry reused or copied): hits are valued at the kind's average
+        return
+    try:
+        store = get_cache_metrics(cache_dir)
+        if store is not None:
+            store.record_cost(kind, key, scope.elapsed, scope.total_tokens)
+    except Exception as e:
+        logger.debug(f"Could not record cache cost: {e}")
+
+
+def _check_entry(entry) -> Optional[str]:
+    """Reason an entry would be discarded on load, or None if it is usable."""
+    try:
+        if entry.kind in (REPORT, DESIGN_BRIEF):
+            # Older schema versions are migrated on load, so they count as valid
+            data, _ = upgrade(entry.kind, json.loads(entry.value))
+            (ReportData if entry.kind == REPORT else DesignBrief)(**data)
+        elif entry.kind == IMAGE_PROMPT:
+            if not entry.value.split():
+                return "empty prompt"
+        elif entry.kind == SIGNATURE:
+            json.loads(entry.value)["signature"]
+        elif entry.kind == RESPONSE:
+            json.loads(entry.value)["raw"]
+    except json.JSONDecodeError as e:
+        return f"invalid JSON: {e}"
+    except ValidationError as e:
+        return f"schema mismatch: {e.error_count()} error(s), first: {e.errors()[0]['loc']} {e.errors()[0]['msg']}"
+    except (KeyError, TypeError, AttributeError, ValueError) as e:
+        return f"invalid structure: {e}"
+    return None
+
+
+def _file_stats(kind: str, directory: Path, pattern: str, magic: bytes, corrupt: List[dict]) -> Tuple[int, int]:
+    entries, size = 0, 0
+    if not directory.exists():
+        return entries, size
+    for path in directory.glob(pattern):
+        try:
+            stat = path.stat()
+            with open(path, "rb") as f:
+                header = f.read(len(magic))
+        except FileNotFoundError:
+            continue
+        entries += 1
+        size += stat.st_size
+        if header != magic:
+            corrupt.append({"kind": kind, "key": path.name, "error": "unexpected file header"})
+    return entries, size
+
+
+def collect_stats(
+    cache_dir: Path = config.CACHE_DIR,
+    image_dir: Path = config.IMAGE_CACHE_DIR,
+    render_dir: Path = config.RENDER_CACHE_DIR,
+    window_hours: float = 24 * 7,
+    check: bool = True
+) -> dict:
+    """
+    Gather cache statistics.
+
+    Args:
+        cache_dir: AI cache directory
+        image_dir: Generated image cache directory
+        render_dir: Rendered PDF cache directory
+        window_hours: Time window of hit/miss counters
+        check: Validate every entry and list the ones load_from_cache would discard
+
+    Returns:
+        JSON-serializable dict: artifacts (per kind), totals, corrupt entries
+    """
+    now = time.time()
+    artifacts: Dict[str, dict] = {}
+    corrupt: List[dict] = []
+
+    backend = get_cache_backend(cache_dir)
+    for kind in KINDS:
+        entries, size = 0, 0
+        for entry in backend.entries(kind, values=check):
+            entries += 1
+            size += entry.size
+            error = _check_entry(entry) if check else None
+            if error:
+                corrupt.append({"kind": kind, "key": entry.key, "error": error})
+        artifacts[kind] = {"entries": entries, "bytes": size}
+    for kind, directory, pattern, magic in (
+        (IMAGE, image_dir, IMAGE_PATTERN, _PNG_MAGIC),
+        (RENDER, render_dir, RENDER_PATTERN, _PDF_MAGIC)
+    ):
+        entries, size = _file_stats(kind, directory, pattern, magic, corrupt if check else [])
+        artifacts[kind] = {"entries": entries, "bytes": size}
+
+    store = get_cache_metrics(cache_dir)
+    summary = store.summary(now - window_hours * 3600) if store is not None else {}
+    for kind, stats in artifacts.items():
+        stats.update({HIT: 0, MISS: 0, INVALID: 0, "saved_seconds": 0.0, "saved_tokens": 0})
+        stats.update(summary.get(kind, {}))
+        lookups = stats[HIT] + stats[MISS] + stats[INVALID]
+        stats["hit_ratio"] = round(stats[HIT] / lookups, 4) if lookups else None
+        stats["saved_seconds"] = round(stats["saved_seconds"], 2)
+
+    totals = {
+        "entries": sum(stats["entries"] for stats in artifacts.values()),
+        "bytes": sum(stats["bytes"] for stats in artifacts.values()),
+        "hits": sum(stats[HIT] for stats in artifacts.values()),
+        "misses": sum(stats[MISS] for stats in artifacts.values()),
+        "saved_seconds": round(sum(stats["saved_seconds"] for stats in artifacts.values()), 2),
+        "saved_tokens": sum(stats["saved_tokens"] for stats in artifacts.values())
+    }
+    return {
+        "generated_at": now,
+        "cache_dir": str(cache_dir),
+        "backend": backend.name,
+        "window_hours": window_hours,
+        "metrics_enabled": store is not None,
+        "artifacts": artifacts,
+        "totals": totals,
+        "corrupt": corrupt
+    }
+
+
+def prune_events(cache_dir: Path = config.CACHE_DIR):
+    """Drop events older than CACHE_METRICS_RETENTION_DAYS."""
+    store = get_cache_metrics(cache_dir)
+    if store is None or config.CACHE_METRICS_RETENTION_DAYS <= 0:
+        return
+    removed = store.prune(time.time() - config.CACHE_METRICS_RETENTION_DAYS * 86400)
+    if removed:
+        logger.info(f"Pruned {removed} cache metric events")
+
+
+def _reset_after_fork():
+    """SQLite connections must not be shared with forked children."""
+    global _lock
+    _lock = threading.Lock()
+    _stores.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+atexit.register(flush_events)
+# Pool workers end with os._exit, which skips atexit but runs multiprocessing finalizers
+multiprocessing.util.Finalize(None, flush_events, exitpriority=10)
@@ -0,0 +1,121 @@
+"""
+Rebuilding cache entries from stored raw model responses.
+
+Report and design brief calls keep the raw completion next to the
+validated entry (see ai_processor.save_raw_response). After a field is
+added to ReportData/DesignBrief or a validator is loosened, the response
+parsers are re-run over those completions and every entry whose parsed
+value changed is rewritten - including entries the old schema rejected -
+without a single API call. Entries without a stored response are only
+counted; they need a new request (e.g. `main.py cache warm`).
+"""
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+import config
+from utils.cache_store import get_cache_backend, response_key, split_response_key, REPORT, DESIGN_BRIEF, RESPONSE
+from utils.ai_processor import parse_and_validate_response, parse_and_validate_design_response
+from utils.migrations import stamped_value
+
+logger = logging.getLogger(__name__)
+
+PARSERS = {
+    REPORT: parse_and_validate_response,
+    DESIGN_BRIEF: parse_and_validate_design_response
+}
+
+# Outcome counters
+UPDATED = "updated"
+UNCHANGED = "unchanged"
+INVALID = "invalid"
+WITHOUT_RAW = "without_raw"
+
+
+class ReparseResult:
+    """Outcome of a reparse run."""
+
+    def __init__(self, kinds: Tuple[str, ...]):
+        self.counts: Dict[str, Dict[str, int]] = {
+            kind: {UPDATED: 0, UNCHANGED: 0, INVALID: 0, WITHOUT_RAW: 0} for kind in kinds
+        }
+        self.invalid: List[dict] = []
+
+    def total(self, outcome: str) -> int:
+        return sum(counts[outcome] for counts in self.counts.values())
+
+
+def _same_value(stored: str, value: str) -> bool:
+    try:
+        return json.loads(stored) == json.loads(value)
+    except json.JSONDecodeError:
+        return False
+
+
+def reparse_cache(
+    cache_dir: Path = config.CACHE_DIR,
+    kinds: Optional[Tuple[str, ...]] = None,
+    dry_run: bool = False
+) -> ReparseResult:
+    """
+    Rebuild report/design brief entries from their raw responses.
+
+    Args:
+        cache_dir: AI cache directory
+        kinds: Artifact kinds to rebuild (default: all of PARSERS)
+        dry_run: Only count what would change
+
+    Returns:
+        ReparseResult with per-kind counters and the responses that still fail validation
+    """
+    kinds = tuple(kinds or PARSERS)
+    result = ReparseResult(kinds)
+    backend = get_cache_backend(cache_dir)
+
+    for entry in backend.entries(RESPONSE):
+        kind, key = split_response_key(entry.key)
+        if kind not in kinds:
+            continue
+        try:
+            record = json.loads(entry.value)
+            data = PARSERS[kind](record["raw"])
+        except (json.JSONDecodeError, ValidationError, KeyError, TypeError) as e:
+            result.counts[kind][INVALID] += 1
+            result.invalid.append({"kind": kind, "key": key, "error": str(e).splitlines()[0]})
+            logger.warning(f"Raw response {kind}/{key[:8]}... still fails validation: {e}")
+            continue
+
+        value = stamped_value(kind, data.model_dump(), record.get("prompt_version"))
+        current = backend.get(kind, key)
+        if current is not None and _same_value(current.value, value):
+            result.counts[kind][UNCHANGED] += 1
+            continue
+
+        result.counts[kind][UPDATED] += 1
+        if dry_run:
+            continue
+        meta = {
+            **(current.meta if current is not None else {}),
+            "normalization": record.get("normalization"),
+            "model": record.get("model"),
+            "reparsed_at": time.time()
+        }
+        # The memory tier revalidates by version token, so a plain put is enough
+        backend.put(kind, key, value, meta=meta)
+        logger.info(f"Rebuilt {kind}/{key[:8]}... from raw response")
+
+    for kind in kinds:
+        for entry in backend.entries(kind, values=False):
+            if not backend.contains(RESPONSE, response_key(kind, entry.key)):
+                result.counts[kind][WITHOUT_RAW] += 1
+
+    logger.info(
+        f"Cache reparse{' (dry run)' if dry_run else ''}: {result.total(UPDATED)} updated, "
+        f"{result.total(UNCHANGED)} unchanged, {result.total(INVALID)} invalid, "
+        f"{result.total(WITHOUT_RAW)} without raw response"
+    )
+    return result
@@ -0,0 +1,527 @@
+"""
+Pluggable storage for cached AI artifacts.
+
+Entries are addressed by (kind, key), where kind is one of the artifact
+types below and key is the SHA256 hash the artifact was derived from.
+
+Backends:
+    sqlite  one WAL-mode SQLite file per cache directory (default):
+            indexed keys, transactional writes, concurrent readers
+    files   legacy layout, one file per entry in a flat directory
+"""
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import config
+from utils.io import get_cache_path
+
+logger = logging.getLogger(__name__)
+
+REPORT = "report"
+DESIGN_BRIEF = "design_brief"
+IMAGE_PROMPT = "image_prompt"
+SIGNATURE = "signature"
+RESPONSE = "response"
+KINDS = (REPORT, DESIGN_BRIEF, IMAGE_PROMPT, SIGNATURE, RESPONSE)
+
+SQLITE_DB_NAME = "cache.sqlite3"
+# accessed_at is refreshed at most this often per entry (keeps reads write-free)
+ACCESS_TOUCH_INTERVAL = 60.0
+# Entries whose last touch() is remembered per backend before the record is reset
+_TOUCHED_MAX = 10000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    meta TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL,
+    PRIMARY KEY (kind, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (kind, accessed_at);
+"""
+
+
+def response_key(kind: str, key: str) -> str:
+    """Key of the raw model response a `kind` entry was parsed from."""
+    return f"{kind}.{key}"
+
+
+def split_response_key(key: str) -> Tuple[str, str]:
+    """Inverse of response_key: (artifact kind, artifact key)."""
+    kind, _, artifact_key = key.partition(".")
+    return kind, artifact_key
+
+
+class CacheEntry:
+    """A cached artifact with its bookkeeping fields."""
+
+    def __init__(
+        self,
+        kind: str,
+        key: str,
+        value: str,
+        meta: Optional[dict] = None,
+        created_at: float = 0.0,
+        accessed_at: float = 0.0,
+        size: int = 0
+    ):
+        self.kind = kind
+        self.key = key
+        self.value = value
+        self.meta = meta or {}
+        self.created_at = created_at
+        self.accessed_at = accessed_at
+        self.size = size
+
+
+class CacheBackend:
+    """Interface of cache storage backends."""
+
+    name = "base"
+
+    def __init__(self):
+        self._touched: Dict[Tuple[str, str], float] = {}
+        self._touch_lock = threading.Lock()
+
+    def get(self, kind: str, key: str) -> Optional[CacheEntry]:
+        """Return the entry or None on a miss."""
+        raise NotImplementedError
+
+    def put(self, kind: str, key: str, value: str, meta: Optional[dict] = None, created_at: Optional[float] = None):
+        """
+        Insert or replace an entry.
+
+        created_at is the time the artifact was produced (shown as the date
+        of reports); None keeps the existing entry's time on a rewrite and
+        uses the current time for a new entry.
+        """
+        raise NotImplementedError
+
+    def contains(self, kind: str, key: str) -> bool:
+        """True if the entry exists (without reading its value)."""
+        raise NotImplementedError
+
+    def version(self, kind: str, key: str) -> Optional[tuple]:
+        """Cheap token that changes whenever the entry is rewritten (None if missing)."""
+        raise NotImplementedError
+
+    def created_at(self, kind: str, key: str) -> Optional[float]:
+        """Time the entry was last written (None if missing)."""
+        entry = self.get(kind, key)
+        return entry.created_at if entry is not None else None
+
+    def touch(self, kind: str, key: str):
+        """
+        Mark an entry as recently used without reading it.
+
+        Used for hits served from the memory tier, which never call get().
+        At most one refresh per entry and ACCESS_TOUCH_INTERVAL per process;
+        failures are logged and ignored.
+        """
+        now = time.time()
+        with self._touch_lock:
+            last = self._touched.get((kind, key))
+            if last is not None and now - last <= ACCESS_TOUCH_INTERVAL:
+                return
+            if len(self._touched) >= _TOUCHED_MAX:
+                self._touched.clear()
+            self._touched[(kind, key)] = now
+        try:
+            self._touch(kind, key, now)
+        except (OSError, sqlite3.Error) as e:
+            # A missed refresh only makes eviction slightly less accurate
+            logger.debug(f"Could not refresh access time of {kind}/{key[:8]}...: {e}")
+
+    def _touch(self, kind: str, key: str, now: float):
+        """Refresh the entry's access time (backend-specific part of touch)."""
+
+    def delete(self, kind: str, key: str) -> bool:
+        """Remove an entry; returns False if it did not exist."""
+        raise NotImplementedError
+
+    def entries(self, kind: Optional[str] = None, values: bool = True) -> Iterator[CacheEntry]:
+        """
+        Iterate over all entries (optionally of one kind).
+
+        Args:
+            kind: Restrict to one artifact kind
+            values: Load entry values (False: bookkeeping fields only, value is None)
+        """
+        raise NotImplementedError
+
+    def delete_many(self, kind: str, keys: List[str]) -> int:
+        """Remove several entries; returns the number removed."""
+        return sum(1 for key in keys if self.delete(kind, key))
+
+    def close(self):
+        """Release resources held by the backend."""
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Cache entries in one SQLite database (WAL mode).
+
+    Connections are kept per thread; readers never block each other or the
+    writer, and every write is a single short transaction.
+
+    Args:
+        db_path: Path to the SQLite file
+    """
+
+    name = "sqlite"
+
+    def __init__(self, db_path: Path):
+        super().__init__()
+        self.db_path = db_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        if "updated_at" not in [row["name"] for row in conn.execute("PRAGMA table_info(entries)")]:
+            # Databases created before rewrites kept created_at
+            conn.execute("ALTER TABLE entries ADD COLUMN updated_at REAL")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _entry(row: sqlite3.Row) -> CacheEntry:
+        return CacheEntry(
+            row["kind"],
+            row["key"],
+            row["value"],
+            json.loads(row["meta"]) if row["meta"] else None,
+            row["created_at"],
+            row["accessed_at"],
+            row["size"]
+        )
+
+    def get(self, kind: str, key: str) -> Optional[CacheEntry]:
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT * FROM entries WHERE kind = ? AND key = ?", (kind, key)
+        ).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if now - row["accessed_at"] > ACCESS_TOUCH_INTERVAL:
+            conn.execute(
+                "UPDATE entries SET accessed_at = ? WHERE kind = ? AND key = ?", (now, kind, key)
+            )
+        return self._entry(row)
+
+    def _touch(self, kind: str, key: str, now: float):
+        self._conn().execute(
+            "UPDATE entries SET accessed_at = ? WHERE kind = ? AND key = ? AND accessed_at < ?",
+            (now, kind, key, now - ACCESS_TOUCH_INTERVAL)
+        )
+
+    def put(self, kind: str, key: str, value: str, meta: Optional[dict] = None, created_at: Optional[float] = None):
+        now = time.time()
+        # An upsert rather than INSERT OR REPLACE: rewrites (migrations, reparse) keep created_at
+        self._conn().execute(
+            "INSERT INTO entries (kind, key, value, meta, created_at, updated_at, accessed_at, size) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (kind, key) DO UPDATE SET value = excluded.value, meta = excluded.meta, "
+            "updated_at = excluded.updated_at, accessed_at = excluded.accessed_at, size = excluded.size"
+            + (", created_at = excluded.created_at" if created_at is not None else ""),
+            (
+                kind,
+                key,
+                value,
+                json.dumps(meta, ensure_ascii=False) if meta else None,
+                created_at if created_at is not None else now,
+                now,
+                now,
+                len(value.encode("utf-8"))
+            )
+        )
+
+    def contains(self, kind: str, key: str) -> bool:
+        row = self._conn().execute(
+            "SELECT 1 FROM entries WHERE kind = ? AND key = ?", (kind, key)
+        ).fetchone()
+        return row is not None
+
+    def version(self, kind: str, key: str) -> Optional[tuple]:
+        row = self._conn().execute(
+            "SELECT COALESCE(updated_at, created_at) AS written_at, size FROM entries WHERE kind = ? AND key = ?",
+            (kind, key)
+        ).fetchone()
+        return (row["written_at"], row["size"]) if row is not None else None
+
+    def created_at(self, kind: str, key: str) -> Optional[float]:
+        row = self._conn().execute(
+            "SELECT created_at FROM entries WHERE kind = ? AND key = ?", (kind, key)
+        ).fetchone()
+        return row["created_at"] if row is not None else None
+
+    def delete(self, kind: str, key: str) -> bool:
+        cursor = self._conn().execute("DELETE FROM entries WHERE kind = ? AND key = ?", (kind, key))
+        return cursor.rowcount == 1
+
+    def entries(self, kind: Optional[str] = None, values: bool = True) -> Iterator[CacheEntry]:
+        columns = "*" if values else "kind, key, NULL AS value, meta, created_at, accessed_at, size"
+        if kind is None:
+            rows = self._conn().execute(f"SELECT {columns} FROM entries ORDER BY kind, key")
+        else:
+            rows = self._conn().execute(f"SELECT {columns} FROM entries WHERE kind = ? ORDER BY key", (kind,))
+        for row in rows.fetchall():
+            yield self._entry(row)
+
+    def delete_many(self, kind: str, keys: List[str]) -> int:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            removed = 0
+            for key in keys:
+                removed += conn.execute("DELETE FROM entries WHERE kind = ? AND key = ?", (kind, key)).rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return removed
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class FileCacheBackend(CacheBackend):
+    """
+    Legacy layout: one file per entry in a flat directory.
+
+        report        <hash>.json
+        design_brief  design_brief_<hash>.json
+        image_prompt  image_prompt_<hash>.txt
+        signature     signature_<hash>.json
+        response      response_<kind>.<hash>.json
+
+    Metadata is not stored; timestamps and size come from the file system,
+    so created_at is the file's mtime and every rewrite resets it.
+
+    Args:
+        cache_dir: Cache directory
+    """
+
+    name = "files"
+
+    def __init__(self, cache_dir: Path):
+        super().__init__()
+        self.cache_dir = cache_dir
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def path(self, kind: str, key: str) -> Path:
+        """File path of an entry."""
+        if kind == REPORT:
+            return get_cache_path(key, self.cache_dir)
+        if kind == DESIGN_BRIEF:
+            return self.cache_dir / f"design_brief_{key}.json"
+        if kind == IMAGE_PROMPT:
+            return self.cache_dir / f"image_prompt_{key}.txt"
+        if kind == SIGNATURE:
+            return self.cache_dir / f"signature_{key}.json"
+        if kind == RESPONSE:
+            return self.cache_dir / f"response_{key}.json"
+        raise ValueError(f"Unknown cache kind: {kind}")
+
+    @staticmethod
+    def _parse_name(name: str) -> Optional[Tuple[str, str]]:
+        if name.startswith("design_brief_") and name.endswith(".json"):
+            return DESIGN_BRIEF, name[len("design_brief_"):-len(".json")]
+        if name.startswith("image_prompt_") and name.endswith(".txt"):
+            return IMAGE_PROMPT, name[len("image_prompt_"):-len(".txt")]
+        if name.startswith("signature_") and name.endswith(".json"):
+            return SIGNATURE, name[len("signature_"):-len(".json")]
+        if name.startswith("response_") and name.endswith(".json"):
+            return RESPONSE, name[len("response_"):-len(".json")]
+        if name.endswith(".json") and len(name) == 64 + len(".json"):
+            return REPORT, name[:-len(".json")]
+        return None
+
+    def _entry(self, kind: str, key: str, path: Path, values: bool = True) -> CacheEntry:
+        stat = path.stat()
+        return CacheEntry(
+            kind,
+            key,
+            path.read_text(encoding="utf-8") if values else None,
+            None,
+            stat.st_mtime,
+            stat.st_atime,
+            stat.st_size
+        )
+
+    def get(self, kind: str, key: str) -> Optional[CacheEntry]:
+        path = self.path(kind, key)
+        try:
+            return self._entry(kind, key, path)
+        except FileNotFoundError:
+            return None
+
+    def _touch(self, kind: str, key: str, now: float):
+        # atime only: mtime is part of the version token
+        path = self.path(kind, key)
+        os.utime(path, ns=(int(now * 1e9), path.stat().st_mtime_ns))
+
+    def put(self, kind: str, key: str, value: str, meta: Optional[dict] = None, created_at: Optional[float] = None):
+        path = self.path(kind, key)
+        with tempfile.NamedTemporaryFile(
+            mode="w",
+            encoding="utf-8",
+            dir=self.cache_dir,
+            delete=False,
+            suffix=".tmp"
+        ) as tmp_file:
+            tmp_file.write(value)
+            tmp_path = Path(tmp_file.name)
+        if created_at is not None:
+            os.utime(tmp_path, (time.time(), created_at))
+        tmp_path.replace(path)
+
+    def contains(self, kind: str, key: str) -> bool:
+        return self.path(kind, key).exists()
+
+    def version(self, kind: str, key: str) -> Optional[tuple]:
+        try:
+            stat = self.path(kind, key).stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def created_at(self, kind: str, key: str) -> Optional[float]:
+        try:
+            return self.path(kind, key).stat().st_mtime
+        except FileNotFoundError:
+            return None
+
+    def delete(self, kind: str, key: str) -> bool:
+        try:
+            self.path(kind, key).unlink()
+            return True
+        except FileNotFoundError:
+            return False
+
+    def entries(self, kind: Optional[str] = None, values: bool = True) -> Iterator[CacheEntry]:
+        for path in sorted(self.cache_dir.iterdir()):
+            parsed = self._parse_name(path.name)
+            if parsed is None or (kind is not None and parsed[0] != kind):
+                continue
+            try:
+                yield self._entry(parsed[0], parsed[1], path, values)
+            except FileNotFoundError:
+                continue
+
+
+BACKENDS = {
+    SQLiteCacheBackend.name: lambda cache_dir: SQLiteCacheBackend(cache_dir / SQLITE_DB_NAME),
+    FileCacheBackend.name: FileCacheBackend
+}
+
+_lock = threading.Lock()
+_backends: Dict[Tuple[str, str], CacheBackend] = {}
+
+
+def get_cache_backend(cache_dir: Path, name: Optional[str] = None) -> CacheBackend:
+    """
+    Return the shared backend for a cache directory.
+
+    Args:
+        cache_dir: Cache directory
+        name: Backend name (default: config.CACHE_BACKEND)
+
+    Returns:
+        CacheBackend instance (one per directory and backend per process)
+    """
+    name = name or config.CACHE_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown cache backend '{name}' (choose from {sorted(BACKENDS)})")
+    registry_key = (name, str(Path(cache_dir).resolve()))
+    with _lock:
+        backend = _backends.get(registry_key)
+        if backend is None:
+            backend = BACKENDS[name](Path(cache_dir))
+            _backends[registry_key] = backend
+            logger.debug(f"Cache backend '{name}' opened for {cache_dir}")
+        return backend
+
+
+def migrate_cache(
+    cache_dir: Path,
+    source: str = FileCacheBackend.name,
+    target: str = SQLiteCacheBackend.name,
+    remove_source: bool = False
+) -> Dict[str, int]:
+    """
+    Copy every entry of one backend into another.
+
+    Entries already present in the target are kept; JSON entries that do
+    not parse are skipped. Migrated entries keep their created_at.
+
+    Args:
+        cache_dir: Cache directory
+        source: Backend to read from
+        target: Backend to write to
+        remove_source: Delete migrated entries from the source
+
+    Returns:
+        Counters: migrated, skipped, invalid
+    """
+    if source == target:
+        raise ValueError("Source and target backends must differ")
+    src = get_cache_backend(cache_dir, source)
+    dst = get_cache_backend(cache_dir, target)
+    stats = {"migrated": 0, "skipped": 0, "invalid": 0}
+
+    for entry in src.entries():
+        if dst.contains(entry.kind, entry.key):
+            stats["skipped"] += 1
+        else:
+            if entry.kind in (REPORT, DESIGN_BRIEF, SIGNATURE):
+                try:
+                    json.loads(entry.value)
+                except json.JSONDecodeError as e:
+                    logger.warning(f"Skipping invalid {entry.kind} entry {entry.key[:8]}...: {e}")
+                    stats["invalid"] += 1
+                    continue
+            dst.put(entry.kind, entry.key, entry.value, entry.meta, created_at=entry.created_at)
+            stats["migrated"] += 1
+        if remove_source:
+            src.delete(entry.kind, entry.key)
+
+    logger.info(
+        f"Cache migration {source} -> {target}: {stats['migrated']} migrated, "
+        f"{stats['skipped']} already present, {stats['invalid']} invalid"
+    )
+    return stats
+
+
+def _reset_after_fork():
+    """SQLite connections must not be shared with forked children."""
+    global _lock
+    _lock = threading.Lock()
+    _backends.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,216 @@
+"""
+Cache warming for transcript directories.
+
+Analyzes every transcript that has no cache entry yet, so later CLI runs,
+batches and server requests for them are served from the cache. Misses
+are filled by concurrent async AI calls; a token budget stops new calls
+once the tokens already spent plus the projection of the calls in flight
+would exceed it.
+"""
+import asyncio
+import logging
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import config
+from utils.io import read_text_file
+from utils.cache_store import get_cache_backend, REPORT, DESIGN_BRIEF
+from utils.normalize import transcript_cache_key, legacy_cache_key
+from utils.ai_processor import (
+    build_report_messages,
+    build_design_brief_messages,
+    build_image_prompt_messages,
+    async_process_dialog_with_ai,
+    async_extract_design_brief,
+    async_make_image_prompt_from_brief
+)
+from services.openai_client import async_generate_image, set_async_concurrency
+from services.rate_limiter import estimate_tokens
+from services.usage_tracker import get_usage_tracker
+
+logger = logging.getLogger(__name__)
+
+# Item statuses
+CACHED = "cached"
+DUPLICATE = "duplicate"
+WARMED = "warmed"
+FAILED = "failed"
+OVER_BUDGET = "over_budget"
+PLANNED = "planned"
+
+
+class WarmItem:
+    """One transcript of a warm run."""
+
+    def __init__(self, path: Path, text: str, key: str, projected_tokens: int):
+        self.path = path
+        self.text = text
+        self.key = key
+        self.projected_tokens = projected_tokens
+        self.status = PLANNED
+        self.error: Optional[str] = None
+
+
+class WarmResult:
+    """Outcome of a warm run."""
+
+    def __init__(self, items: List[WarmItem]):
+        self.items = items
+        self.actual: Dict[str, int] = {}
+        self.elapsed = 0.0
+
+    def count(self, status: str) -> int:
+        return sum(1 for item in self.items if item.status == status)
+
+    @property
+    def projected_tokens(self) -> int:
+        """Projected spend of all cache misses."""
+        return sum(item.projected_tokens for item in self.items if item.status not in (CACHED, DUPLICATE))
+
+
+def project_tokens(text: str, report_type: str) -> int:
+    """Estimated tokens (prompt + expected completion) to analyze one transcript."""
+    if report_type == 'design':
+        # Brief plus the image prompt built from it
+        return estimate_tokens(build_design_brief_messages(text)) + estimate_tokens(build_image_prompt_messages(""))
+    return estimate_tokens(build_report_messages(text))
+
+
+def plan_warm(paths: List[Path], report_type: str = 'client', cache_dir: Path = config.CACHE_DIR) -> List[WarmItem]:
+    """
+    Read transcripts and mark those already cached.
+
+    Args:
+        paths: Transcript files
+        report_type: 'client' or 'design'
+        cache_dir: AI cache directory
+
+    Returns:
+        WarmItem per file (status cached, duplicate or planned)
+    """
+    backend = get_cache_backend(cache_dir)
+    kind = DESIGN_BRIEF if report_type == 'design' else REPORT
+    items, seen = [], set()
+    for path in paths:
+        text = read_text_file(path)
+        key = transcript_cache_key(text)
+        item = WarmItem(path, text, key, project_tokens(text, report_type))
+        if key in seen:
+            item.status = DUPLICATE
+        elif backend.contains(kind, key) or backend.contains(kind, legacy_cache_key(text) or key):
+            item.status = CACHED
+        seen.add(key)
+        items.append(item)
+    return items
+
+
+async def _warm_item(item: WarmItem, report_type: str, cache_dir: Path, images: bool):
+    if report_type == 'design':
+        brief = await async_extract_design_brief(
+            text=item.text,
+            model=config.OPENAI_MODEL,
+            api_key=config.OPENAI_API_KEY,
+            cache_dir=cache_dir
+        )
+        prompt = await async_make_image_prompt_from_brief(
+            brief=brief,
+            model=config.OPENAI_MODEL,
+            api_key=config.OPENAI_API_KEY,
+            cache_dir=cache_dir
+        )
+        if images:
+            await async_generate_image(prompt)
+    else:
+        await async_process_dialog_with_ai(
+            text=item.text,
+            model=config.OPENAI_MODEL,
+            temperature=config.AI_TEMPERATURE,
+            api_key=config.OPENAI_API_KEY,
+            cache_dir=cache_dir
+        )
+
+
+async def async_warm_cache(
+    items: List[WarmItem],
+    report_type: str = 'client',
+    cache_dir: Path = config.CACHE_DIR,
+    concurrency: int = config.AI_MAX_CONCURRENCY,
+    max_tokens: int = 0,
+    images: bool = False
+) -> WarmResult:
+    """
+    Fill the cache for planned items.
+
+    Args:
+        items: Output of plan_warm
+        report_type: 'client' or 'design'
+        cache_dir: AI cache directory
+        concurrency: Max transcripts analyzed at once; also the ceiling of the
+            async request semaphore and the rate limiters, so it is the effective limit
+        max_tokens: Token budget of the run (0 = unlimited)
+        images: Also generate design images (not covered by the token budget)
+
+    Returns:
+        WarmResult with per-item statuses and the actual usage
+    """
+    result = WarmResult(items)
+    tracker = get_usage_tracker()
+    start_usage = tracker.snapshot()
+    started = time.monotonic()
+    concurrency = max(1, concurrency)
+    set_async_concurrency(concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    budget = asyncio.Condition()
+    in_flight = {"tokens": 0}
+
+    def spent() -> int:
+        return tracker.snapshot()["total_tokens"] - start_usage["total_tokens"]
+
+    async def reserve(item: WarmItem) -> bool:
+        async with budget:
+            # Over budget only because of reservations: wait for real usage of calls in flight
+            while max_tokens and spent() + in_flight["tokens"] + item.projected_tokens > max_tokens:
+                if not in_flight["tokens"]:
+                    return False
+                await budget.wait()
+            in_flight["tokens"] += item.projected_tokens
+            return True
+
+    async def release(item: WarmItem):
+        async with budget:
+            in_flight["tokens"] -= item.projected_tokens
+            budget.notify_all()
+
+    async def run(item: WarmItem):
+        async with semaphore:
+            if not await reserve(item):
+                item.status = OVER_BUDGET
+                logger.info(f"Cache warm: token budget reached, skipping {item.path}")
+                return
+            try:
+                await _warm_item(item, report_type, cache_dir, images)
+                item.status = WARMED
+            except Exception as e:
+                item.status = FAILED
+                item.error = str(e)
+                logger.error(f"Cache warm failed for {item.path}: {e}", exc_info=True)
+            finally:
+                await release(item)
+
+    await asyncio.gather(*(run(item) for item in items if item.status == PLANNED))
+
+    end_usage = tracker.snapshot()
+    result.actual = {name: end_usage[name] - start_usage[name] for name in end_usage}
+    result.elapsed = time.monotonic() - started
+    logger.info(
+        f"Cache warm: {result.count(WARMED)} warmed, {result.count(CACHED)} cached, "
+        f"{result.count(FAILED)} failed, {result.count(OVER_BUDGET)} over budget; "
+        f"tokens projected {result.projected_tokens}, actual {result.actual['total_tokens']}"
+    )
+    return result
+
+
+def warm_cache(items: List[WarmItem], **kwargs) -> WarmResult:
+    """Blocking wrapper around async_warm_cache."""
+    return asyncio.run(async_warm_cache(items, **kwargs))
@@ -0,0 +1,127 @@
+"""
+HTML rendering of reports.
+
+Renders ReportData/DesignBrief through the Jinja2 templates. Kept apart
+from utils.pdf_generator so that HTML and JSON outputs never import
+WeasyPrint; pdf_generator re-exports these functions.
+"""
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Union
+
+from jinja2 import Environment, TemplateNotFound, TemplateSyntaxError
+
+from utils.schema import ReportData, DesignBrief
+from utils.template_env import get_template
+
+logger = logging.getLogger(__name__)
+
+
+def load_css_content(css_path: Path) -> str:
+    """
+    Read stylesheet text for inlining into the template.
+    
+    Args:
+        css_path: Path to CSS file
+        
+    Returns:
+        CSS text, or an empty string if the file does not exist
+    """
+    if not css_path.exists():
+        logger.warning(f"CSS file not found: {css_path}")
+        return ""
+    with open(css_path, 'r', encoding='utf-8') as f:
+        css_content = f.read()
+    logger.debug(f"Loaded CSS from {css_path}")
+    return css_content
+
+
+def template_context(
+    report_data: Union[ReportData, DesignBrief],
+    generation_date: Optional[str],
+    transcript_filename: str,
+    css_content: str,
+    image_uri: Optional[str],
+    image_failed: bool
+) -> dict:
+    """Context of the report templates (shared by single and combined documents)."""
+    return {
+        'report_data': report_data,
+        'generation_date': generation_date or datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'transcript_filename': transcript_filename,
+        'css_content': css_content,
+        'image_uri': image_uri,
+        'image_failed': image_failed
+    }
+
+
+def render_html(
+    report_data: Union[ReportData, DesignBrief],
+    template_path: Path,
+    css_path: Path,
+    transcript_filename: str = "transcript.txt",
+    image_uri: Optional[str] = None,
+    image_failed: bool = False,
+    env: Optional[Environment] = None,
+    css_content: Optional[str] = None,
+    generation_date: Optional[str] = None,
+    inline_css: bool = True
+) -> str:
+    """
+    Render HTML from Jinja2 template.
+    
+    Args:
+        report_data: Report data to render
+        template_path: Path to HTML template file
+        css_path: Path to CSS file
+        transcript_filename: Name of source transcript file
+        env: Jinja2 environment to load the template from (default: the shared,
+            compiled-once environment of the template directory, see utils.template_env)
+        css_content: Preloaded stylesheet text (read from css_path if omitted)
+        generation_date: Date shown in the report (default: now); fixing it makes
+            the output reproducible byte for byte
+        inline_css: Inline the stylesheet into the <style> block; pass False when it is
+            applied by html_to_pdf(stylesheets=...) instead
+        
+    Returns:
+        Rendered HTML as string
+        
+    Raises:
+        TemplateNotFound: If template file doesn't exist
+        TemplateSyntaxError: If template has syntax errors
+    """
+    try:
+        logger.info(f"Rendering HTML from template: {template_path}")
+        
+        # Load CSS content
+        if not inline_css:
+            css_content = ""
+        elif css_content is None:
+            css_content = load_css_content(css_path)
+        
+        # Load template (compiled once per process)
+        template = env.get_template(template_path.name) if env is not None else get_template(template_path)
+        
+        # Prepare template context
+        context = template_context(
+            report_data, generation_date, transcript_filename, css_content, image_uri, image_failed
+        )
+        
+        # Render
+        html = template.render(**context)
+        logger.info("HTML rendered successfully")
+        
+        return html
+        
+    except TemplateNotFound as e:
+        logger.error(f"Template not found: {e}")
+        raise Exception(f"Template file not found: {template_path}")
+        
+    except TemplateSyntaxError as e:
+        logger.error(f"Template syntax error: {e}")
+        raise Exception(f"Template syntax error in {template_path}: {e}")
+        
+    except Exception as e:
+        logger.error(f"Error rendering template: {e}", exc_info=True)
+        raise
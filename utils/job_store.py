@@ -0,0 +1,401 @@
+"""
+Persistent job store for batch runs.
+
+Tracks every transcript of a batch through the stages
+read -> analyzed -> image -> rendered in a SQLite file, so an interrupted
+run can resume where it stopped. Several worker processes on one machine
+may pull jobs from the same store: a job is leased to one owner at a time
+and becomes claimable again if the lease expires (e.g. the worker died).
+"""
+import json
+import logging
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("pending", "read", "analyzed", "image", "rendered")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    batch TEXT NOT NULL,
+    input_path TEXT NOT NULL,
+    report_type TEXT NOT NULL,
+    output_path TEXT NOT NULL,
+    text_hash TEXT,
+    stage TEXT NOT NULL DEFAULT 'pending',
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    failed_stage TEXT,
+    report_json TEXT,
+    image_uri TEXT,
+    image_failed INTEGER NOT NULL DEFAULT 0,
+    output_signature TEXT,
+    outputs TEXT,
+    analyzed_at REAL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    updated_at REAL NOT NULL,
+    UNIQUE (batch, input_path, report_type)
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs (batch, status, lease_expires);
+"""
+# Columns added after the first release of the table (name -> declaration)
+_ADDED_COLUMNS = {
+    "output_signature": "TEXT",
+    "outputs": "TEXT",
+    "analyzed_at": "REAL"
+}
+
+
+def _table_columns(conn: sqlite3.Connection) -> List[str]:
+    return [row["name"] for row in conn.execute("PRAGMA table_info(jobs)")]
+
+
+def load_outputs(value: Optional[str], output_path: Path, rendered: bool) -> Dict[str, str]:
+    """Written outputs of a job (format -> file); jobs rendered before formats existed wrote only the PDF."""
+    if value is None:
+        return {"pdf": str(output_path)} if rendered else {}
+    return json.loads(value)
+
+
+def stage_index(stage: str) -> int:
+    """Position of a stage in the pipeline (higher = further along)."""
+    return STAGES.index(stage)
+
+
+def make_owner_id() -> str:
+    """Unique lease owner id for this worker process."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class Job:
+    """A row of the jobs table."""
+
+    def __init__(self, row: sqlite3.Row):
+        self.id = row["id"]
+        self.batch = row["batch"]
+        self.input_path = Path(row["input_path"])
+        self.report_type = row["report_type"]
+        self.output_path = Path(row["output_path"])
+        self.text_hash = row["text_hash"]
+        self.stage = row["stage"]
+        self.status = row["status"]
+        self.attempts = row["attempts"]
+        self.last_error = row["last_error"]
+        self.failed_stage = row["failed_stage"]
+        self.report_json = row["report_json"]
+        self.image_uri = row["image_uri"]
+        self.image_failed = bool(row["image_failed"])
+        self.outputs = load_outputs(row["outputs"], self.output_path, self.stage == 'rendered')
+        # Time of the analysis the reports show as their generation date
+        self.analyzed_at: Optional[float] = row["analyzed_at"]
+
+    def reached(self, stage: str) -> bool:
+        """True if the job has already completed `stage`."""
+        return stage_index(self.stage) >= stage_index(stage)
+
+
+class JobStore:
+    """
+    SQLite-backed job queue with leases.
+
+    Every method opens its own short-lived connection, so one JobStore may be
+    used from several threads; cross-process safety comes from SQLite locking
+    (claims run inside BEGIN IMMEDIATE transactions).
+
+    Args:
+        db_path: Path to the SQLite file
+        lease_seconds: How long a claimed job stays reserved without progress
+        max_attempts: Jobs that failed this many times are not claimed again
+    """
+
+    def __init__(self, db_path: Path, lease_seconds: float = 600.0, max_attempts: int = 3):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+        self._migrate_schema()
+
+    def _migrate_schema(self):
+        """Bring a store created by an older release to the current table layout."""
+        with self._transaction() as conn:
+            table_sql = conn.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'jobs'"
+            ).fetchone()["sql"]
+            columns = _table_columns(conn)
+            if "UNIQUE (batch, input_path, report_type)" not in table_sql:
+                # Jobs used to be unique per file across all batches: rebuild with the per-batch key
+                conn.execute("DROP INDEX IF EXISTS idx_jobs_claim")
+                conn.execute("ALTER TABLE jobs RENAME TO jobs_old")
+                for statement in _SCHEMA.split(";"):
+                    if statement.strip():
+                        conn.execute(statement)
+                copied = ", ".join(name for name in columns if name in _table_columns(conn))
+                conn.execute(f"INSERT INTO jobs ({copied}) SELECT {copied} FROM jobs_old")
+                conn.execute("DROP TABLE jobs_old")
+                logger.info(f"Job store {self.db_path} migrated to per-batch job keys")
+                return
+            for name, declaration in _ADDED_COLUMNS.items():
+                if name not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {declaration}")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def register(
+        self,
+        batch: str,
+        inputs: List[Path],
+        report_type: str,
+        output_paths: List[Path],
+        text_hashes: Optional[List[Optional[str]]] = None,
+        output_signature: Optional[str] = None,
+        formats: Iterable[str] = ()
+    ):
+        """
+        Add transcripts to a batch, keeping the progress of known jobs.
+
+        Failed jobs below max_attempts are reset to pending so a restarted
+        run retries them; completed stages are kept. Done and failed jobs
+        (whatever their attempts) are put back to pending with their attempts
+        reset if their transcript changed (the analysis is redone). Done jobs
+        are also requeued if they were produced with another output signature
+        or if a requested format was never written for them (only the outputs
+        are redone).
+
+        Args:
+            batch: Batch label (groups jobs of one input directory/pattern)
+            inputs: Transcript paths
+            report_type: 'client' or 'design'
+            output_paths: Target PDF path per input (used for new jobs only)
+            text_hashes: Current transcript hash per input (None = unknown, not compared)
+            output_signature: Signature of the template and stylesheet
+                (see utils.batch.output_signature)
+            formats: Requested output formats
+        """
+        now = time.time()
+        text_hashes = text_hashes or [None] * len(inputs)
+        with self._transaction() as conn:
+            for input_path, output_path, text_hash in zip(inputs, output_paths, text_hashes):
+                conn.execute(
+                    "INSERT OR IGNORE INTO jobs (batch, input_path, report_type, output_path, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (batch, str(input_path), report_type, str(output_path), now)
+                )
+                key = (batch, str(input_path), report_type)
+                if text_hash is not None:
+                    # The changed hash is detected again when the job is prepared and resets its stages
+                    # Failed jobs too, also those out of attempts: the new text deserves fresh attempts
+                    cursor = conn.execute(
+                        "UPDATE jobs SET status = 'pending', attempts = 0, updated_at = ? "
+                        "WHERE batch = ? AND input_path = ? AND report_type = ? AND status IN ('done', 'failed') "
+                        "AND text_hash IS NOT ?",
+                        (now, *key, text_hash)
+                    )
+                    if cursor.rowcount:
+                        logger.info(f"Transcript changed since it was processed, requeued: {input_path}")
+                if output_signature is not None:
+                    cursor = conn.execute(
+                        "UPDATE jobs SET status = 'pending', stage = 'analyzed', attempts = 0, updated_at = ? "
+                        "WHERE batch = ? AND input_path = ? AND report_type = ? AND status = 'done' "
+                        "AND output_signature IS NOT ?",
+                        (now, *key, output_signature)
+                    )
+                    if cursor.rowcount:
+                        logger.info(f"Template changed, requeued for output: {input_path}")
+            requested = set(formats)
+            if requested:
+                rows = conn.execute(
+                    "SELECT id, input_path, output_path, outputs FROM jobs "
+                    "WHERE batch = ? AND report_type = ? AND status = 'done'",
+                    (batch, report_type)
+                ).fetchall()
+                for row in rows:
+                    missing = requested - set(load_outputs(row["outputs"], Path(row["output_path"]), True))
+                    if not missing:
+                        continue
+                    conn.execute(
+                        "UPDATE jobs SET status = 'pending', stage = 'analyzed', attempts = 0, updated_at = ? "
+                        "WHERE id = ?",
+                        (now, row["id"])
+                    )
+                    logger.info(f"Formats {', '.join(sorted(missing))} missing, requeued: {row['input_path']}")
+            conn.execute(
+                "UPDATE jobs SET status = 'pending', updated_at = ? "
+                "WHERE batch = ? AND status = 'failed' AND attempts < ?",
+                (now, batch, self.max_attempts)
+            )
+
+    def claim(self, batch: str, owner: str, limit: int) -> List[Job]:
+        """
+        Lease up to `limit` runnable jobs of a batch to `owner`.
+
+        Runnable: pending, or running with an expired lease (crashed worker).
+
+        Returns:
+            Claimed jobs
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT id FROM jobs WHERE batch = ? AND attempts < ? AND ("
+                "status = 'pending' OR (status = 'running' AND lease_expires < ?)"
+                ") ORDER BY id LIMIT ?",
+                (batch, self.max_attempts, now, limit)
+            ).fetchall()
+            ids = [row["id"] for row in rows]
+            if not ids:
+                return []
+            placeholders = ",".join("?" * len(ids))
+            conn.execute(
+                f"UPDATE jobs SET status = 'running', lease_owner = ?, lease_expires = ?, updated_at = ? "
+                f"WHERE id IN ({placeholders})",
+                (owner, now + self.lease_seconds, now, *ids)
+            )
+            claimed = conn.execute(
+                f"SELECT * FROM jobs WHERE id IN ({placeholders}) ORDER BY id", ids
+            ).fetchall()
+        logger.debug(f"Claimed {len(claimed)} jobs for {owner}")
+        return [Job(row) for row in claimed]
+
+    def _update_owned(self, job_id: int, owner: str, assignments: str, params: tuple) -> bool:
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                f"UPDATE jobs SET {assignments}, updated_at = ? WHERE id = ? AND lease_owner = ?",
+                (*params, now, job_id, owner)
+            )
+            updated = cursor.rowcount == 1
+        if not updated:
+            logger.warning(f"Job {job_id}: lease lost by {owner}, update skipped")
+        return updated
+
+    def advance(self, job_id: int, owner: str, stage: str, **fields) -> bool:
+        """
+        Record a completed stage (and its artifacts) and renew the lease.
+
+        Args:
+            job_id: Job id
+            owner: Lease owner
+            stage: Stage just completed
+            **fields: text_hash, report_json, analyzed_at, image_uri, image_failed
+
+        Returns:
+            False if the lease was lost to another worker
+        """
+        allowed = {"text_hash", "report_json", "analyzed_at", "image_uri", "image_failed"}
+        unknown = set(fields) - allowed
+        if unknown:
+            raise ValueError(f"Unknown job fields: {sorted(unknown)}")
+        assignments = ["stage = ?", "lease_expires = ?"] + [f"{name} = ?" for name in fields]
+        params = (stage, time.time() + self.lease_seconds, *fields.values())
+        return self._update_owned(job_id, owner, ", ".join(assignments), params)
+
+    def renew(self, job_ids: Iterable[int], owner: str) -> int:
+        """
+        Extend the leases of jobs still held by `owner` (heartbeat).
+
+        Covers jobs that make no stage progress for a while, e.g. while they
+        wait in the render queue, so no other worker reclaims and reruns them.
+
+        Returns:
+            Number of leases renewed
+        """
+        ids = list(job_ids)
+        if not ids:
+            return 0
+        now = time.time()
+        placeholders = ",".join("?" * len(ids))
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                f"UPDATE jobs SET lease_expires = ?, updated_at = ? "
+                f"WHERE id IN ({placeholders}) AND lease_owner = ? AND status = 'running'",
+                (now + self.lease_seconds, now, *ids, owner)
+            )
+            renewed = cursor.rowcount
+        if renewed < len(ids):
+            logger.warning(f"{len(ids) - renewed} leases of {owner} lost before renewal")
+        return renewed
+
+    def complete(
+        self,
+        job_id: int,
+        owner: str,
+        output_signature: Optional[str] = None,
+        outputs: Optional[Dict[str, str]] = None
+    ) -> bool:
+        """
+        Mark a job as rendered and release its lease.
+
+        Args:
+            job_id: Job id
+            owner: Lease owner
+            output_signature: Signature the outputs were produced with
+            outputs: All written outputs of the job (format -> file)
+
+        Returns:
+            False if the lease was lost to another worker
+        """
+        return self._update_owned(
+            job_id, owner,
+            "stage = 'rendered', status = 'done', last_error = NULL, failed_stage = NULL, "
+            "output_signature = ?, outputs = ?, lease_owner = NULL, lease_expires = NULL",
+            (output_signature, json.dumps(outputs, ensure_ascii=False) if outputs is not None else None)
+        )
+
+    def fail(self, job_id: int, owner: str, stage: str, error: str) -> bool:
+        """Mark a job as failed at `stage` and release its lease."""
+        return self._update_owned(
+            job_id, owner,
+            "status = 'failed', attempts = attempts + 1, failed_stage = ?, last_error = ?, "
+            "lease_owner = NULL, lease_expires = NULL",
+            (stage, error)
+        )
+
+    def reset_input(self, job_id: int, owner: str, text_hash: str) -> bool:
+        """Restart a job from scratch because its transcript content changed."""
+        return self._update_owned(
+            job_id, owner,
+            "stage = 'read', text_hash = ?, report_json = NULL, analyzed_at = NULL, image_uri = NULL, image_failed = 0",
+            (text_hash,)
+        )
+
+    def jobs(self, batch: str) -> List[Job]:
+        """All jobs of a batch in registration order."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT * FROM jobs WHERE batch = ? ORDER BY id", (batch,)).fetchall()
+        return [Job(row) for row in rows]
+
+
+def dump_report_json(report_data) -> str:
+    """Serialize ReportData/DesignBrief for the job row."""
+    return json.dumps(report_data.model_dump(), ensure_ascii=False)
@@ -0,0 +1,188 @@
+"""
+Incremental JSON shape checking for streamed completions.
+
+Consumes a model response chunk by chunk and raises as soon as the output
+clearly cannot become the expected JSON object: prose instead of '{',
+a value of the wrong type for a known field, or text after the object.
+Full validation still happens afterwards with Pydantic; this only lets a
+bad stream be aborted early.
+"""
+import json
+import typing
+from typing import Dict, Optional, Set, Type
+
+from pydantic import BaseModel
+
+# Leading text allowed before the opening brace (markdown code fence)
+_FENCE_PREFIXES = ("```json", "```JSON", "```")
+_NUMBER_START = set("-0123456789")
+
+
+class StreamDivergedError(json.JSONDecodeError):
+    """Streamed output diverged from the expected JSON shape."""
+
+    def __init__(self, msg: str, doc: str, pos: int):
+        super().__init__(f"Stream aborted: {msg}", doc, pos)
+
+
+def _value_starts(annotation) -> Optional[Set[str]]:
+    """First characters a JSON value of this annotation may start with (None = any)."""
+    origin = typing.get_origin(annotation)
+    if origin is typing.Union:
+        starts: Set[str] = set()
+        for arg in typing.get_args(annotation):
+            if arg is type(None):
+                starts.add("n")
+                continue
+            arg_starts = _value_starts(arg)
+            if arg_starts is None:
+                return None
+            starts |= arg_starts
+        return starts
+    if origin in (list, typing.List):
+        return {"["}
+    if annotation is str:
+        return {'"'}
+    if annotation is int or annotation is float:
+        return set(_NUMBER_START)
+    if annotation is bool:
+        return {"t", "f"}
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return {"{"}
+    return None
+
+
+class JSONShapeChecker:
+    """
+    Streaming checker for a top-level JSON object.
+
+    Args:
+        value_starts: Allowed first characters of the value per known key
+    """
+
+    def __init__(self, value_starts: Optional[Dict[str, Set[str]]] = None):
+        self.value_starts = value_starts or {}
+        self.buffer = []
+        self.pos = 0
+        self.phase = "prefix"
+        self.prefix = ""
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.expect = None  # at depth 1: 'key', 'colon', 'value', 'comma'
+        self.key_chars = []
+        self.current_key = None
+
+    @classmethod
+    def for_model(cls, model: Type[BaseModel]) -> "JSONShapeChecker":
+        """Build a checker from a Pydantic model's top-level fields."""
+        value_starts = {}
+        for name, field in model.model_fields.items():
+            starts = _value_starts(field.annotation)
+            if starts is not None:
+                value_starts[name] = starts
+        return cls(value_starts)
+
+    @property
+    def text(self) -> str:
+        return "".join(self.buffer)
+
+    def _fail(self, msg: str):
+        raise StreamDivergedError(msg, self.text, self.pos)
+
+    def feed(self, chunk: str):
+        """
+        Consume the next chunk of model output.
+
+        Raises:
+            StreamDivergedError: If the output can no longer be the expected object
+        """
+        self.buffer.append(chunk)
+        for char in chunk:
+            self._feed_char(char)
+            self.pos += 1
+
+    def _feed_char(self, char: str):
+        if self.phase == "prefix":
+            if char == "{":
+                leading = self.prefix.strip()
+                if leading and leading not in _FENCE_PREFIXES:
+                    self._fail(f"unexpected text before JSON object: {leading[:40]!r}")
+                self.phase = "object"
+                self.depth = 1
+                self.expect = "key"
+                return
+            self.prefix += char
+            leading = self.prefix.strip()
+            if leading and not any(p.startswith(leading) for p in _FENCE_PREFIXES) \
+                    and leading not in _FENCE_PREFIXES:
+                self._fail(f"response does not start with a JSON object: {leading[:40]!r}")
+            return
+
+        if self.phase == "after":
+            if not char.isspace() and char != "`":
+                self._fail("unexpected text after JSON object")
+            return
+
+        if self.in_string:
+            collecting_key = self.depth == 1 and self.expect == "key_string"
+            if self.escape:
+                self.escape = False
+            elif char == "\\":
+                self.escape = True
+                return
+            elif char == '"':
+                self.in_string = False
+                if collecting_key:
+                    self.current_key = "".join(self.key_chars)
+                    self.expect = "colon"
+                return
+            if collecting_key:
+                self.key_chars.append(char)
+            return
+
+        if char.isspace():
+            return
+
+        if self.depth == 1:
+            if self.expect == "key":
+                if char == "}":
+                    self._close()
+                    return
+                if char != '"':
+                    self._fail(f"expected a key, got {char!r}")
+                self.in_string = True
+                self.expect = "key_string"
+                self.key_chars = []
+                return
+            if self.expect == "colon":
+                if char != ":":
+                    self._fail(f"expected ':' after key {self.current_key!r}")
+                self.expect = "value"
+                return
+            if self.expect == "value":
+                allowed = self.value_starts.get(self.current_key)
+                if allowed is not None and char not in allowed:
+                    self._fail(f"field {self.current_key!r} has unexpected value type (starts with {char!r})")
+                self.expect = "comma"
+                # fall through to track nesting/strings of the value itself
+            elif self.expect == "comma":
+                if char == ",":
+                    self.expect = "key"
+                    return
+                if char == "}":
+                    self._close()
+                    return
+
+        if char == '"':
+            self.in_string = True
+        elif char in "{[":
+            self.depth += 1
+        elif char in "}]":
+            self.depth -= 1
+            if self.depth == 0:
+                self.phase = "after"
+
+    def _close(self):
+        self.depth = 0
+        self.phase = "after"
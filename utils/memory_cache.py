@@ -0,0 +1,110 @@
+"""
+In-process LRU tier in front of the cache backend.
+
+Holds validated ReportData/DesignBrief objects, so repeated hits in a
+long-lived process (server, batch run) skip reading, JSON parsing and
+Pydantic validation. Each object is stored with the backend's version
+token of its entry; a hit only counts if the token is unchanged, so an
+entry rewritten on disk (by another process, a migration, a batch
+collect) is reloaded.
+
+Cached objects are shared between callers and must be treated as read-only.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryCache:
+    """
+    Thread-safe bounded LRU map of (cache dir, kind, key) -> (token, object).
+
+    Args:
+        max_entries: Max objects kept (0 disables the tier)
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._items: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+
+    def get(self, cache_id: str, kind: str, key: str, token: Hashable) -> Optional[Any]:
+        """
+        Return the object if present and still matching the backend token.
+
+        Args:
+            cache_id: Cache directory identifier
+            kind: Artifact kind
+            key: Entry key
+            token: Current version token of the backend entry
+        """
+        if self.max_entries <= 0:
+            return None
+        item_key = (cache_id, kind, key)
+        with self._lock:
+            item = self._items.get(item_key)
+            if item is None:
+                self.misses += 1
+                return None
+            if item[0] != token:
+                del self._items[item_key]
+                self.stale += 1
+                self.misses += 1
+                logger.debug(f"Memory cache entry changed on disk: {kind}/{key[:8]}...")
+                return None
+            self._items.move_to_end(item_key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, cache_id: str, kind: str, key: str, token: Hashable, value: Any):
+        """Store an object under the backend token it was loaded with."""
+        if self.max_entries <= 0 or token is None:
+            return
+        item_key = (cache_id, kind, key)
+        with self._lock:
+            self._items[item_key] = (token, value)
+            self._items.move_to_end(item_key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, cache_id: str, kind: str, key: str):
+        """Drop one object."""
+        with self._lock:
+            self._items.pop((cache_id, kind, key), None)
+
+    def clear(self):
+        """Drop all objects (counters are kept)."""
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters and hit ratio."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._items),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None
+            }
+
+
+_memory_cache = MemoryCache(config.MEMORY_CACHE_ENTRIES)
+
+
+def get_memory_cache() -> MemoryCache:
+    """Return the process-wide memory tier."""
+    return _memory_cache
@@ -0,0 +1,167 @@
+"""
+Schema versions and migrations of cached artifacts.
+
+Report and design brief entries carry a version stamp in their JSON
+(`"_version": {"schema": 2, "prompt": 1}`, ignored by the Pydantic
+models); entries written before stamps existed count as schema version 1.
+An older entry is upgraded step by step through the registered
+migrations - lazily when it is read (and written back in place), or for
+the whole store with `main.py cache migrate-schema` - so a schema change
+ships with a migration instead of invalidating the cache.
+
+Adding a field: bump the *_SCHEMA_VERSION in utils.schema and register a
+migration from the previous version:
+
+    @migration(REPORT, 2)
+    def _report_v2_to_v3(data: dict) -> dict:
+        data.setdefault("new_field", None)
+        return data
+"""
+import json
+import logging
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from pydantic import ValidationError
+
+import config
+from utils.cache_store import get_cache_backend, REPORT, DESIGN_BRIEF
+from utils.schema import ReportData, DesignBrief, REPORT_SCHEMA_VERSION, DESIGN_BRIEF_SCHEMA_VERSION
+
+logger = logging.getLogger(__name__)
+
+VERSION_FIELD = "_version"
+# Schema version of entries written before stamps existed
+UNSTAMPED_VERSION = 1
+
+SCHEMA_VERSIONS = {
+    REPORT: REPORT_SCHEMA_VERSION,
+    DESIGN_BRIEF: DESIGN_BRIEF_SCHEMA_VERSION
+}
+MODELS = {
+    REPORT: ReportData,
+    DESIGN_BRIEF: DesignBrief
+}
+
+# Outcome counters of migrate_store
+UPGRADED = "upgraded"
+CURRENT = "current"
+NEWER = "newer"
+FAILED = "failed"
+OLD_PROMPT = "old_prompt"
+
+_migrations: Dict[Tuple[str, int], Callable[[dict], dict]] = {}
+
+
+def migration(kind: str, from_version: int):
+    """Decorator registering a function that upgrades `kind` data from from_version to from_version + 1."""
+    def register(fn: Callable[[dict], dict]):
+        _migrations[(kind, from_version)] = fn
+        return fn
+    return register
+
+
+@migration(REPORT, 1)
+def _report_v1_to_v2(data: dict) -> dict:
+    # Business fields added in 1.1.0; entries from before have none of them
+    data.setdefault("desired_timeline", None)
+    data.setdefault("budget_range", None)
+    data.setdefault("core_requirements", [])
+    return data
+
+
+def read_versions(data: dict) -> Tuple[int, Optional[int]]:
+    """(schema version, prompt version) of stored entry data; prompt is None if unknown."""
+    stamp = data.get(VERSION_FIELD)
+    if not isinstance(stamp, dict):
+        return UNSTAMPED_VERSION, None
+    return stamp.get("schema", UNSTAMPED_VERSION), stamp.get("prompt")
+
+
+def stamped_value(kind: str, data: dict, prompt_version: Optional[int] = None) -> str:
+    """JSON value of an entry stamped with the current schema version."""
+    stamp = {"schema": SCHEMA_VERSIONS[kind], "prompt": prompt_version}
+    return json.dumps({**data, VERSION_FIELD: stamp}, ensure_ascii=False)
+
+
+def upgrade(kind: str, data: dict) -> Tuple[dict, bool]:
+    """
+    Bring stored entry data to the current schema version.
+
+    Args:
+        kind: Artifact kind (REPORT or DESIGN_BRIEF)
+        data: Decoded entry value (stamped or not)
+
+    Returns:
+        (data without the stamp, whether the stored value should be rewritten)
+
+    Raises:
+        ValueError: If a migration step is not registered
+    """
+    version, _ = read_versions(data)
+    target = SCHEMA_VERSIONS[kind]
+    rewrite = version < target or VERSION_FIELD not in data
+    data = {name: value for name, value in data.items() if name != VERSION_FIELD}
+    if version > target:
+        # Written by a newer release: validate as is, never downgrade the stored value
+        logger.debug(f"{kind} entry has schema v{version}, newer than v{target}")
+        return data, False
+    while version < target:
+        step = _migrations.get((kind, version))
+        if step is None:
+            raise ValueError(f"No migration registered for {kind} schema v{version}")
+        data = step(data)
+        version += 1
+    return data, rewrite
+
+
+def migrate_store(
+    cache_dir: Path = config.CACHE_DIR,
+    dry_run: bool = False,
+    prompt_versions: Optional[Dict[str, int]] = None
+) -> Dict[str, Dict[str, int]]:
+    """
+    Upgrade every report and design brief entry to the current schema version.
+
+    Args:
+        cache_dir: AI cache directory
+        dry_run: Only count what would change
+        prompt_versions: Current prompt version per kind (entries stamped with an older one are counted)
+
+    Returns:
+        Per-kind counters: upgraded, current, newer, failed, old_prompt
+    """
+    backend = get_cache_backend(cache_dir)
+    prompt_versions = prompt_versions or {}
+    results = {}
+    for kind, model_cls in MODELS.items():
+        counts = results[kind] = {UPGRADED: 0, CURRENT: 0, NEWER: 0, FAILED: 0, OLD_PROMPT: 0}
+        for entry in backend.entries(kind):
+            try:
+                stored = json.loads(entry.value)
+                version, prompt_version = read_versions(stored)
+                data, rewrite = upgrade(kind, stored)
+                data = model_cls(**data).model_dump()
+            except (json.JSONDecodeError, ValidationError, ValueError, TypeError, AttributeError) as e:
+                counts[FAILED] += 1
+                logger.warning(f"Cannot migrate {kind}/{entry.key[:8]}...: {e}")
+                continue
+
+            current_prompt = prompt_versions.get(kind)
+            if None not in (current_prompt, prompt_version) and prompt_version < current_prompt:
+                counts[OLD_PROMPT] += 1
+            if version > SCHEMA_VERSIONS[kind]:
+                counts[NEWER] += 1
+                continue
+            if not rewrite:
+                counts[CURRENT] += 1
+                continue
+            counts[UPGRADED] += 1
+            if not dry_run:
+                backend.put(kind, entry.key, stamped_value(kind, data, prompt_version), entry.meta)
+
+    logger.info(
+        f"Schema migration{' (dry run)' if dry_run else ''}: "
+        + ", ".join(f"{kind} {counts[UPGRADED]} upgraded, {counts[FAILED]} failed" for kind, counts in results.items())
+    )
+    return results
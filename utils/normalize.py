@@ -0,0 +1,177 @@
+"""
+Transcript normalization for cache keys.
+
+Re-exports of the same conversation often differ only in encoding details
+(BOM, line endings, trailing spaces), a regenerated export header or the
+timestamp format of each line. The cache key is computed from a normalized
+copy of the transcript so such variants share one cache entry; the text
+sent to the model is never modified.
+
+Steps (config.TEXT_NORMALIZATION, applied in this order):
+    nfc          drop BOM, Unicode NFC
+    whitespace   unify line endings, trim lines, collapse spaces, drop blank lines
+    headers      drop export header lines at the top (Date:, Exported:, ...)
+    timestamps   drop per-line timestamps ([00:01:23], 12:34 -, 2026-01-31 10:00)
+    speakers     canonicalize speaker labels (**Client** : -> client:)
+
+The default is nfc,whitespace. headers and timestamps drop the dates and
+times a report may quote, and speakers folds label case, so transcripts
+that differ only there would share a report; enable them explicitly.
+
+The key embeds NORMALIZATION_VERSION and the enabled steps: changing either
+yields new keys instead of silently mixing old and new entries. Entries
+stored under the raw-text key (before normalization existed) are found
+through legacy_cache_key and copied to the new key on first use.
+"""
+import hashlib
+import re
+import unicodedata
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import config
+
+# Bump whenever a step's behavior changes
+NORMALIZATION_VERSION = 1
+
+_HEADER_LINES = 12
+_HEADER_RE = re.compile(
+    r"^(date|time|exported|export date|generated|created|recorded|duration|transcript|source|file"
+    r"|дата|время|экспорт|создано|сгенерировано|длительность|запись|файл|расшифровка)\b[^:：]{0,20}[:：]",
+    re.IGNORECASE
+)
+_TIMESTAMP_RE = re.compile(
+    r"^(?:\d{4}-\d{2}-\d{2}[ T])?[\[(]?\d{1,2}:\d{2}(?::\d{2})?(?:[.,]\d{1,3})?[\])]?\s*(?:[-–—|]\s*)?"
+)
+_SPEAKER_RE = re.compile(r"^[*_]{0,2}([^\W\d_][\w .'-]{0,40}?)[*_]{0,2}\s*[:：]\s*")
+_SPACES_RE = re.compile(r"[ \t\u00a0]+")
+
+
+def _nfc(text: str) -> str:
+    return unicodedata.normalize("NFC", text.lstrip("\ufeff"))
+
+
+def _whitespace(text: str) -> str:
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    lines = (_SPACES_RE.sub(" ", line).strip() for line in text.split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def _headers(text: str) -> str:
+    lines = text.split("\n")
+    start = 0
+    while start < min(len(lines), _HEADER_LINES):
+        line = lines[start].strip()
+        if line and not _HEADER_RE.match(line):
+            break
+        start += 1
+    return "\n".join(lines[start:])
+
+
+def _timestamps(text: str) -> str:
+    return "\n".join(_TIMESTAMP_RE.sub("", line.lstrip()) for line in text.split("\n"))
+
+
+def _speakers(text: str) -> str:
+    def canonical(match: re.Match) -> str:
+        return f"{' '.join(match.group(1).split()).casefold()}: "
+    return "\n".join(_SPEAKER_RE.sub(canonical, line, count=1) for line in text.split("\n"))
+
+
+STEPS: Dict[str, Callable[[str], str]] = {
+    "nfc": _nfc,
+    "whitespace": _whitespace,
+    "headers": _headers,
+    "timestamps": _timestamps,
+    "speakers": _speakers
+}
+
+
+def parse_steps(spec: str) -> Tuple[str, ...]:
+    """
+    Parse a comma-separated step list (order is always the canonical one).
+
+    Raises:
+        ValueError: On unknown step names
+    """
+    names = {name.strip().lower() for name in spec.split(",") if name.strip()}
+    unknown = names - set(STEPS)
+    if unknown:
+        raise ValueError(f"Unknown normalization steps: {sorted(unknown)} (choose from {list(STEPS)})")
+    return tuple(name for name in STEPS if name in names)
+
+
+def normalize_text(text: str, steps: Optional[Iterable[str]] = None) -> str:
+    """
+    Apply the normalization pipeline.
+
+    Args:
+        text: Transcript text
+        steps: Step names (default: config.TEXT_NORMALIZATION)
+
+    Returns:
+        Normalized text
+    """
+    steps = parse_steps(config.TEXT_NORMALIZATION) if steps is None else tuple(steps)
+    for name in STEPS:
+        if name in steps:
+            text = STEPS[name](text)
+    # Re-collapse: stripping timestamps/headers can leave leading spaces and empty lines
+    if steps and "whitespace" in steps:
+        text = _whitespace(text)
+    return text
+
+
+def normalization_tag(steps: Optional[Iterable[str]] = None) -> str:
+    """Identifier of the key scheme, e.g. 'n1:nfc+whitespace' or 'raw'."""
+    steps = parse_steps(config.TEXT_NORMALIZATION) if steps is None else tuple(steps)
+    return f"n{NORMALIZATION_VERSION}:{'+'.join(steps)}" if steps else "raw"
+
+
+def transcript_cache_key(text: str, steps: Optional[Iterable[str]] = None) -> str:
+    """
+    SHA256 cache key of a transcript under the normalization pipeline.
+
+    With no steps enabled this equals the plain SHA256 of the text
+    (the key scheme used before normalization existed).
+    """
+    steps = parse_steps(config.TEXT_NORMALIZATION) if steps is None else tuple(steps)
+    if not steps:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+    payload = f"{normalization_tag(steps)}\n{normalize_text(text, steps)}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def legacy_cache_key(text: str, steps: Optional[Iterable[str]] = None) -> Optional[str]:
+    """
+    Raw-text key of a transcript to fall back to on a miss.
+
+    Returns:
+        Plain SHA256 of the text, or None when it equals the current key (no steps)
+    """
+    steps = parse_steps(config.TEXT_NORMALIZATION) if steps is None else tuple(steps)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest() if steps else None
+
+
+def simulate_hit_rate(texts: Iterable[str], steps: Optional[Iterable[str]] = None) -> Dict[str, int]:
+    """
+    Replay a corpus against an empty cache with raw and normalized keys.
+
+    Args:
+        texts: Transcripts in processing order
+        steps: Step names (default: config.TEXT_NORMALIZATION)
+
+    Returns:
+        Counters: total, raw_misses, normalized_misses, converted
+    """
+    raw_keys, normalized_keys = set(), set()
+    total = 0
+    for text in texts:
+        total += 1
+        raw_keys.add(transcript_cache_key(text, ()))
+        normalized_keys.add(transcript_cache_key(text, steps))
+    return {
+        "total": total,
+        "raw_misses": len(raw_keys),
+        "normalized_misses": len(normalized_keys),
+        "converted": len(raw_keys) - len(normalized_keys)
+    }
@@ -1,100 +1,105 @@
 """
 PDF generation module.
-Handles HTML rendering with Jinja2 and PDF conversion with WeasyPrint.
+Handles PDF conversion with WeasyPrint of the HTML rendered by
+utils.html_renderer (whose functions are re-exported here).
+
+The stylesheet is parsed once per process into a WeasyPrint CSS object
+(passed via `stylesheets=` instead of being inlined into every document)
+and fonts are resolved through one process-wide FontConfiguration.
+Renders within a process must not run concurrently: batch mode renders
+in worker processes, the report server serializes renders with a lock.
+
+generate_combined_pdf lays out many reports as one document (table of
+contents, a page break and a bookmark per report) in a single pass.
 """
+import hashlib
 import logging
+import threading
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, Union
+from typing import Dict, List, Optional, TextIO, Union
 
-from jinja2 import Environment, FileSystemLoader, TemplateNotFound, TemplateSyntaxError
+from jinja2 import TemplateNotFound, TemplateSyntaxError
 from weasyprint import HTML, CSS
 from weasyprint.text.fonts import FontConfiguration
 
+import config
 from utils.schema import ReportData, DesignBrief
+from utils.render_cache import render_key, lookup_render, materialize_render, store_render, file_digest
+from utils.template_env import get_template
+# HTML rendering lives in utils.html_renderer (no WeasyPrint import); re-exported here
+from utils.html_renderer import load_css_content, render_html, template_context
 
 logger = logging.getLogger(__name__)
 
+_resource_lock = threading.Lock()
+_font_config: Optional[FontConfiguration] = None
+_stylesheets: Dict[str, CSS] = {}  # content digest -> parsed stylesheet
 
-def render_html(
-    report_data: Union[ReportData, DesignBrief],
-    template_path: Path,
-    css_path: Path,
-    transcript_filename: str = "transcript.txt",
-    image_uri: Optional[str] = None,
-    image_failed: bool = False
-) -> str:
+
+def get_font_config() -> FontConfiguration:
+    """Process-wide WeasyPrint font configuration (fonts are resolved once per process)."""
+    global _font_config
+    with _resource_lock:
+        if _font_config is None:
+            _font_config = FontConfiguration()
+        return _font_config
+
+
+def get_stylesheet(css_path: Path, css_content: Optional[str] = None) -> Optional[CSS]:
     """
-    Render HTML from Jinja2 template.
+    Parsed stylesheet, reused while its content is unchanged.
     
     Args:
-        report_data: Report data to render
-        template_path: Path to HTML template file
-        css_path: Path to CSS file
-        transcript_filename: Name of source transcript file
+        css_path: Path to CSS file (also the base for relative url() references)
+        css_content: Preloaded stylesheet text (read from css_path if omitted)
         
     Returns:
-        Rendered HTML as string
-        
-    Raises:
-        TemplateNotFound: If template file doesn't exist
-        TemplateSyntaxError: If template has syntax errors
+        WeasyPrint CSS object, or None if the file does not exist
     """
-    try:
-        logger.info(f"Rendering HTML from template: {template_path}")
-        
-        # Load CSS content
-        css_content = ""
-        if css_path.exists():
-            with open(css_path, 'r', encoding='utf-8') as f:
-                css_content = f.read()
-            logger.debug(f"Loaded CSS from {css_path}")
-        else:
+    if css_content is None:
+        digest = file_digest(css_path)
+        if digest == "missing":
             logger.warning(f"CSS file not found: {css_path}")
-        
-        # Setup Jinja2 environment
-        template_dir = template_path.parent
-        env = Environment(loader=FileSystemLoader(str(template_dir)))
-        
-        # Load template
-        template = env.get_template(template_path.name)
-        
-        # Prepare template context
-        context = {
-            'report_data': report_data,
-            'generation_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'transcript_filename': transcript_filename,
-            'css_content': css_content,
-            'image_uri': image_uri,
-            'image_failed': image_failed
-        }
-        
-        # Render
-        html = template.render(**context)
-        logger.info("HTML rendered successfully")
-        
-        return html
-        
-    except TemplateNotFound as e:
-        logger.error(f"Template not found: {e}")
-        raise Exception(f"Template file not found: {template_path}")
-        
-    except TemplateSyntaxError as e:
-        logger.error(f"Template syntax error: {e}")
-        raise Exception(f"Template syntax error in {template_path}: {e}")
-        
-    except Exception as e:
-        logger.error(f"Error rendering template: {e}", exc_info=True)
-        raise
+            return None
+    else:
+        digest = hashlib.sha256(css_content.encode("utf-8")).hexdigest()
+    with _resource_lock:
+        stylesheet = _stylesheets.get(digest)
+    if stylesheet is not None:
+        return stylesheet
+    
+    if css_content is None:
+        css_content = load_css_content(css_path)
+    stylesheet = CSS(
+        string=css_content,
+        base_url=css_path.parent.resolve().as_uri() + "/",
+        font_config=get_font_config()
+    )
+    logger.info(f"Parsed stylesheet {css_path} ({digest[:8]}...)")
+    with _resource_lock:
+        _stylesheets[digest] = stylesheet
+    return stylesheet
+
+
+def _stylesheet_list(stylesheet: Optional[CSS]) -> Optional[List[CSS]]:
+    return [stylesheet] if stylesheet is not None else None
 
 
-def html_to_pdf(html: str, output_path: Path):
+def html_to_pdf(
+    html: Union[str, Path],
+    output_path: Path,
+    font_config: Optional[FontConfiguration] = None,
+    stylesheets: Optional[List[CSS]] = None
+):
     """
     Convert HTML string to PDF file using WeasyPrint.
     
     Args:
-        html: HTML content as string
+        html: HTML content as string, or the path of an HTML file
         output_path: Path where to save the PDF
+        font_config: Font configuration (default: the process-wide one)
+        stylesheets: Pre-parsed stylesheets applied to the document (see get_stylesheet)
         
     Raises:
         Exception: On WeasyPrint errors
@@ -106,13 +111,19 @@ def html_to_pdf(html: str, output_path: Path):
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
         # Configure fonts
-        font_config = FontConfiguration()
+        if font_config is None:
+            font_config = get_font_config()
         
-        # Convert to PDF
-        HTML(string=html).write_pdf(
-            output_path,
+        # Convert to PDF (written next to the target and moved into place, so an
+        # output hardlinked to the render cache is replaced rather than overwritten)
+        tmp_path = output_path.with_name(f".{output_path.name}.tmp")
+        document = HTML(filename=str(html)) if isinstance(html, Path) else HTML(string=html)
+        document.write_pdf(
+            tmp_path,
+            stylesheets=stylesheets,
             font_config=font_config
         )
+        tmp_path.replace(output_path)
         
         logger.info(f"PDF successfully created: {output_path}")
         
@@ -126,11 +137,12 @@ def html_to_pdf(html: str, output_path: Path):
     except Exception as e:
         logger.error(f"Error generating PDF: {e}", exc_info=True)
         # Clean up partial file if it exists
-        if output_path.exists():
-            try:
-                output_path.unlink()
-            except:
-                pass
+        for path in (output_path.with_name(f".{output_path.name}.tmp"), output_path):
+            if path.exists():
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
         raise Exception(f"Failed to generate PDF: {str(e)}")
 
 
@@ -141,7 +153,10 @@ def generate_pdf_report(
     css_path: Path,
     transcript_filename: str = "transcript.txt",
     image_uri: Optional[str] = None,
-    image_failed: bool = False
+    image_failed: bool = False,
+    generation_date: Optional[str] = None,
+    use_render_cache: Optional[bool] = None,
+    html: Optional[str] = None
 ):
     """
     Generate PDF report from report data.
@@ -154,21 +169,179 @@ def generate_pdf_report(
         template_path: Path to HTML template
         css_path: Path to CSS file
         transcript_filename: Name of source transcript file
+        generation_date: Date shown in the report (default: now)
+        use_render_cache: Reuse an identical earlier render (default: config.RENDER_CACHE)
+        html: HTML already rendered from the same arguments with the stylesheet
+            inlined (e.g. the one written as the html output); laid out as is
     """
     logger.info("Starting PDF report generation")
+    generation_date = generation_date or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     
-    # Render HTML
-    html = render_html(
-        report_data,
-        template_path,
-        css_path,
-        transcript_filename,
-        image_uri=image_uri,
-        image_failed=image_failed
-    )
+    key = None
+    if config.RENDER_CACHE if use_render_cache is None else use_render_cache:
+        key = render_key(
+            report_data, template_path, css_path, transcript_filename, image_uri, image_failed,
+            generation_date=generation_date
+        )
+        cached = lookup_render(key)
+        if cached is not None:
+            try:
+                materialize_render(cached, output_path)
+                logger.info(f"Report served from render cache: {output_path}")
+                print(f"\n✓ Отчёт успешно создан (из кэша): {output_path}")
+                return
+            except OSError as e:
+                # Evicted between lookup and link: render normally
+                logger.warning(f"Render cache entry {key[:8]}... unusable: {e}")
     
-    # Convert to PDF
-    html_to_pdf(html, output_path)
+    if html is not None:
+        html_to_pdf(html, output_path)
+    else:
+        # Render HTML
+        html = render_html(
+            report_data,
+            template_path,
+            css_path,
+            transcript_filename,
+            image_uri=image_uri,
+            image_failed=image_failed,
+            generation_date=generation_date,
+            inline_css=False
+        )
+        
+        # Convert to PDF
+        html_to_pdf(html, output_path, stylesheets=_stylesheet_list(get_stylesheet(css_path)))
+    if key is not None:
+        store_render(key, output_path)
     
     logger.info(f"Report generation completed: {output_path}")
     print(f"\n✓ Отчёт успешно создан: {output_path}")
+
+
+COMBINED_TEMPLATE = 'combined_template.html'
+# Template whose `report` block renders each report type inside a combined document
+REPORT_TEMPLATES = {
+    ReportData: 'report_template.html',
+    DesignBrief: 'design_report_template.html'
+}
+
+
+class CombinedReport:
+    """One report of a combined document."""
+
+    def __init__(
+        self,
+        report_data: Union[ReportData, DesignBrief],
+        transcript_filename: str = "transcript.txt",
+        image_uri: Optional[str] = None,
+        image_failed: bool = False
+    ):
+        self.report_data = report_data
+        self.transcript_filename = transcript_filename
+        self.image_uri = image_uri
+        self.image_failed = image_failed
+
+    @property
+    def title(self) -> str:
+        """Label in the table of contents and the PDF bookmarks."""
+        if isinstance(self.report_data, DesignBrief):
+            return self.report_data.project_name
+        return f"{self.report_data.client_name} — {self.report_data.topic}"
+
+
+def write_combined_html(
+    reports: List[CombinedReport],
+    stream: TextIO,
+    template_dir: Path = config.TEMPLATES_DIR,
+    title: str = "Сводка отчётов",
+    generation_date: Optional[str] = None
+):
+    """
+    Write the HTML of a combined document chunk by chunk.
+    
+    The combined template is streamed with Template.generate() and every
+    report is rendered from the `report` block of its own template when its
+    turn comes, so only one report's HTML is held in memory at a time.
+    
+    Args:
+        reports: Reports in document order
+        stream: Text stream receiving the HTML
+        template_dir: Directory of the combined and report templates
+        title: Document title (first page and PDF metadata)
+        generation_date: Date shown in the document and every report (default: now)
+        
+    Raises:
+        Exception: If a template is missing or invalid
+    """
+    generation_date = generation_date or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    
+    def render_report(report: CombinedReport) -> str:
+        template = get_template(template_dir / REPORT_TEMPLATES[type(report.report_data)])
+        context = template.new_context(template_context(
+            report.report_data, generation_date, report.transcript_filename, "",
+            report.image_uri, report.image_failed
+        ))
+        return "".join(template.blocks['report'](context))
+    
+    try:
+        layout = get_template(template_dir / COMBINED_TEMPLATE)
+        for chunk in layout.generate(
+            title=title,
+            generation_date=generation_date,
+            reports=reports,
+            render_report=render_report
+        ):
+            stream.write(chunk)
+    except TemplateNotFound as e:
+        logger.error(f"Template not found: {e}")
+        raise Exception(f"Template file not found in {template_dir}: {e}")
+    except TemplateSyntaxError as e:
+        logger.error(f"Template syntax error: {e}")
+        raise Exception(f"Template syntax error in {e.filename or template_dir}: {e}")
+
+
+def generate_combined_pdf(
+    reports: List[CombinedReport],
+    output_path: Path,
+    template_dir: Path = config.TEMPLATES_DIR,
+    css_path: Optional[Path] = None,
+    title: str = "Сводка отчётов",
+    generation_date: Optional[str] = None
+):
+    """
+    Render several reports into one PDF in a single layout pass.
+    
+    Every report starts on a new page after a table of contents with page
+    numbers; the PDF gets one bookmark per report (client) with its sections
+    nested below. The HTML is streamed to a temporary file next to the
+    output instead of being assembled in memory.
+    
+    Args:
+        reports: Reports in document order
+        output_path: Path where to save the PDF
+        template_dir: Directory of the combined and report templates
+        css_path: Stylesheet of the reports (default: style.css in template_dir)
+        title: Document title
+        generation_date: Date shown in the document (default: now)
+        
+    Raises:
+        ValueError: If reports is empty
+        Exception: On template or WeasyPrint errors
+    """
+    if not reports:
+        raise ValueError("No reports to combine")
+    css_path = css_path or template_dir / 'style.css'
+    logger.info(f"Starting combined PDF generation: {len(reports)} reports")
+    
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    html_path = output_path.with_name(f".{output_path.name}.html")
+    try:
+        with open(html_path, 'w', encoding='utf-8') as f:
+            write_combined_html(reports, f, template_dir, title, generation_date)
+        html_to_pdf(html_path, output_path, stylesheets=_stylesheet_list(get_stylesheet(css_path)))
+    finally:
+        if html_path.exists():
+            html_path.unlink()
+    
+    logger.info(f"Combined report completed: {output_path}")
+    print(f"\n✓ Сводный отчёт создан (отчётов: {len(reports)}): {output_path}")
@@ -0,0 +1,152 @@
+"""
+Benchmark of per-render WeasyPrint setup costs.
+
+Renders one sample report repeatedly in two modes and reports the time
+per PDF:
+    baseline  stylesheet inlined into every document and a new
+              FontConfiguration per render (behavior before 1.31.0)
+    shared    stylesheet parsed once and passed via `stylesheets=`,
+              process-wide FontConfiguration (current behavior)
+The render cache is bypassed and the generation date fixed, so both modes
+lay out identical documents. Run via `main.py benchmark`.
+"""
+import logging
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Union
+
+from weasyprint import CSS
+from weasyprint.text.fonts import FontConfiguration
+
+import config
+from utils.schema import ReportData, DesignBrief, Sentiment
+from utils.pdf_generator import (
+    load_css_content,
+    render_html,
+    html_to_pdf,
+    get_font_config,
+    get_stylesheet
+)
+
+logger = logging.getLogger(__name__)
+
+TEMPLATES = {
+    'client': 'report_template.html',
+    'design': 'design_report_template.html'
+}
+_GENERATION_DATE = "2026-01-01 00:00:00"
+
+
+def sample_report(report_type: str = 'client') -> Union[ReportData, DesignBrief]:
+    """Report data of typical size for the benchmark."""
+    if report_type == 'design':
+        return DesignBrief(
+            project_name="Сайт студии керамики",
+            business="Мастерская и онлайн-магазин посуды ручной работы",
+            site_goal="Продажи каталога и запись на мастер-классы",
+            target_audience=["Жители города 25-45 лет", "Покупатели подарков", "Рестораны"],
+            pages=["Главная", "Каталог", "Мастер-классы", "О студии", "Контакты"],
+            style_keywords=["тёплый", "натуральный", "минималистичный"],
+            colors=["#D9C5B2", "#7E6B5A", "#F4EFEA"],
+            must_have=["Корзина", "Онлайн-запись", "Отзывы"],
+            avoid=["Стоковые фото", "Яркие неоновые цвета"],
+            content_notes="Фотографии изделий предоставит клиент"
+        )
+    return ReportData(
+        client_name="Анна Петрова",
+        topic="Автоматизация складского учёта",
+        main_request="Внедрить систему учёта остатков с интеграцией 1С",
+        sentiment=Sentiment(label="positive", score=4),
+        summary="Клиент описал текущие проблемы с учётом и ожидания от новой системы. " * 4,
+        key_points=[f"Ключевой пункт обсуждения номер {i}" for i in range(1, 7)],
+        next_steps=[f"Следующий шаг {i}: подготовить материалы" for i in range(1, 5)],
+        desired_timeline="2 месяца",
+        budget_range="до 1,5 млн руб.",
+        core_requirements=[f"Требование {i}" for i in range(1, 6)]
+    )
+
+
+def _time_renders(render: Callable[[Path], None], output_dir: Path, iterations: int, warmup: int) -> List[float]:
+    for i in range(warmup):
+        render(output_dir / f"warmup_{i}.pdf")
+    timings = []
+    for i in range(iterations):
+        started = time.perf_counter()
+        render(output_dir / f"render_{i}.pdf")
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def _summary(timings: List[float]) -> Dict[str, float]:
+    return {
+        "mean_ms": round(statistics.mean(timings) * 1000, 2),
+        "median_ms": round(statistics.median(timings) * 1000, 2),
+        "min_ms": round(min(timings) * 1000, 2)
+    }
+
+
+def run_render_benchmark(report_type: str = 'client', iterations: int = 20, warmup: int = 2) -> dict:
+    """
+    Measure per-render time of the baseline and shared-resource modes.
+
+    Args:
+        report_type: 'client' or 'design'
+        iterations: Timed renders per mode
+        warmup: Untimed renders per mode before measuring
+
+    Returns:
+        JSON-serializable dict: per-mode timings, setup costs and the saving per render
+    """
+    report_data = sample_report(report_type)
+    template_path = config.TEMPLATES_DIR / TEMPLATES[report_type]
+    css_path = config.TEMPLATES_DIR / 'style.css'
+
+    def baseline(output_path: Path):
+        html = render_html(report_data, template_path, css_path, generation_date=_GENERATION_DATE)
+        html_to_pdf(html, output_path, font_config=FontConfiguration())
+
+    def shared(output_path: Path):
+        html = render_html(
+            report_data, template_path, css_path, generation_date=_GENERATION_DATE, inline_css=False
+        )
+        stylesheet = get_stylesheet(css_path)
+        html_to_pdf(
+            html, output_path, font_config=get_font_config(),
+            stylesheets=[stylesheet] if stylesheet is not None else None
+        )
+
+    iterations = max(1, iterations)
+    started = time.perf_counter()
+    font_config = FontConfiguration()
+    font_config_ms = (time.perf_counter() - started) * 1000
+    css_content = load_css_content(css_path)
+    started = time.perf_counter()
+    CSS(string=css_content, font_config=font_config)
+    css_parse_ms = (time.perf_counter() - started) * 1000
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_dir = Path(tmp_dir)
+        baseline_timings = _time_renders(baseline, output_dir, iterations, warmup)
+        shared_timings = _time_renders(shared, output_dir, iterations, warmup)
+
+    result = {
+        "report_type": report_type,
+        "iterations": iterations,
+        "css_lines": len(css_content.splitlines()),
+        "setup_ms": {
+            "font_config": round(font_config_ms, 2),
+            "css_parse": round(css_parse_ms, 2)
+        },
+        "baseline": _summary(baseline_timings),
+        "shared": _summary(shared_timings)
+    }
+    saved = result["baseline"]["mean_ms"] - result["shared"]["mean_ms"]
+    result["saved_ms_per_render"] = round(saved, 2)
+    result["saved_percent"] = round(saved / result["baseline"]["mean_ms"] * 100, 1)
+    logger.info(
+        f"Render benchmark ({report_type}, {iterations} renders): baseline {result['baseline']['mean_ms']} ms, "
+        f"shared {result['shared']['mean_ms']} ms, saved {result['saved_ms_per_render']} ms per render"
+    )
+    return result
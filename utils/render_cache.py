@@ -0,0 +1,178 @@
+"""
+Content-addressed cache of rendered PDFs.
+
+A report is rendered again only if something that affects its bytes
+changed. The key is the SHA256 of the report data, the template and
+stylesheet contents, the embedded image, the rest of the template
+context and the renderer version (RENDER_CACHE_VERSION plus the installed
+WeasyPrint version). Hits are materialized as a hardlink to the cached
+file, or a copy when the output is on another file system.
+
+The generation date shown in the report is part of the key, so a cached
+PDF never shows the date of an earlier render. Callers date reports by
+their analysis (the job row's analyzed_at in batch mode, the AI cache
+entry's created_at otherwise), so re-rendering an unchanged report hits.
+"""
+import functools
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from importlib import metadata
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+import config
+from utils.cache_manager import RENDER, touch_file, maybe_collect_garbage
+from utils.cache_metrics import HIT, MISS, record_event
+
+logger = logging.getLogger(__name__)
+
+# Bump when rendering changes in a way the digests below do not capture
+RENDER_CACHE_VERSION = 2
+
+_digest_lock = threading.Lock()
+_digests: Dict[str, Tuple[int, int, str]] = {}  # path -> (mtime_ns, size, sha256)
+
+
+@functools.lru_cache(maxsize=None)
+def renderer_version() -> str:
+    """Version tag of the rendering stack."""
+    try:
+        weasyprint_version = metadata.version("weasyprint")
+    except metadata.PackageNotFoundError:
+        weasyprint_version = "unknown"
+    return f"r{RENDER_CACHE_VERSION}-weasyprint{weasyprint_version}"
+
+
+def file_digest(path: Path) -> str:
+    """
+    SHA256 of a file's contents, memoized per (mtime, size).
+
+    Returns:
+        Hex digest, or 'missing' if the file does not exist
+    """
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return "missing"
+    marker = str(path)
+    with _digest_lock:
+        known = _digests.get(marker)
+    if known is not None and known[:2] == (stat.st_mtime_ns, stat.st_size):
+        return known[2]
+    digest = hashlib.sha256(path.read_bytes()).hexdigest()
+    with _digest_lock:
+        _digests[marker] = (stat.st_mtime_ns, stat.st_size, digest)
+    return digest
+
+
+def image_digest(image_uri: Optional[str]) -> Optional[str]:
+    """Digest of the embedded image (file contents for file:// URIs, the URI otherwise)."""
+    if not image_uri:
+        return None
+    parsed = urlparse(image_uri)
+    if parsed.scheme == "file":
+        return file_digest(Path(url2pathname(parsed.path)))
+    return hashlib.sha256(image_uri.encode("utf-8")).hexdigest()
+
+
+def render_key(
+    report_data,
+    template_path: Path,
+    css_path: Path,
+    transcript_filename: str,
+    image_uri: Optional[str],
+    image_failed: bool,
+    css_content: Optional[str] = None,
+    generation_date: Optional[str] = None
+) -> str:
+    """
+    Cache key of a render: digest of everything that determines the PDF bytes.
+
+    Args:
+        report_data: ReportData or DesignBrief to render
+        template_path: HTML template
+        css_path: Stylesheet inlined into the template
+        transcript_filename: Source file name shown in the report
+        image_uri: Embedded image URI
+        image_failed: Whether the image placeholder is shown
+        css_content: Stylesheet text actually inlined, if preloaded (digested instead of css_path)
+        generation_date: Date shown in the report
+
+    Returns:
+        Hexadecimal SHA256 key
+    """
+    parts = {
+        "renderer": renderer_version(),
+        "data_type": type(report_data).__name__,
+        "data": hashlib.sha256(
+            json.dumps(report_data.model_dump(), ensure_ascii=False, sort_keys=True).encode("utf-8")
+        ).hexdigest(),
+        "template": file_digest(template_path),
+        "css": (
+            file_digest(css_path) if css_content is None
+            else hashlib.sha256(css_content.encode("utf-8")).hexdigest()
+        ),
+        "image": image_digest(image_uri),
+        "image_failed": bool(image_failed),
+        "transcript_filename": transcript_filename,
+        "generation_date": generation_date
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _cached_path(key: str, render_dir: Path) -> Path:
+    return render_dir / f"{key}.pdf"
+
+
+def _link_or_copy(source: Path, target: Path):
+    """Atomically place source at target as a hardlink (copy across file systems)."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target.with_name(f".{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        try:
+            os.link(source, tmp_path)
+        except OSError:
+            shutil.copyfile(source, tmp_path)
+        tmp_path.replace(target)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def lookup_render(key: str, render_dir: Path = config.RENDER_CACHE_DIR) -> Optional[Path]:
+    """Path of a cached PDF, or None on a miss."""
+    cached = _cached_path(key, render_dir)
+    if not cached.exists():
+        logger.info(f"Render cache miss for key {key[:8]}...")
+        record_event(config.CACHE_DIR, RENDER, MISS, key)
+        return None
+    touch_file(cached)
+    logger.info(f"Render cache hit for key {key[:8]}...")
+    record_event(config.CACHE_DIR, RENDER, HIT, key)
+    return cached
+
+
+def materialize_render(cached: Path, output_path: Path):
+    """Place a cached PDF at the output path."""
+    _link_or_copy(cached, output_path)
+
+
+def store_render(key: str, pdf_path: Path, render_dir: Path = config.RENDER_CACHE_DIR):
+    """
+    Add a freshly rendered PDF to the cache.
+
+    Errors are logged and never propagate into the calling pipeline.
+    """
+    try:
+        _link_or_copy(pdf_path, _cached_path(key, render_dir))
+        logger.info(f"Saved render to cache: {key[:8]}...")
+    except OSError as e:
+        logger.warning(f"Failed to save render {key[:8]}... to cache: {e}")
+        return
+    maybe_collect_garbage()
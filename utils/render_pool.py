@@ -0,0 +1,233 @@
+"""
+Pool of warm PDF rendering processes.
+
+Workers are started with forkserver (spawn where it is unavailable), so
+they never inherit the parent's threads, locks or open connections. Each
+worker imports WeasyPrint and preloads the templates, the parsed
+stylesheet and the font configuration once at start-up; every render
+afterwards only lays out the document. Jobs are plain dicts (model type
+name + model_dump()), rebuilt into ReportData/DesignBrief in the worker,
+which writes the PDF directly to its target path.
+
+Workers are recycled to cap the memory WeasyPrint and fontconfig
+accumulate over a long batch: after config.RENDER_POOL_MAX_TASKS renders
+per worker the pool starts a fresh set of workers for new renders and
+retires the old set in the background; it exits once its queued renders
+are done and submit() never waits for it (the sets overlap briefly). At
+most two renders per worker are queued across both sets; submit() blocks
+until a slot frees up. (ProcessPoolExecutor's own max_tasks_per_child is
+not used: it needs Python 3.11+ and can hang there when a worker
+retires.)
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+import config
+from utils.logging_setup import setup_logging
+from utils.schema import ReportData, DesignBrief
+
+logger = logging.getLogger(__name__)
+
+MODELS = {
+    ReportData.__name__: ReportData,
+    DesignBrief.__name__: DesignBrief
+}
+# Renders queued per worker before submit() blocks
+QUEUED_PER_WORKER = 2
+# Imported by the forkserver once, so forked workers start with them loaded
+PRELOAD_MODULES = ["weasyprint", "utils.pdf_generator"]
+
+
+def _start_context(method: str):
+    """Multiprocessing context for the workers, falling back to spawn."""
+    if method not in multiprocessing.get_all_start_methods():
+        logger.warning(f"Start method '{method}' is not available, using spawn")
+        method = "spawn"
+    context = multiprocessing.get_context(method)
+    if method == "forkserver":
+        context.set_forkserver_preload(PRELOAD_MODULES)
+    return context
+
+
+def _init_worker(log_level: str, template_paths: tuple, css_path: str):
+    """Process pool initializer: configure logging and load rendering resources."""
+    setup_logging(log_level=log_level)
+    from jinja2 import TemplateError
+    from utils.pdf_generator import get_font_config, get_stylesheet
+    from utils.template_env import get_template
+
+    get_font_config()
+    get_stylesheet(Path(css_path))
+    for template_path in template_paths:
+        try:
+            get_template(Path(template_path))
+        except TemplateError as e:
+            # Reported again by the render that needs the template
+            logger.warning(f"Cannot preload template {template_path}: {e}")
+    logger.info(f"Render worker {os.getpid()} ready ({len(template_paths)} templates preloaded)")
+
+
+def make_payload(
+    report_data: Union[ReportData, DesignBrief],
+    output_path: Path,
+    template_path: Path,
+    css_path: Path,
+    transcript_filename: str,
+    image_uri: Optional[str] = None,
+    image_failed: bool = False,
+    generation_date: Optional[str] = None
+) -> dict:
+    """Serializable render job for a worker."""
+    return {
+        "type": type(report_data).__name__,
+        "data": report_data.model_dump(),
+        "output_path": str(output_path),
+        "template_path": str(template_path),
+        "css_path": str(css_path),
+        "transcript_filename": transcript_filename,
+        "image_uri": image_uri,
+        "image_failed": bool(image_failed),
+        "generation_date": generation_date
+    }
+
+
+def render_payload(payload: dict) -> str:
+    """
+    Render one job into its target path (executed in a worker).
+
+    Args:
+        payload: Job built by make_payload
+
+    Returns:
+        Path of the written PDF
+
+    Raises:
+        ValueError: If the payload names an unknown report type
+    """
+    from utils.pdf_generator import generate_pdf_report
+
+    model_cls = MODELS.get(payload["type"])
+    if model_cls is None:
+        raise ValueError(f"Unknown report type in render job: {payload['type']}")
+    generate_pdf_report(
+        report_data=model_cls(**payload["data"]),
+        output_path=Path(payload["output_path"]),
+        template_path=Path(payload["template_path"]),
+        css_path=Path(payload["css_path"]),
+        transcript_filename=payload["transcript_filename"],
+        image_uri=payload["image_uri"],
+        image_failed=payload["image_failed"],
+        generation_date=payload.get("generation_date")
+    )
+    return payload["output_path"]
+
+
+class RenderPool:
+    """
+    Process pool of preloaded rendering workers.
+
+    Usage:
+        with RenderPool(template_paths, css_path) as pool:
+            future = pool.submit(report_data, output_path, template_path, css_path, "call.txt")
+    """
+
+    def __init__(
+        self,
+        template_paths: Iterable[Path],
+        css_path: Path,
+        workers: Optional[int] = None,
+        max_tasks: Optional[int] = None,
+        start_method: Optional[str] = None,
+        log_level: str = "INFO"
+    ):
+        """
+        Args:
+            template_paths: Templates preloaded by every worker
+            css_path: Stylesheet preloaded by every worker
+            workers: Number of worker processes (default: config.BATCH_RENDER_WORKERS or CPU count)
+            max_tasks: Renders per worker before the workers are replaced
+                (default: config.RENDER_POOL_MAX_TASKS, 0 = never)
+            start_method: 'forkserver' or 'spawn' (default: config.RENDER_POOL_START_METHOD)
+            log_level: Logging level in the workers
+        """
+        self.workers = workers or config.BATCH_RENDER_WORKERS or os.cpu_count() or 1
+        self.max_tasks = config.RENDER_POOL_MAX_TASKS if max_tasks is None else max_tasks
+        self._context = _start_context(start_method or config.RENDER_POOL_START_METHOD)
+        self._initargs = (log_level, tuple(str(path) for path in template_paths), str(css_path))
+        self._executor = self._start_workers()
+        self._retiring = []  # Recycled executors still finishing their renders
+        self._slots = threading.BoundedSemaphore(self.workers * QUEUED_PER_WORKER)
+        self._submitted = 0
+        logger.info(
+            f"Render pool: {self.workers} workers ({self._context.get_start_method()}), "
+            f"recycled after {self.max_tasks or 'no'} renders each"
+        )
+
+    def _start_workers(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=self._context,
+            initializer=_init_worker,
+            initargs=self._initargs
+        )
+
+    def _recycle(self):
+        """Start fresh workers and let the old ones finish their renders in the background."""
+        retiring, self._executor = self._executor, self._start_workers()
+        retiring.shutdown(wait=False)
+        self._retiring.append(retiring)
+        self._submitted = 0
+        logger.info(f"Render pool: workers recycled after {self.max_tasks} renders each")
+
+    def submit(
+        self,
+        report_data: Union[ReportData, DesignBrief],
+        output_path: Path,
+        template_path: Path,
+        css_path: Path,
+        transcript_filename: str,
+        image_uri: Optional[str] = None,
+        image_failed: bool = False,
+        generation_date: Optional[str] = None
+    ) -> Future:
+        """
+        Queue a render, blocking while the queue is full.
+
+        Pass a stable generation_date (e.g. the time of the analysis) so
+        renders of unchanged reports hit the render cache; without one the
+        report is dated (and keyed) by the time of the render.
+
+        Returns:
+            Future resolving to the written PDF path (str)
+        """
+        payload = make_payload(
+            report_data, output_path, template_path, css_path, transcript_filename, image_uri, image_failed,
+            generation_date
+        )
+        if self.max_tasks and self._submitted >= self.max_tasks * self.workers:
+            self._recycle()
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(render_payload, payload)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        self._submitted += 1
+        return future
+
+    def shutdown(self, wait: bool = True):
+        for executor in self._retiring + [self._executor]:
+            executor.shutdown(wait=wait)
+        self._retiring = []
+
+    def __enter__(self) -> "RenderPool":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
@@ -0,0 +1,150 @@
+"""
+Output formats of a report.
+
+    json   the ReportData/DesignBrief as a JSON document
+    jsonl  one line per report appended to a JSON Lines file (source
+           transcript, report type and generation time around the data)
+    html   the rendered template with the stylesheet inlined, no layout
+    pdf    the WeasyPrint document (utils.pdf_generator)
+
+Only pdf needs WeasyPrint; this module never imports it, so runs that
+skip pdf do not pay for the import or the layout.
+"""
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+from utils.schema import ReportData, DesignBrief
+from utils.html_renderer import render_html
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ('json', 'jsonl', 'html', 'pdf')
+DEFAULT_FORMATS = ('pdf',)
+
+
+def parse_formats(value: str) -> Tuple[str, ...]:
+    """
+    Parse a comma-separated format list (e.g. 'json,html').
+
+    Returns:
+        Formats in FORMATS order, without duplicates
+
+    Raises:
+        ValueError: On an unknown or empty format list
+    """
+    requested = {part.strip().lower() for part in value.split(',') if part.strip()}
+    unknown = requested - set(FORMATS)
+    if unknown:
+        raise ValueError(f"Unknown format(s): {', '.join(sorted(unknown))}; choose from {', '.join(FORMATS)}")
+    if not requested:
+        raise ValueError("No output format given")
+    return tuple(fmt for fmt in FORMATS if fmt in requested)
+
+
+def format_path(output_path: Path, fmt: str) -> Path:
+    """Output file of a format: the output path with the format's extension."""
+    return output_path.with_suffix(f".{fmt}")
+
+
+def format_generation_date(timestamp: Optional[float] = None) -> str:
+    """Generation date shown in reports for a Unix timestamp (default: now)."""
+    moment = datetime.fromtimestamp(timestamp) if timestamp is not None else datetime.now()
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def report_record(
+    report_data: Union[ReportData, DesignBrief],
+    transcript_filename: str,
+    generation_date: Optional[str] = None
+) -> dict:
+    """JSON Lines record of a report."""
+    return {
+        "transcript": transcript_filename,
+        "report_type": 'design' if isinstance(report_data, DesignBrief) else 'client',
+        "generated_at": generation_date or format_generation_date(),
+        "report": report_data.model_dump()
+    }
+
+
+def _write_atomic(path: Path, text: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(text, encoding='utf-8')
+    tmp_path.replace(path)
+
+
+def write_json(report_data: Union[ReportData, DesignBrief], path: Path):
+    """Write the report data as a JSON document."""
+    _write_atomic(path, json.dumps(report_data.model_dump(), ensure_ascii=False, indent=2) + "\n")
+
+
+def append_jsonl(record: dict, path: Path):
+    """Append one record to a JSON Lines file (one write per line)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def write_report_outputs(
+    report_data: Union[ReportData, DesignBrief],
+    output_path: Path,
+    formats: Iterable[str],
+    template_path: Path,
+    css_path: Path,
+    transcript_filename: str = "transcript.txt",
+    image_uri: Optional[str] = None,
+    image_failed: bool = False,
+    jsonl_path: Optional[Path] = None,
+    generation_date: Optional[str] = None,
+    html: Optional[str] = None
+) -> Dict[str, Path]:
+    """
+    Write every requested format except pdf.
+
+    Args:
+        report_data: Report data to write
+        output_path: Base output path; each format gets its own extension
+        formats: Requested formats (pdf is skipped, see generate_pdf_report)
+        template_path: HTML template (html format)
+        css_path: Stylesheet inlined into the HTML (html format)
+        transcript_filename: Name of source transcript file
+        image_uri: Embedded image URI (html format)
+        image_failed: Whether the image placeholder is shown (html format)
+        jsonl_path: JSON Lines file to append to (default: output path with .jsonl)
+        generation_date: Date recorded in the outputs (default: now)
+        html: Already rendered HTML (stylesheet inlined) for the html format
+
+    Returns:
+        Format -> written file
+    """
+    generation_date = generation_date or format_generation_date()
+    written = {}
+    for fmt in formats:
+        if fmt == 'json':
+            path = format_path(output_path, fmt)
+            write_json(report_data, path)
+        elif fmt == 'jsonl':
+            path = jsonl_path or format_path(output_path, fmt)
+            append_jsonl(report_record(report_data, transcript_filename, generation_date), path)
+        elif fmt == 'html':
+            path = format_path(output_path, fmt)
+            if html is None:
+                html = render_html(
+                    report_data,
+                    template_path,
+                    css_path,
+                    transcript_filename,
+                    image_uri=image_uri,
+                    image_failed=image_failed,
+                    generation_date=generation_date
+                )
+            _write_atomic(path, html)
+        else:
+            continue
+        written[fmt] = path
+        logger.info(f"Report written as {fmt}: {path}")
+    return written
@@ -5,6 +5,11 @@ Defines the structure of AI-generated report data.
 from typing import List, Optional
 from pydantic import BaseModel, Field, field_validator
 
+# Version stamps of cached entries; bump together with a migration in utils/migrations.py
+# 1: initial fields, 2: desired_timeline, budget_range, core_requirements
+REPORT_SCHEMA_VERSION = 2
+DESIGN_BRIEF_SCHEMA_VERSION = 1
+
 
 class Sentiment(BaseModel):
     """Sentiment analysis result."""
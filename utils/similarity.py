@@ -0,0 +1,245 @@
+"""
+Near-duplicate transcript detection for cache reuse.
+
+The CRM re-sends transcripts that differ from an analyzed one only by a
+few lines (a late closing remark, a corrected name). Such variants are
+exact-hash misses, so every cached report's transcript gets a MinHash
+signature over word 3-gram shingles, stored as a `signature` cache entry
+together with the normalized text. Signatures are indexed in memory with
+LSH banding: only transcripts sharing at least one band bucket are
+compared, and a candidate counts as a near-duplicate if its estimated
+Jaccard similarity reaches config.SIMILARITY_THRESHOLD.
+
+Every decision (candidates, best similarity, threshold, outcome) is
+logged at INFO level for auditing. Opt-in via config.SIMILARITY_REUSE.
+"""
+import functools
+import hashlib
+import json
+import logging
+import random
+import re
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import config
+from utils.cache_store import get_cache_backend, SIGNATURE
+from utils.normalize import normalize_text
+
+logger = logging.getLogger(__name__)
+
+SHINGLE_SIZE = 3
+_PRIME = (1 << 61) - 1
+_SEED = 20260118
+_WORD_RE = re.compile(r"\w+")
+
+_registry_lock = threading.Lock()
+_indexes: Dict[str, "SimilarityIndex"] = {}
+
+
+def shingles(text: str) -> set:
+    """Word 3-grams of the normalized, casefolded transcript."""
+    words = _WORD_RE.findall(normalize_text(text).casefold())
+    if len(words) < SHINGLE_SIZE:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+@functools.lru_cache(maxsize=None)
+def _permutations(num_perm: int) -> Tuple[Tuple[int, int], ...]:
+    # Fixed seed: signatures must be comparable across processes and runs
+    rng = random.Random(_SEED)
+    return tuple((rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm))
+
+
+def minhash_signature(text: str, num_perm: Optional[int] = None) -> List[int]:
+    """
+    MinHash signature of a transcript.
+
+    Args:
+        text: Transcript text
+        num_perm: Signature length (default: config.SIMILARITY_PERMUTATIONS)
+
+    Returns:
+        List of num_perm minimum hash values
+    """
+    num_perm = num_perm or config.SIMILARITY_PERMUTATIONS
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for shingle in shingles(text)
+    ]
+    if not hashes:
+        return [_PRIME] * num_perm
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _permutations(num_perm)]
+
+
+def estimate_similarity(first: List[int], second: List[int]) -> float:
+    """Estimated Jaccard similarity of two signatures of equal length."""
+    if not first or len(first) != len(second):
+        return 0.0
+    return sum(1 for x, y in zip(first, second) if x == y) / len(first)
+
+
+class SimilarityIndex:
+    """
+    In-memory LSH index of MinHash signatures.
+
+    Args:
+        num_perm: Signature length
+        bands: Number of LSH bands (must divide num_perm)
+    """
+
+    def __init__(self, num_perm: int, bands: int):
+        if bands <= 0 or num_perm % bands:
+            raise ValueError(f"SIMILARITY_PERMUTATIONS ({num_perm}) must be a multiple of SIMILARITY_BANDS ({bands})")
+        self.num_perm = num_perm
+        self.bands = bands
+        self._rows = num_perm // bands
+        self._buckets: List[Dict[tuple, set]] = [{} for _ in range(bands)]
+        self._signatures: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+
+    def _band_keys(self, signature: List[int]):
+        for band in range(self.bands):
+            yield band, tuple(signature[band * self._rows:(band + 1) * self._rows])
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def add(self, key: str, signature: List[int]):
+        """Index a signature (replaces a previous one under the same key)."""
+        with self._lock:
+            self._remove(key)
+            self._signatures[key] = signature
+            for band, bucket in self._band_keys(signature):
+                self._buckets[band].setdefault(bucket, set()).add(key)
+
+    def remove(self, key: str):
+        """Drop a signature from the index."""
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key: str):
+        signature = self._signatures.pop(key, None)
+        if signature is None:
+            return
+        for band, bucket in self._band_keys(signature):
+            keys = self._buckets[band].get(bucket)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._buckets[band][bucket]
+
+    def query(self, signature: List[int]) -> List[Tuple[str, float]]:
+        """
+        Candidates sharing an LSH bucket with the signature.
+
+        Returns:
+            (key, estimated similarity) pairs, most similar first
+        """
+        with self._lock:
+            candidates = set()
+            for band, bucket in self._band_keys(signature):
+                candidates.update(self._buckets[band].get(bucket, ()))
+            scored = [(key, estimate_similarity(signature, self._signatures[key])) for key in candidates]
+        return sorted(scored, key=lambda item: item[1], reverse=True)
+
+
+class NearDuplicate:
+    """A cached transcript similar to the one being processed."""
+
+    def __init__(self, key: str, similarity: float, text: str):
+        self.key = key
+        self.similarity = similarity
+        # Normalized text of the cached transcript (base for incremental refresh)
+        self.text = text
+        self.report = None
+
+
+def get_similarity_index(cache_dir: Path) -> SimilarityIndex:
+    """
+    Return the process-wide index of a cache directory, loading stored signatures on first use.
+
+    Signatures written by other processes after loading are not visible
+    until the process restarts.
+    """
+    marker = str(Path(cache_dir).resolve())
+    with _registry_lock:
+        index = _indexes.get(marker)
+        if index is not None:
+            return index
+        index = SimilarityIndex(config.SIMILARITY_PERMUTATIONS, config.SIMILARITY_BANDS)
+        for entry in get_cache_backend(cache_dir).entries(SIGNATURE):
+            try:
+                signature = json.loads(entry.value)["signature"]
+            except (json.JSONDecodeError, KeyError, TypeError) as e:
+                logger.warning(f"Skipping invalid signature entry {entry.key[:8]}...: {e}")
+                continue
+            # Entries of another signature length are ignored (and replaced on the next save)
+            if len(signature) == index.num_perm:
+                index.add(entry.key, signature)
+        _indexes[marker] = index
+        logger.info(f"Similarity index loaded: {len(index)} transcripts from {cache_dir}")
+        return index
+
+
+def record_transcript(text: str, key: str, cache_dir: Path):
+    """
+    Store and index the signature of a transcript whose report was cached.
+
+    Errors are logged and never propagate into the calling pipeline.
+    """
+    try:
+        signature = minhash_signature(text)
+        value = json.dumps({"signature": signature, "text": normalize_text(text)}, ensure_ascii=False)
+        get_cache_backend(cache_dir).put(SIGNATURE, key, value)
+        get_similarity_index(cache_dir).add(key, signature)
+    except Exception as e:
+        logger.warning(f"Failed to record transcript signature {key[:8]}...: {e}")
+
+
+def find_near_duplicate(
+    text: str,
+    key: str,
+    kind: str,
+    cache_dir: Path,
+    threshold: Optional[float] = None
+) -> Optional[NearDuplicate]:
+    """
+    Find a cached transcript similar enough to reuse its artifact.
+
+    Args:
+        text: Transcript being processed
+        key: Its cache key (excluded from the candidates)
+        kind: Artifact kind that must still be cached for the candidate
+        cache_dir: Cache directory
+        threshold: Min estimated similarity (default: config.SIMILARITY_THRESHOLD)
+
+    Returns:
+        Most similar qualifying transcript, or None
+    """
+    threshold = config.SIMILARITY_THRESHOLD if threshold is None else threshold
+    backend = get_cache_backend(cache_dir)
+    index = get_similarity_index(cache_dir)
+    candidates = [item for item in index.query(minhash_signature(text)) if item[0] != key]
+
+    for candidate, similarity in candidates:
+        if similarity < threshold:
+            break
+        entry = backend.get(SIGNATURE, candidate)
+        if entry is None or not backend.contains(kind, candidate):
+            # Artifact evicted since indexing: forget the transcript
+            logger.info(f"Near-duplicate {candidate[:8]}... no longer cached, dropping its signature")
+            index.remove(candidate)
+            backend.delete(SIGNATURE, candidate)
+            continue
+        logger.info(
+            f"Near-duplicate check {key[:8]}...: {len(candidates)} candidates, "
+            f"{candidate[:8]}... similarity {similarity:.3f} >= threshold {threshold:.2f} -> match"
+        )
+        return NearDuplicate(candidate, similarity, json.loads(entry.value)["text"])
+
+    best = f"best {candidates[0][0][:8]}... similarity {candidates[0][1]:.3f}" if candidates else "no candidates"
+    logger.info(f"Near-duplicate check {key[:8]}...: {best}, threshold {threshold:.2f} -> miss")
+    return None
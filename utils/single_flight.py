@@ -0,0 +1,306 @@
+"""
+Single-flight coordination of identical AI requests.
+
+When several threads, event-loop tasks or processes need the same cache
+artifact (report, design brief, image prompt, image) at once, only the
+first one calls OpenAI; the others wait for it and then find the artifact
+in the cache. Coordination is keyed on the artifact's cache kind and key:
+an in-process lock per key plus a lock file in `<cache_dir>/.locks`
+(fcntl.flock on POSIX, msvcrt.locking on Windows) for other processes.
+
+Lock files do not accumulate: the holder unlinks its file while still
+holding the lock, and a process that locked a file which was unlinked
+meanwhile (fstat no longer matches the path) reopens and locks again.
+Where an open file cannot be unlinked (Windows) the files stay until
+`cache gc` sweeps the unlocked ones (sweep_lock_files).
+"""
+import asyncio
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager, asynccontextmanager
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+LOCK_DIR_NAME = ".locks"
+_POLL_INTERVAL = 0.05
+
+_registry_lock = threading.Lock()
+_thread_locks: Dict[str, list] = {}  # key -> [lock, users]
+_async_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, list]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _lock_file_path(lock_dir: Path, key: str) -> Path:
+    return lock_dir / LOCK_DIR_NAME / f"{key}.lock"
+
+
+def _try_lock_file(fd: int) -> bool:
+    try:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _lock_file(fd: int):
+    if fcntl:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        return
+    while not _try_lock_file(fd):
+        time.sleep(_POLL_INTERVAL)
+
+
+def _unlock_file(fd: int):
+    if fcntl:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+def _open_lock_file(path: Path) -> int:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return os.open(str(path), os.O_RDWR | os.O_CREAT, 0o644)
+
+
+def _lock_is_current(fd: int, path: Path) -> bool:
+    """Whether the locked file is still the one at `path` (a releasing holder may have unlinked it)."""
+    if not fcntl:
+        return True
+    try:
+        return os.path.samestat(os.fstat(fd), os.stat(path))
+    except FileNotFoundError:
+        return False
+
+
+def _release_lock_file(fd: int, path: Path):
+    """Unlink the lock file while still holding it, then unlock and close it."""
+    try:
+        if fcntl:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.debug(f"Could not remove lock file {path}: {e}")
+        _unlock_file(fd)
+    finally:
+        os.close(fd)
+
+
+def sweep_lock_files(lock_dir: Path, dry_run: bool = False) -> int:
+    """
+    Remove lock files nobody holds (left behind by crashed processes or on Windows).
+
+    Args:
+        lock_dir: Cache directory whose `.locks` subdirectory holds lock files
+        dry_run: Only count the files that would be removed
+
+    Returns:
+        Number of lock files removed (or removable)
+    """
+    directory = lock_dir / LOCK_DIR_NAME
+    if not directory.exists():
+        return 0
+    removed = 0
+    for path in directory.glob("*.lock"):
+        try:
+            fd = os.open(str(path), os.O_RDWR)
+        except OSError:
+            continue
+        try:
+            if not _try_lock_file(fd):
+                continue
+            try:
+                if not dry_run:
+                    path.unlink()
+                removed += 1
+            except OSError:
+                pass
+            finally:
+                _unlock_file(fd)
+        finally:
+            os.close(fd)
+    return removed
+
+
+def _checkout(table: Dict[str, list], key: str, factory):
+    with _registry_lock:
+        entry = table.get(key)
+        if entry is None:
+            entry = table[key] = [factory(), 0]
+        entry[1] += 1
+        return entry[0]
+
+
+def _checkin(table: Dict[str, list], key: str):
+    with _registry_lock:
+        entry = table.get(key)
+        if entry is None:
+            return
+        entry[1] -= 1
+        if entry[1] <= 0:
+            del table[key]
+
+
+@contextmanager
+def single_flight(lock_dir: Path, key: str):
+    """
+    Hold the single-flight lock for `key` (blocking).
+
+    Args:
+        lock_dir: Cache directory whose `.locks` subdirectory holds lock files
+        key: Artifact key (cache kind and hash)
+    """
+    thread_lock = _checkout(_thread_locks, key, threading.Lock)
+    try:
+        if not thread_lock.acquire(blocking=False):
+            logger.info(f"Waiting for in-flight request: {key}")
+            thread_lock.acquire()
+        try:
+            path = _lock_file_path(lock_dir, key)
+            while True:
+                fd = _open_lock_file(path)
+                try:
+                    if not _try_lock_file(fd):
+                        logger.info(f"Waiting for request in another process: {key}")
+                        _lock_file(fd)
+                except BaseException:
+                    os.close(fd)
+                    raise
+                if _lock_is_current(fd, path):
+                    break
+                _unlock_file(fd)
+                os.close(fd)
+            try:
+                yield
+            finally:
+                _release_lock_file(fd, path)
+        finally:
+            thread_lock.release()
+    finally:
+        _checkin(_thread_locks, key)
+
+
+@asynccontextmanager
+async def async_single_flight(lock_dir: Path, key: str):
+    """
+    Async twin of single_flight.
+
+    Tasks of one event loop queue on an asyncio.Lock; other threads and
+    processes are awaited by polling, so waiting never blocks the loop
+    and a cancelled waiter never leaves a lock behind.
+    """
+    loop = asyncio.get_running_loop()
+    with _registry_lock:
+        loop_locks = _async_locks.setdefault(loop, {})
+    task_lock = _checkout(loop_locks, key, asyncio.Lock)
+    try:
+        async with task_lock:
+            thread_lock = _checkout(_thread_locks, key, threading.Lock)
+            try:
+                waited = False
+                while not thread_lock.acquire(blocking=False):
+                    if not waited:
+                        logger.info(f"Waiting for in-flight request: {key}")
+                        waited = True
+                    await asyncio.sleep(_POLL_INTERVAL)
+                try:
+                    path = _lock_file_path(lock_dir, key)
+                    waited = False
+                    while True:
+                        fd = _open_lock_file(path)
+                        try:
+                            while not _try_lock_file(fd):
+                                if not waited:
+                                    logger.info(f"Waiting for request in another process: {key}")
+                                    waited = True
+                                await asyncio.sleep(_POLL_INTERVAL)
+                        except BaseException:
+                            os.close(fd)
+                            raise
+                        if _lock_is_current(fd, path):
+                            break
+                        _unlock_file(fd)
+                        os.close(fd)
+                    try:
+                        yield
+                    finally:
+                        _release_lock_file(fd, path)
+                finally:
+                    thread_lock.release()
+            finally:
+                _checkin(_thread_locks, key)
+    finally:
+        _checkin(loop_locks, key)
+
+
+def deduplicated(artifact: Callable[[dict], Optional[Tuple[Path, str]]]):
+    """
+    Decorator running a cache-backed function under single-flight coordination.
+
+    The wrapped function must check the cache itself before doing any work:
+    waiters enter it after the leader has finished and get a cache hit.
+
+    Args:
+        artifact: Maps the call's bound arguments to (lock_dir, key), or None
+            to run without coordination (caching disabled, artifact already cached)
+    """
+    def decorator(fn):
+        signature = inspect.signature(fn)
+
+        def resolve(args, kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return artifact(bound.arguments)
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                # resolve() may hit the cache backend or the file system
+                target = await asyncio.to_thread(resolve, args, kwargs)
+                if target is None:
+                    return await fn(*args, **kwargs)
+                async with async_single_flight(*target):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            target = resolve(args, kwargs)
+            if target is None:
+                return fn(*args, **kwargs)
+            with single_flight(*target):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def _reset_after_fork():
+    """Locks held by parent threads must not leak into forked children."""
+    global _registry_lock
+    _registry_lock = threading.Lock()
+    _thread_locks.clear()
+    _async_locks.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
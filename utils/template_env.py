@@ -0,0 +1,90 @@
+"""
+Process-wide registry of Jinja2 environments.
+
+One environment per template directory, so each template is parsed and
+compiled once per process instead of once per report. Compiled bytecode
+is also persisted in config.TEMPLATE_BYTECODE_DIR, which spares new batch
+worker processes and server restarts the compilation (Jinja2 checks the
+source checksum, so stale bytecode is never used).
+
+Jinja2's auto_reload (a stat and uptodate check on every get_template)
+is off unless config.TEMPLATE_AUTO_RELOAD. Instead get_template compares
+the rendered template's mtime with the one it was compiled from and drops
+the environment's compiled templates when it changed.
+"""
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template, TemplateNotFound
+
+import config
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_environments: Dict[str, Environment] = {}
+_mtimes: Dict[str, int] = {}  # template path -> mtime_ns it was compiled from
+
+
+def _bytecode_cache():
+    if not config.TEMPLATE_BYTECODE_CACHE:
+        return None
+    config.TEMPLATE_BYTECODE_DIR.mkdir(parents=True, exist_ok=True)
+    return FileSystemBytecodeCache(str(config.TEMPLATE_BYTECODE_DIR))
+
+
+def get_environment(template_dir: Path) -> Environment:
+    """Return the shared environment of a template directory, creating it on first use."""
+    marker = os.path.abspath(template_dir)
+    with _lock:
+        env = _environments.get(marker)
+        if env is None:
+            env = Environment(
+                loader=FileSystemLoader(marker),
+                auto_reload=config.TEMPLATE_AUTO_RELOAD,
+                bytecode_cache=_bytecode_cache()
+            )
+            _environments[marker] = env
+            logger.info(f"Template environment created for {marker}")
+        return env
+
+
+def get_template(template_path: Path) -> Template:
+    """
+    Compiled template, recompiled only if its file changed since it was loaded.
+
+    Args:
+        template_path: Path to the template file
+
+    Returns:
+        Jinja2 Template from the directory's shared environment
+
+    Raises:
+        TemplateNotFound: If the file does not exist
+    """
+    template_path = Path(os.path.abspath(template_path))
+    env = get_environment(template_path.parent)
+    try:
+        mtime = template_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        raise TemplateNotFound(template_path.name)
+    marker = str(template_path)
+    with _lock:
+        known = _mtimes.get(marker)
+        if known is not None and known != mtime and env.cache is not None:
+            env.cache.clear()
+            logger.info(f"Template changed, recompiling: {template_path}")
+        _mtimes[marker] = mtime
+    return env.get_template(template_path.name)
+
+
+def _reset_after_fork():
+    global _lock
+    _lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)